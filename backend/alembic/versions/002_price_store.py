@@ -0,0 +1,35 @@
+"""Add prices table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create prices table
+    op.create_table('prices',
+        sa.Column('asset', sa.String(length=10), nullable=False),
+        sa.Column('quote', sa.String(length=10), nullable=False),
+        sa.Column('price', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('change_24h', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('volume_24h', sa.Numeric(precision=30, scale=2), nullable=True),
+        sa.Column('market_cap', sa.Numeric(precision=30, scale=2), nullable=True),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('asset', 'quote')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('prices')
@@ -0,0 +1,95 @@
+"""Add reward_pools table and stake entry index
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+SECONDS_PER_YEAR = Decimal(365 * 24 * 60 * 60)
+
+
+def upgrade() -> None:
+    # Create reward_pools table
+    op.create_table('reward_pools',
+        sa.Column('asset', sa.String(length=10), nullable=False),
+        sa.Column('apr', sa.Numeric(precision=5, scale=2), nullable=False),
+        sa.Column('reward_index', sa.Numeric(precision=38, scale=18), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('asset', 'apr')
+    )
+    
+    op.add_column('stakes', sa.Column('entry_index', sa.Numeric(precision=38, scale=18), server_default='0', nullable=False))
+    
+    # Existing stakes keep what they earned so far: their pools start now at index zero,
+    # and each stake enters below zero by its accrued-but-unclaimed reward per unit
+    stakes = sa.table('stakes',
+        sa.column('id', sa.Integer()),
+        sa.column('asset', sa.String()),
+        sa.column('amount', sa.Numeric()),
+        sa.column('apr', sa.Numeric()),
+        sa.column('since', sa.DateTime()),
+        sa.column('is_active', sa.Boolean()),
+        sa.column('rewards_claimed', sa.Numeric()),
+        sa.column('entry_index', sa.Numeric())
+    )
+    pools = sa.table('reward_pools',
+        sa.column('asset', sa.String()),
+        sa.column('apr', sa.Numeric()),
+        sa.column('reward_index', sa.Numeric()),
+        sa.column('updated_at', sa.DateTime())
+    )
+    
+    now = datetime.utcnow()
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(stakes.c.id, stakes.c.asset, stakes.c.amount, stakes.c.apr, stakes.c.since, stakes.c.rewards_claimed)
+        .where(stakes.c.is_active == sa.true())
+    ).all()
+    
+    entries = []
+    pool_keys = set()
+    for stake_id, asset, amount, apr, since, claimed in rows:
+        pool_keys.add((asset, Decimal(apr)))
+        if not amount:
+            continue
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        # Same per-second accrual as the pools, from the stake's start less what was paid
+        elapsed = Decimal(str(max((now - since).total_seconds(), 0)))
+        unclaimed = Decimal(amount) * Decimal(apr) * elapsed / SECONDS_PER_YEAR - Decimal(claimed or 0)
+        if unclaimed > 0:
+            entries.append({
+                "stake_id": stake_id,
+                "entry_index": (-unclaimed / Decimal(amount)).quantize(Decimal("1e-18"))
+            })
+    
+    if pool_keys:
+        op.bulk_insert(pools, [
+            {"asset": asset, "apr": apr, "reward_index": Decimal("0"), "updated_at": now}
+            for asset, apr in sorted(pool_keys)
+        ])
+    if entries:
+        bind.execute(
+            stakes.update()
+            .where(stakes.c.id == sa.bindparam("stake_id"))
+            .values(entry_index=sa.bindparam("entry_index")),
+            entries
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('stakes', 'entry_index')
+    op.drop_table('reward_pools')
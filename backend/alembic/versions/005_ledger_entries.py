@@ -0,0 +1,59 @@
+"""Add ledger_entries table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create ledger_entries table
+    op.create_table('ledger_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('journal_id', sa.String(length=32), nullable=False),
+        sa.Column('account', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('asset', sa.String(length=10), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('reserved', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('reason', sa.String(length=32), nullable=False),
+        sa.Column('reference', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ledger_entries_id'), 'ledger_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_ledger_entries_journal_id'), 'ledger_entries', ['journal_id'], unique=False)
+    op.create_index(op.f('ix_ledger_entries_created_at'), 'ledger_entries', ['created_at'], unique=False)
+    op.create_index('ix_ledger_entries_user_asset', 'ledger_entries', ['user_id', 'asset', 'id'], unique=False)
+    op.create_index('ix_ledger_entries_account_asset', 'ledger_entries', ['account', 'asset'], unique=False)
+    
+    # Open the ledger with existing balances, balanced against an opening account
+    op.execute(
+        "INSERT INTO ledger_entries (journal_id, account, user_id, asset, amount, reserved, reason, created_at) "
+        "SELECT 'opening', 'user', user_id, asset, amount, reserved, 'opening_balance', CURRENT_TIMESTAMP "
+        "FROM balances WHERE amount <> 0 OR reserved <> 0"
+    )
+    op.execute(
+        "INSERT INTO ledger_entries (journal_id, account, user_id, asset, amount, reserved, reason, created_at) "
+        "SELECT 'opening', 'opening', NULL, asset, -SUM(amount), 0, 'opening_balance', CURRENT_TIMESTAMP "
+        "FROM balances GROUP BY asset HAVING SUM(amount) <> 0"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ledger_entries_account_asset', table_name='ledger_entries')
+    op.drop_index('ix_ledger_entries_user_asset', table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_created_at'), table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_journal_id'), table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_id'), table_name='ledger_entries')
+    op.drop_table('ledger_entries')
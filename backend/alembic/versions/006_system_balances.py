@@ -0,0 +1,39 @@
+"""Add system_balances table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create system_balances table
+    op.create_table('system_balances',
+        sa.Column('account', sa.String(length=32), nullable=False),
+        sa.Column('asset', sa.String(length=10), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('account', 'asset', 'shard')
+    )
+    
+    # Project system accounts already in the ledger into shard 0
+    op.execute(
+        "INSERT INTO system_balances (account, asset, shard, amount, updated_at) "
+        "SELECT account, asset, 0, SUM(amount), CURRENT_TIMESTAMP "
+        "FROM ledger_entries WHERE account <> 'user' GROUP BY account, asset"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('system_balances')
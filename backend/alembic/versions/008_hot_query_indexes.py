@@ -0,0 +1,39 @@
+"""Add composite and partial indexes for order and trade queries
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+OPEN_ORDER_PREDICATE = "status IN ('PENDING', 'PARTIALLY_FILLED') AND remaining > 0"
+
+
+def upgrade() -> None:
+    # Resting orders only, by book side in price then time order
+    op.create_index(
+        'ix_orders_open', 'orders', ['pair', 'side', 'price', 'id'], unique=False,
+        sqlite_where=sa.text(OPEN_ORDER_PREDICATE),
+        postgresql_where=sa.text(OPEN_ORDER_PREDICATE)
+    )
+    
+    # User trade history is an OR of buyer and seller, newest first
+    op.create_index('ix_trades_buyer_created', 'trades', ['buyer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_trades_seller_created', 'trades', ['seller_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_trades_pair_created', 'trades', ['pair', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trades_pair_created', table_name='trades')
+    op.drop_index('ix_trades_seller_created', table_name='trades')
+    op.drop_index('ix_trades_buyer_created', table_name='trades')
+    op.drop_index('ix_orders_open', table_name='orders')
@@ -0,0 +1,26 @@
+"""Add (created_at, id) keyset indexes for ticket and proposal history
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tickets_user_created', 'tickets', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_dao_proposals_created', 'dao_proposals', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dao_proposals_created', table_name='dao_proposals')
+    op.drop_index('ix_tickets_user_created', table_name='tickets')
@@ -0,0 +1,50 @@
+"""Add stat_counters table
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create stat_counters table
+    op.create_table('stat_counters',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('key', sa.String(length=32), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('value', sa.Numeric(precision=30, scale=8), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('name', 'key', 'shard')
+    )
+    
+    # Seed shard 0 with the current counts; write paths keep them up to date from here
+    op.execute(
+        "INSERT INTO stat_counters (name, key, shard, value, updated_at) "
+        "SELECT 'users', 'total', 0, COUNT(*), CURRENT_TIMESTAMP FROM users "
+        "UNION ALL "
+        "SELECT 'users', 'active', 0, COUNT(*), CURRENT_TIMESTAMP FROM users WHERE is_active IS NOT FALSE "
+        "UNION ALL "
+        "SELECT 'withdrawals', 'pending', 0, COUNT(*), CURRENT_TIMESTAMP FROM transactions "
+        "WHERE type = 'WITHDRAW' AND status = 'PENDING' "
+        "UNION ALL "
+        "SELECT 'tickets', 'open', 0, COUNT(*), CURRENT_TIMESTAMP FROM tickets WHERE status = 'OPEN' "
+        "UNION ALL "
+        "SELECT 'volume', asset, 0, SUM(amount), CURRENT_TIMESTAMP FROM transactions "
+        "WHERE status = 'COMPLETED' GROUP BY asset "
+        "UNION ALL "
+        "SELECT 'balances', asset, 0, SUM(amount), CURRENT_TIMESTAMP FROM balances GROUP BY asset"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stat_counters')
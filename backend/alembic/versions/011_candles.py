@@ -0,0 +1,37 @@
+"""Add candles table
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create candles table; the app backfills it from trades on startup
+    op.create_table('candles',
+        sa.Column('pair', sa.String(length=20), nullable=False),
+        sa.Column('interval', sa.String(length=4), nullable=False),
+        sa.Column('open_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('open', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('high', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('low', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('close', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('volume', sa.Numeric(precision=30, scale=8), nullable=False),
+        sa.Column('trades', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('pair', 'interval', 'open_time')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('candles')
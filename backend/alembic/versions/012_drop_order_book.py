@@ -0,0 +1,38 @@
+"""Drop the order_book table
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The in-memory matching engine rebuilds books from resting orders; nothing reads this table
+    op.drop_index(op.f('ix_order_book_pair'), table_name='order_book')
+    op.drop_table('order_book')
+
+
+def downgrade() -> None:
+    op.create_table('order_book',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('pair', sa.String(length=20), nullable=False),
+        # orders still uses the orderside type, so it must not be created again
+        sa.Column('side', postgresql.ENUM('BUY', 'SELL', name='orderside', create_type=False), nullable=False),
+        sa.Column('price', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=20, scale=8), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_book_pair'), 'order_book', ['pair'], unique=False)
@@ -3,6 +3,7 @@ Bridge Exchange Configuration
 All secrets should be set via environment variables or .env file
 """
 import os
+import socket
 from decimal import Decimal
 from typing import Optional
 
@@ -30,6 +31,13 @@ TONAPI_BASE_URL = os.getenv("TONAPI_BASE_URL", "https://tonapi.io")
 # CoinGecko API
 GECKO_API_KEY = os.getenv("GECKO_API_KEY", "TODO_GECKO_KEY")
 GECKO_BASE_URL = "https://api.coingecko.com/api/v3"
+PRICE_CACHE_TTL = 30  # seconds a cached price is served as fresh
+PRICE_CACHE_STALE_TTL = 300  # seconds a stale price is served while refreshing
+GECKO_COIN_IDS = {
+    "BTC": "bitcoin", "ETH": "ethereum", "USDT": "tether", "USDC": "usd-coin",
+    "TON": "the-open-network", "BNB": "binancecoin", "ADA": "cardano",
+    "SOL": "solana", "DOT": "polkadot", "MATIC": "matic-network"
+}
 
 # OpenAI Integration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "TODO_OPENAI_KEY")
@@ -38,17 +46,47 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "TODO_OPENAI_KEY")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = 10000  # verified tokens remembered until they expire
+MAX_TOKEN_LENGTH = 4096  # longer bearer tokens are rejected unparsed
 
 # Application Settings
 TEST_MODE = os.getenv("TEST_MODE", "true").lower() == "true"
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 NGROK_URL = os.getenv("NGROK_URL", "")
+DEFAULT_PAGE_SIZE = 20  # rows per history page
+MAX_PAGE_SIZE = 100  # largest page a client may request
+EXPORT_BATCH_SIZE = 1000  # rows fetched per server-side cursor round trip
 
 # Exchange Settings
 DEFAULT_FEE_RATE = Decimal("0.001")  # 0.1%
 MINIMUM_ORDER_SIZE = Decimal("0.001")
 MAXIMUM_ORDER_SIZE = Decimal("1000000")
 
+# Market Data WebSocket
+MARKET_DATA_DEPTH = 25  # levels per side in snapshots
+MARKET_DATA_SEND_QUEUE_SIZE = 256  # messages buffered per client before it is dropped
+BROADCAST_BATCH_SIZE = 32  # queued messages coalesced into one WebSocket write
+
+# Candles
+CANDLE_FLUSH_INTERVAL = 5  # seconds between writes of changed candles
+CANDLE_BACKFILL_BATCH_SIZE = 1000  # trades fetched per round trip when rebuilding candles
+MAX_CANDLES = 1000  # most candles returned per request
+
+# Outbound HTTP
+HTTP_TIMEOUT = 10.0  # seconds
+HTTP_CONNECT_TIMEOUT = 5.0  # seconds
+HTTP_MAX_CONNECTIONS_PER_HOST = 20
+HTTP_MAX_KEEPALIVE_PER_HOST = 10
+HTTP_KEEPALIVE_EXPIRY = 30.0  # seconds
+
+# Ledger
+HOT_ACCOUNT_SHARDS = 16  # sub-rows per hot system account, e.g. fees
+BALANCE_CACHE_TTL = 5.0  # seconds a user's cached balances are trusted
+BALANCE_CACHE_MAX_USERS = 10000  # users kept in each process's balance cache
+
+# Admin Statistics
+STAT_COUNTER_SHARDS = 16  # sub-rows per dashboard counter
+
 # Supported Assets
 SUPPORTED_CRYPTO_ASSETS = [
     "BTC", "ETH", "USDT", "USDC", "TON", "BNB", "ADA", "SOL", "DOT", "MATIC"
@@ -64,6 +102,8 @@ DEFAULT_TRADING_PAIRS = [
 ]
 
 # Security Settings
+USER_CACHE_TTL = 30.0  # seconds an authenticated user is trusted without a lookup
+USER_CACHE_MAX_SIZE = 10000  # users kept in each process's principal cache
 MAX_LOGIN_ATTEMPTS = 5
 LOCKOUT_DURATION_MINUTES = 15
 RATE_LIMIT_PER_MINUTE = 60
@@ -72,6 +112,18 @@ RATE_LIMIT_PER_MINUTE = 60
 INVOICE_POLLING_INTERVAL = 30  # seconds
 PRICE_UPDATE_INTERVAL = 10  # seconds
 RECONCILE_INTERVAL = 300  # seconds
+STAKING_REWARD_INTERVAL = 60  # seconds
+API_MONITOR_INTERVAL = 60  # seconds
+HOT_ACCOUNT_MERGE_INTERVAL = 60  # seconds
+STAT_COMPACTION_INTERVAL = 60  # seconds
+BACKGROUND_JOB_TIMEOUT = 120  # seconds a single run may take
+BACKGROUND_JOB_JITTER = 0.1  # +/- fraction of each interval
+NODE_ID = os.getenv("NODE_ID", f"{socket.gethostname()}:{os.getpid()}")
+JOB_LEASE_TTL = 30  # seconds a job lease lives without a heartbeat
+JOB_LEASE_HEARTBEAT = 10  # seconds between lease renewals
+INVOICE_POLL_SHARDS = 4  # invoice polling split into this many leased jobs
+INVOICE_POLL_BATCH_SIZE = 1000  # getInvoices maximum count
+INVOICE_POLL_CONCURRENCY = 4  # batches in flight at once
 
 # Admin Settings
 ADMIN_TELEGRAM_IDS = [
@@ -0,0 +1,11 @@
+"""
+In-process exchange components
+"""
+from .matching import MatchingEngine, PairBook, Fill, matching_engine
+
+__all__ = [
+    "MatchingEngine",
+    "PairBook",
+    "Fill",
+    "matching_engine"
+]
@@ -0,0 +1,127 @@
+"""
+Per-process write-through balance cache for Bridge Exchange
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import BALANCE_CACHE_TTL, BALANCE_CACHE_MAX_USERS
+from models.balance import Balance
+
+PENDING_KEY = "balance_cache_pending"
+
+@dataclass
+class BalanceSnapshot:
+    """Committed state of one (user, asset) balance"""
+    user_id: int
+    asset: str
+    amount: Decimal
+    reserved: Decimal
+    available: Decimal
+    version: int = 0
+
+    @classmethod
+    def from_row(cls, balance: Balance) -> "BalanceSnapshot":
+        return cls(
+            user_id=balance.user_id,
+            asset=balance.asset,
+            amount=Decimal(balance.amount or 0),
+            reserved=Decimal(balance.reserved or 0),
+            available=Decimal(balance.available or 0),
+            version=balance.version or 0
+        )
+
+    @classmethod
+    def empty(cls, user_id: int, asset: str) -> "BalanceSnapshot":
+        zero = Decimal("0")
+        return cls(user_id=user_id, asset=asset, amount=zero, reserved=zero, available=zero)
+
+class UserBalances:
+    """All balances of one user as loaded at a point in time"""
+    __slots__ = ("balances", "expires_at")
+
+    def __init__(self, balances: Dict[str, BalanceSnapshot], expires_at: float):
+        self.balances = balances
+        self.expires_at = expires_at
+
+class BalanceCache:
+    """LRU of users' full balance sets, updated from committed ledger writes"""
+
+    def __init__(self, ttl: float = BALANCE_CACHE_TTL, max_users: int = BALANCE_CACHE_MAX_USERS):
+        # Bounds staleness from writes made by other processes
+        self.ttl = ttl
+        self.max_users = max_users
+        self.users: "OrderedDict[int, UserBalances]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_balances(self, db: AsyncSession, user_id: int) -> Dict[str, BalanceSnapshot]:
+        """All of a user's balances by asset, loaded in one query on a miss"""
+        entry = self.users.get(user_id)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            self.users.move_to_end(user_id)
+            return entry.balances
+
+        self.misses += 1
+        result = await db.execute(select(Balance).where(Balance.user_id == user_id))
+        balances = {row.asset: BalanceSnapshot.from_row(row) for row in result.scalars().all()}
+        self.users[user_id] = UserBalances(balances, time.monotonic() + self.ttl)
+        self.users.move_to_end(user_id)
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+        return balances
+
+    async def get(self, db: AsyncSession, user_id: int, asset: str) -> BalanceSnapshot:
+        """One balance; missing balances read as zero"""
+        balances = await self.get_balances(db, user_id)
+        return balances.get(asset) or BalanceSnapshot.empty(user_id, asset)
+
+    def put(self, snapshot: BalanceSnapshot):
+        """Write through a committed balance, ignoring ones older than what is cached"""
+        entry = self.users.get(snapshot.user_id)
+        if entry is None:
+            # Next read loads the user's full set
+            return
+        cached = entry.balances.get(snapshot.asset)
+        if cached is None or snapshot.version >= cached.version:
+            entry.balances[snapshot.asset] = snapshot
+
+    def put_many(self, snapshots: Iterable[BalanceSnapshot]):
+        for snapshot in snapshots:
+            self.put(snapshot)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Drop one user's balances, or all of them"""
+        if user_id is None:
+            self.users.clear()
+        else:
+            self.users.pop(user_id, None)
+
+    def stage(self, db: AsyncSession, balances: Iterable[Balance]):
+        """Remember balances written in a transaction until it commits"""
+        pending = db.info.setdefault(PENDING_KEY, [])
+        pending.extend(BalanceSnapshot.from_row(balance) for balance in balances)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"users": len(self.users), "hits": self.hits, "misses": self.misses}
+
+balance_cache = BalanceCache()
+
+@event.listens_for(Session, "after_commit")
+def _write_through(session: Session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        balance_cache.put_many(pending)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction):
+    pending = session.info.pop(PENDING_KEY, None)
+    for snapshot in pending or ():
+        balance_cache.invalidate(snapshot.user_id)
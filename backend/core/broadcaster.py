@@ -0,0 +1,175 @@
+"""
+Topic fan-out for WebSocket clients
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from config import MARKET_DATA_SEND_QUEUE_SIZE, BROADCAST_BATCH_SIZE
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Encode a message, rendering Decimals and datetimes as strings"""
+    return json.dumps(message, default=_default, separators=(",", ":"))
+
+class Subscriber:
+    """One WebSocket client with a bounded queue of encoded frames"""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        queue_size: int = MARKET_DATA_SEND_QUEUE_SIZE,
+        batch_size: int = BROADCAST_BATCH_SIZE
+    ):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.topics: Set[str] = set()
+        self.user_id: Optional[int] = None
+        self.closed = False
+        self.max_queue_depth = 0
+        self.frames_sent = 0
+        self.writes = 0
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._sender = asyncio.create_task(self._run_sender())
+
+    def send(self, frame: str) -> bool:
+        """Queue an encoded frame; returns False if the client can't keep up"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            return False
+        depth = self.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return True
+
+    async def _run_sender(self):
+        try:
+            while True:
+                frames = [await self.queue.get()]
+                # Coalesce whatever else is already waiting into one write
+                while len(frames) < self.batch_size and not self.queue.empty():
+                    frames.append(self.queue.get_nowait())
+
+                if len(frames) == 1:
+                    await self.websocket.send_text(frames[0])
+                else:
+                    await self.websocket.send_text("[" + ",".join(frames) + "]")
+                self.frames_sent += len(frames)
+                self.writes += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket went away; the receive loop cleans up
+            self.closed = True
+
+    def close(self, code: int = 1000):
+        """Stop sending and close the socket"""
+        if self.closed and self._sender is None:
+            return
+        self.closed = True
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+class Broadcaster:
+    """Per-topic subscriber sets; each message is encoded once for all of them"""
+
+    def __init__(self):
+        self.topics: Dict[str, Set[Subscriber]] = {}
+        self.messages_published = 0
+        self.frames_queued = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, subscriber: Subscriber, topic: str):
+        """Add a subscriber to a topic"""
+        self.topics.setdefault(topic, set()).add(subscriber)
+        subscriber.topics.add(topic)
+
+    def unsubscribe(self, subscriber: Subscriber, topic: str):
+        """Remove a subscriber from a topic"""
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.topics[topic]
+        subscriber.topics.discard(topic)
+
+    def disconnect(self, subscriber: Subscriber):
+        """Remove a subscriber from every topic and close it"""
+        for topic in list(subscriber.topics):
+            self.unsubscribe(subscriber, topic)
+        subscriber.close()
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self.topics.get(topic))
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """Encode once and queue the same frame for every subscriber"""
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return 0
+
+        frame = encode_message(message)
+        self.messages_published += 1
+        delivered = 0
+        for subscriber in list(subscribers):
+            if subscriber.send(frame):
+                delivered += 1
+            else:
+                self.drop(subscriber)
+        self.frames_queued += delivered
+        return delivered
+
+    def send(self, subscriber: Subscriber, message: Dict[str, Any]) -> bool:
+        """Send a message to a single subscriber"""
+        if subscriber.send(encode_message(message)):
+            self.frames_queued += 1
+            return True
+        self.drop(subscriber)
+        return False
+
+    def drop(self, subscriber: Subscriber):
+        """Disconnect a slow consumer instead of buffering without bound"""
+        if subscriber.closed and not subscriber.topics:
+            return
+        self.dropped_subscribers += 1
+        for topic in list(subscriber.topics):
+            self.unsubscribe(subscriber, topic)
+        subscriber.close(code=1013)
+
+    def stats(self) -> Dict[str, Any]:
+        """Backpressure and throughput metrics"""
+        subscribers = {s for topic in self.topics.values() for s in topic}
+        return {
+            "topics": len(self.topics),
+            "subscribers": len(subscribers),
+            "messages_published": self.messages_published,
+            "frames_queued": self.frames_queued,
+            "dropped_subscribers": self.dropped_subscribers,
+            "queued_frames": sum(s.queue.qsize() for s in subscribers),
+            "max_queue_depth": max((s.max_queue_depth for s in subscribers), default=0),
+            "writes": sum(s.writes for s in subscribers),
+            "frames_sent": sum(s.frames_sent for s in subscribers)
+        }
+
+broadcaster = Broadcaster()
@@ -0,0 +1,219 @@
+"""
+Incremental OHLCV candles built from executed trades
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import CANDLE_BACKFILL_BATCH_SIZE
+from database import dialect_insert
+from models.candle import Candle
+from models.order import Trade
+
+# Interval name -> seconds; each divides a day, so day boundaries align every interval
+INTERVALS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60
+}
+
+EPOCH = datetime(1970, 1, 1)
+CANDLE_UPSERT_CHUNK = 500  # rows per upsert statement
+CANDLE_PRECISION = Decimal("0.00000001")  # Scale of the candles columns
+
+def utc_naive(at: datetime) -> datetime:
+    """Trade timestamps as naive UTC, whatever the dialect returned"""
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+def bucket_start(at: datetime, interval: str) -> datetime:
+    """Start of the interval bucket containing a naive UTC time"""
+    seconds = INTERVALS[interval]
+    elapsed = int((at - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+class Bar:
+    """One pair's OHLCV over one interval bucket"""
+    __slots__ = ("pair", "interval", "open_time", "open", "high", "low", "close", "volume", "trades")
+
+    def __init__(self, pair: str, interval: str, open_time: datetime, price: Decimal):
+        self.pair = pair
+        self.interval = interval
+        self.open_time = open_time
+        self.open = self.high = self.low = self.close = price
+        self.volume = Decimal("0")
+        self.trades = 0
+
+    def add(self, price: Decimal, amount: Decimal):
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        self.volume += amount
+        self.trades += 1
+
+    def as_row(self) -> Dict[str, Any]:
+        return {
+            "pair": self.pair,
+            "interval": self.interval,
+            "open_time": self.open_time,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "trades": self.trades
+        }
+
+class CandleBuilder:
+    """Current bars per (pair, interval) in memory, written to the candles table as they change"""
+
+    def __init__(self):
+        self.current: Dict[Tuple[str, str], Bar] = {}
+        # Bars changed since the last flush, by (pair, interval, open_time)
+        self.dirty: Dict[Tuple[str, str, datetime], Bar] = {}
+
+    def add_trade(self, pair: str, price: Decimal, amount: Decimal, at: Optional[datetime] = None):
+        """Fold one executed trade into every interval's current bar"""
+        at = utc_naive(at or datetime.utcnow())
+        # Same scale as stored bars, so flushed and in-memory bars read alike
+        price = Decimal(price).quantize(CANDLE_PRECISION)
+        amount = Decimal(amount).quantize(CANDLE_PRECISION)
+        for interval in INTERVALS:
+            open_time = bucket_start(at, interval)
+            bar = self.current.get((pair, interval))
+            # Trades arrive in commit order; one stamped just before the open bucket still lands in it
+            if bar is None or open_time > bar.open_time:
+                bar = Bar(pair, interval, open_time, price)
+                self.current[(pair, interval)] = bar
+            bar.add(price, amount)
+            self.dirty[(pair, interval, bar.open_time)] = bar
+
+    def add_trades(self, trades: Iterable[Trade]):
+        """Fold committed trades in"""
+        for trade in trades:
+            self.add_trade(trade.pair, trade.price, trade.amount, trade.created_at)
+
+    def bars(self, pair: str, interval: str) -> List[Bar]:
+        """In-memory bars not yet guaranteed to be in the table, oldest first"""
+        bars = [bar for (p, i, _), bar in self.dirty.items() if p == pair and i == interval]
+        current = self.current.get((pair, interval))
+        if current is not None and current not in bars:
+            bars.append(current)
+        return sorted(bars, key=lambda bar: bar.open_time)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Upsert and commit changed bars; closed ones then leave memory"""
+        if not self.dirty:
+            return 0
+        dirty, self.dirty = self.dirty, {}
+        try:
+            await _upsert(db, [bar.as_row() for bar in dirty.values()])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Keep newer changes made while writing
+            dirty.update(self.dirty)
+            self.dirty = dirty
+            raise
+        return len(dirty)
+
+    async def backfill(self, db: AsyncSession, since: Optional[datetime] = None) -> int:
+        """Rebuild candles from the trades table, by default from the start of the last stored day"""
+        if since is None:
+            since = await db.scalar(select(func.max(Candle.open_time)).where(Candle.interval == "1d"))
+        since = bucket_start(utc_naive(since), "1d") if since else None
+
+        self.current.clear()
+        self.dirty.clear()
+        query = select(Trade.pair, Trade.price, Trade.amount, Trade.created_at)
+        if since is not None:
+            # Stored and bound timestamps may be formatted differently, so filter exactly below
+            query = query.where(Trade.created_at >= since - timedelta(seconds=1))
+        result = await db.stream(
+            query.order_by(Trade.created_at, Trade.id).execution_options(yield_per=CANDLE_BACKFILL_BATCH_SIZE)
+        )
+
+        # Replayed from a day boundary, so every replayed bucket is complete and overwrites its row
+        replayed = 0
+        async for rows in result.partitions():
+            for pair, price, amount, created_at in rows:
+                if created_at is None or (since is not None and utc_naive(created_at) < since):
+                    continue
+                self.add_trade(pair, price, amount, created_at)
+                replayed += 1
+            # Closed bars are written as the stream goes, committed once it is done
+            closed = {key: bar for key, bar in self.dirty.items() if bar is not self.current.get(key[:2])}
+            if closed:
+                await _upsert(db, [bar.as_row() for bar in closed.values()])
+                for key in closed:
+                    del self.dirty[key]
+        await self.flush(db)
+        return replayed
+
+    async def run_flush(self, session_factory, interval: float):
+        """Write changed bars periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as db:
+                    await self.flush(db)
+            except Exception as e:
+                print(f"Error flushing candles: {e}")
+
+async def _upsert(db: AsyncSession, rows: List[Dict[str, Any]]):
+    # Chunked to stay under bound parameter limits
+    for start in range(0, len(rows), CANDLE_UPSERT_CHUNK):
+        stmt = dialect_insert(db, Candle).values(rows[start:start + CANDLE_UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Candle.pair, Candle.interval, Candle.open_time],
+            set_={
+                "open": stmt.excluded.open,
+                "high": stmt.excluded.high,
+                "low": stmt.excluded.low,
+                "close": stmt.excluded.close,
+                "volume": stmt.excluded.volume,
+                "trades": stmt.excluded.trades,
+                "updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+
+async def get_candles(
+    db: AsyncSession,
+    pair: str,
+    interval: str,
+    limit: int,
+    end: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Most recent bars up to end, oldest first, with unflushed in-memory bars overlaid"""
+    query = select(Candle).where(Candle.pair == pair, Candle.interval == interval)
+    if end is not None:
+        end = utc_naive(end)
+        query = query.where(Candle.open_time <= end)
+    result = await db.execute(query.order_by(Candle.open_time.desc()).limit(limit))
+    bars = {
+        utc_naive(candle.open_time): {
+            "open_time": utc_naive(candle.open_time),
+            "open": candle.open,
+            "high": candle.high,
+            "low": candle.low,
+            "close": candle.close,
+            "volume": candle.volume,
+            "trades": candle.trades
+        }
+        for candle in result.scalars().all()
+    }
+    for bar in candle_builder.bars(pair, interval):
+        if end is None or bar.open_time <= end:
+            row = bar.as_row()
+            del row["pair"], row["interval"]
+            bars[bar.open_time] = row
+    return [bars[open_time] for open_time in sorted(bars)[-limit:]]
+
+candle_builder = CandleBuilder()
@@ -0,0 +1,44 @@
+"""
+Deposit settlement for Bridge Exchange
+"""
+from typing import List
+
+from sqlalchemy import update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.ledger import Journal, EXTERNAL_ACCOUNT
+from models.invoice import Invoice, InvoiceStatus
+from models.transaction import Transaction, TransactionType, TransactionStatus
+
+async def settle_paid_invoices(db: AsyncSession, invoice_ids: List[int]) -> List[Invoice]:
+    """Mark pending invoices paid and credit them in one go; caller commits"""
+    if not invoice_ids:
+        return []
+
+    # Only still-pending rows flip, so a webhook and the poller can't both credit
+    result = await db.scalars(
+        update(Invoice)
+        .where(Invoice.id.in_(invoice_ids), Invoice.status == InvoiceStatus.PENDING)
+        .values(status=InvoiceStatus.PAID, updated_at=func.now())
+        .returning(Invoice),
+        execution_options={"populate_existing": True}
+    )
+    invoices = list(result.all())
+
+    journal = Journal("deposit")
+    for invoice in invoices:
+        journal.transfer(EXTERNAL_ACCOUNT, invoice.user_id, invoice.asset, invoice.amount)
+
+    db.add_all([
+        Transaction(
+            user_id=invoice.user_id,
+            type=TransactionType.DEPOSIT,
+            amount=invoice.amount,
+            asset=invoice.asset,
+            status=TransactionStatus.COMPLETED,
+            meta={"invoice_id": invoice.id}
+        )
+        for invoice in invoices
+    ])
+    await journal.apply(db)
+    return invoices
@@ -0,0 +1,106 @@
+"""
+Streaming CSV/NDJSON exports of trade and transaction history
+"""
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import EXPORT_BATCH_SIZE
+from database import engine
+from models.order import Trade
+from models.transaction import Transaction
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+TRADE_COLUMNS = [
+    Trade.id, Trade.created_at, Trade.pair, Trade.price, Trade.amount, Trade.fee,
+    Trade.buyer_id, Trade.seller_id, Trade.buy_order_id, Trade.sell_order_id
+]
+
+TRANSACTION_COLUMNS = [
+    Transaction.id, Transaction.created_at, Transaction.user_id, Transaction.type,
+    Transaction.status, Transaction.asset, Transaction.amount, Transaction.fee,
+    Transaction.tx_hash, Transaction.from_address, Transaction.to_address
+]
+
+def trade_export_query(user_id: Optional[int] = None, pair: Optional[str] = None) -> Select:
+    """Trades in id order, optionally one user's or one pair's"""
+    query = select(*TRADE_COLUMNS)
+    if user_id is not None:
+        query = query.where(or_(Trade.buyer_id == user_id, Trade.seller_id == user_id))
+    if pair:
+        query = query.where(Trade.pair == pair)
+    return query.order_by(Trade.id)
+
+def transaction_export_query(user_id: Optional[int] = None, asset: Optional[str] = None) -> Select:
+    """Transactions in id order, optionally one user's or one asset's"""
+    query = select(*TRANSACTION_COLUMNS)
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    if asset:
+        query = query.where(Transaction.asset == asset)
+    return query.order_by(Transaction.id)
+
+def _value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _csv_lines(rows, writer: Any, buffer: io.StringIO) -> str:
+    for row in rows:
+        writer.writerow([_value(value) for value in row])
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+async def export_rows(
+    query: Select,
+    fmt: str,
+    bind: AsyncEngine = engine,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[str]:
+    """Encode a query's rows batch by batch from a server-side cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    keys = [column.key for column in query.selected_columns]
+    if fmt == "csv":
+        writer.writerow(keys)
+        yield _csv_lines((), writer, buffer)
+
+    # Own connection: the stream outlives the request's session
+    async with bind.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            if fmt == "csv":
+                yield _csv_lines(rows, writer, buffer)
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(keys, map(_value, row)))) + "\n"
+                    for row in rows
+                )
+
+def export_response(query: Select, fmt: str, name: str, bind: AsyncEngine = engine) -> StreamingResponse:
+    """Stream a query as a CSV or NDJSON download"""
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format {fmt}")
+    return StreamingResponse(
+        export_rows(query, fmt, bind),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
@@ -0,0 +1,171 @@
+"""
+Database-backed job leases for running background jobs on one node each
+"""
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import select, update, delete, func, case, or_, and_
+
+from config import NODE_ID, JOB_LEASE_TTL, JOB_LEASE_HEARTBEAT
+from database import dialect_insert
+from models.job_lease import JobLease
+
+NODE_PREFIX = "node:"
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class LeaseManager:
+    """Acquires, renews and spreads job leases between live nodes"""
+
+    def __init__(
+        self,
+        session_factory,
+        node_id: str = NODE_ID,
+        ttl: float = JOB_LEASE_TTL,
+        heartbeat: float = JOB_LEASE_HEARTBEAT
+    ):
+        self.session_factory = session_factory
+        self.node_id = node_id
+        self.ttl = timedelta(seconds=ttl)
+        self.heartbeat_interval = heartbeat
+        # Lease name -> when it expires as far as this node knows
+        self.held: Dict[str, datetime] = {}
+        self.jobs: Set[str] = set()
+        self.live_nodes = 1
+
+    @property
+    def fair_share(self) -> int:
+        """Job leases this node may hold"""
+        return max(1, math.ceil(len(self.jobs) / max(1, self.live_nodes)))
+
+    def holds(self, name: str) -> bool:
+        """Check the lease is held and not past its expiry"""
+        expires_at = self.held.get(name)
+        return expires_at is not None and expires_at > _now()
+
+    async def _acquire(self, db, name: str, now: datetime) -> bool:
+        """Take the lease if it is free, expired or already ours"""
+        expires_at = now + self.ttl
+        stmt = dialect_insert(db, JobLease).values(
+            name=name,
+            holder=self.node_id,
+            expires_at=expires_at,
+            acquired_at=now,
+            generation=1
+        )
+        ours = JobLease.holder == self.node_id
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JobLease.name],
+            set_={
+                "holder": stmt.excluded.holder,
+                "expires_at": stmt.excluded.expires_at,
+                "acquired_at": case((ours, JobLease.acquired_at), else_=stmt.excluded.acquired_at),
+                "generation": case((ours, JobLease.generation), else_=JobLease.generation + 1)
+            },
+            where=or_(ours, JobLease.expires_at < now)
+        )
+        result = await db.execute(stmt.returning(JobLease.name))
+        acquired = result.first() is not None
+        if acquired:
+            self.held[name] = expires_at
+        return acquired
+
+    async def acquire(self, name: str) -> bool:
+        """Try to take a lease"""
+        async with self.session_factory() as db:
+            acquired = await self._acquire(db, name, _now())
+            await db.commit()
+        return acquired
+
+    async def ensure(self, name: str) -> bool:
+        """Hold the lease for a job, taking it if this node is under its fair share"""
+        self.jobs.add(name)
+        if self.holds(name):
+            return True
+        self.held.pop(name, None)
+        if len(self.held_jobs()) >= self.fair_share:
+            return False
+        return await self.acquire(name)
+
+    def held_jobs(self) -> Set[str]:
+        return {name for name in self.held if not name.startswith(NODE_PREFIX)}
+
+    async def renew(self) -> Set[str]:
+        """Extend every held lease; drops the ones another node took over"""
+        now = _now()
+        expires_at = now + self.ttl
+        async with self.session_factory() as db:
+            # Presence row, used to count live nodes for sharding
+            await self._acquire(db, f"{NODE_PREFIX}{self.node_id}", now)
+
+            # Snapshot, since ensure() and release() keep changing held while this awaits
+            held = dict(self.held)
+            names = list(held)
+            result = await db.execute(
+                update(JobLease)
+                .where(JobLease.name.in_(names), JobLease.holder == self.node_id)
+                .values(expires_at=expires_at)
+                .returning(JobLease.name)
+            )
+            renewed = set(result.scalars().all())
+
+            live = await db.execute(
+                select(func.count()).select_from(JobLease).where(and_(
+                    JobLease.name.like(f"{NODE_PREFIX}%"),
+                    JobLease.expires_at > now
+                ))
+            )
+            self.live_nodes = live.scalar() or 1
+            await db.commit()
+
+        for name in names:
+            # Taken again or released meanwhile, that result is newer than this one
+            if self.held.get(name) != held[name]:
+                continue
+            if name in renewed:
+                self.held[name] = expires_at
+            else:
+                del self.held[name]
+        return renewed
+
+    async def rebalance(self, busy: Iterable[str] = ()):
+        """Give back leases above this node's fair share so new nodes can pick them up"""
+        busy = set(busy)
+        extra = len(self.held_jobs()) - self.fair_share
+        for name in sorted(self.held_jobs() - busy):
+            if extra <= 0:
+                break
+            await self.release(name)
+            extra -= 1
+
+    async def release(self, name: str):
+        """Give up a lease"""
+        self.held.pop(name, None)
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(JobLease).where(JobLease.name == name, JobLease.holder == self.node_id)
+            )
+            await db.commit()
+
+    async def release_all(self):
+        """Give up every lease, e.g. on shutdown"""
+        names = list(self.held) + [f"{NODE_PREFIX}{self.node_id}"]
+        self.held = {}
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(JobLease).where(JobLease.name.in_(names), JobLease.holder == self.node_id)
+            )
+            await db.commit()
+
+    async def run_heartbeat(self, busy=None):
+        """Renew leases until cancelled; busy returns jobs that are mid-run"""
+        while True:
+            try:
+                await self.renew()
+                await self.rebalance(busy() if busy else ())
+            except Exception as e:
+                print(f"Lease heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
@@ -0,0 +1,374 @@
+"""
+Double-entry ledger with a materialized balances projection
+"""
+import random
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete, insert, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import HOT_ACCOUNT_SHARDS
+from core.balances import balance_cache
+from core.stats import BALANCES, record
+from database import dialect_insert
+from models.balance import Balance
+from models.ledger_entry import LedgerEntry, USER_ACCOUNT
+from models.system_balance import SystemBalance
+
+# System accounts user balances are moved against
+EXTERNAL_ACCOUNT = "external"  # Deposits and withdrawals
+FEES_ACCOUNT = "fees"  # Fees charged to users
+REWARDS_ACCOUNT = "rewards"  # Staking rewards paid out
+STAKING_ACCOUNT = "staking"  # Principal locked in stakes
+ADJUSTMENTS_ACCOUNT = "adjustments"  # Admin adjustments and refunds
+EXTERNAL_LIQUIDITY_ACCOUNT = "external_liquidity"  # Counterparty of fills routed to Bybit
+
+# Credited on nearly every trade, so their balances are spread over shard rows
+HOT_ACCOUNTS = {FEES_ACCOUNT, EXTERNAL_LIQUIDITY_ACCOUNT}
+
+BALANCE_PRECISION = Decimal("0.00000001")  # Scale of balances and entries
+
+class UnbalancedJournal(ValueError):
+    """A journal whose entries don't sum to zero for some asset"""
+
+class InsufficientBalance(ValueError):
+    """A journal that would take a user's available balance below zero"""
+
+class BalanceDelta:
+    """Pending change to one (user, asset) balance"""
+    __slots__ = ("amount", "reserved")
+
+    def __init__(self):
+        self.amount = Decimal("0")
+        self.reserved = Decimal("0")
+
+class Journal:
+    """One balanced set of ledger entries, written together with the balances they change"""
+
+    def __init__(self, reason: str, reference: Optional[str] = None):
+        self.reason = reason
+        self.reference = reference
+        self.deltas: Dict[Tuple[int, str], BalanceDelta] = defaultdict(BalanceDelta)
+        self.system: Dict[Tuple[str, str], Decimal] = defaultdict(Decimal)
+
+    def adjust(
+        self,
+        user_id: int,
+        asset: str,
+        amount: Decimal = Decimal("0"),
+        reserved: Decimal = Decimal("0")
+    ):
+        """Add to the pending delta for a user balance"""
+        delta = self.deltas[(user_id, asset)]
+        delta.amount += amount
+        delta.reserved += reserved
+
+    def adjust_system(self, account: str, asset: str, amount: Decimal):
+        """Add to the pending delta for a system account"""
+        self.system[(account, asset)] += amount
+
+    def transfer(self, account: str, user_id: int, asset: str, amount: Decimal):
+        """Move amount from a system account to a user; negative moves it back"""
+        self.adjust_system(account, asset, -amount)
+        self.adjust(user_id, asset, amount=amount)
+
+    def entries(self, journal_id: str) -> List[Dict[str, Any]]:
+        """Ledger rows for the non-zero deltas"""
+        rows = [
+            {
+                "journal_id": journal_id,
+                "account": USER_ACCOUNT,
+                "user_id": user_id,
+                "asset": asset,
+                "amount": delta.amount,
+                "reserved": delta.reserved,
+                "reason": self.reason,
+                "reference": self.reference
+            }
+            for (user_id, asset), delta in self.deltas.items()
+            if delta.amount or delta.reserved
+        ]
+        rows.extend(
+            {
+                "journal_id": journal_id,
+                "account": account,
+                "user_id": None,
+                "asset": asset,
+                "amount": amount,
+                "reserved": Decimal("0"),
+                "reason": self.reason,
+                "reference": self.reference
+            }
+            for (account, asset), amount in self.system.items()
+            if amount
+        )
+        return rows
+
+    def check_balanced(self):
+        """Raise unless every asset's amounts sum to zero; reservations are memo only"""
+        totals: Dict[str, Decimal] = defaultdict(Decimal)
+        for (_, asset), delta in self.deltas.items():
+            totals[asset] += delta.amount
+        for (_, asset), amount in self.system.items():
+            totals[asset] += amount
+        unbalanced = {asset: total for asset, total in totals.items() if total}
+        if unbalanced:
+            raise UnbalancedJournal(f"Unbalanced {self.reason} journal: {unbalanced}")
+
+    async def apply(self, db: AsyncSession) -> List[Balance]:
+        """Insert the entries and upsert the balance projection in one statement each; caller commits"""
+        self.check_balanced()
+        rows = self.entries(uuid.uuid4().hex)
+        if not rows:
+            return []
+        await db.execute(insert(LedgerEntry), rows)
+        await self._apply_system(db)
+
+        balances = [
+            {
+                "user_id": user_id,
+                "asset": asset,
+                "amount": delta.amount,
+                "reserved": delta.reserved,
+                "available": delta.amount - delta.reserved,
+                "version": 1
+            }
+            for (user_id, asset), delta in self.deltas.items()
+            if delta.amount or delta.reserved
+        ]
+        if not balances:
+            return []
+
+        stmt = dialect_insert(db, Balance).values(balances)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Balance.user_id, Balance.asset],
+            set_={
+                "amount": Balance.amount + stmt.excluded.amount,
+                "reserved": Balance.reserved + stmt.excluded.reserved,
+                "available": (Balance.amount + stmt.excluded.amount)
+                - (Balance.reserved + stmt.excluded.reserved),
+                "version": Balance.version + 1,
+                "updated_at": func.now()
+            }
+        )
+
+        # Refresh any balances already loaded in this session
+        result = await db.scalars(
+            stmt.returning(Balance),
+            execution_options={"populate_existing": True}
+        )
+        rows = list(result.all())
+
+        # Pre-checks may have read a cached balance, so debits are checked on the written rows
+        for balance in rows:
+            delta = self.deltas[(balance.user_id, balance.asset)]
+            if delta.amount - delta.reserved < 0 and balance.available < 0:
+                raise InsufficientBalance(f"Insufficient {balance.asset} balance for user {balance.user_id}")
+
+        # Dashboard balance totals move with the projection
+        totals: Dict[Tuple[str, str], Decimal] = defaultdict(Decimal)
+        for (user_id, asset), delta in self.deltas.items():
+            totals[(BALANCES, asset)] += delta.amount
+        await record(db, totals)
+
+        balance_cache.stage(db, rows)
+        return rows
+
+    async def _apply_system(self, db: AsyncSession):
+        """Upsert system account deltas, each hot account into a random shard"""
+        rows = [
+            {
+                "account": account,
+                "asset": asset,
+                "shard": shard_for(account),
+                "amount": amount
+            }
+            for (account, asset), amount in self.system.items()
+            if amount
+        ]
+        if not rows:
+            return
+
+        stmt = dialect_insert(db, SystemBalance).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SystemBalance.account, SystemBalance.asset, SystemBalance.shard],
+            set_={
+                "amount": SystemBalance.amount + stmt.excluded.amount,
+                "updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+
+def shard_for(account: str) -> int:
+    """Shard row a write to a system account goes to"""
+    if account in HOT_ACCOUNTS:
+        return random.randrange(HOT_ACCOUNT_SHARDS)
+    return 0
+
+async def system_balances(db: AsyncSession, account: Optional[str] = None) -> Dict[Tuple[str, str], Decimal]:
+    """System account balances with shards merged at read time"""
+    stmt = (
+        select(SystemBalance.account, SystemBalance.asset, func.sum(SystemBalance.amount))
+        .group_by(SystemBalance.account, SystemBalance.asset)
+    )
+    if account is not None:
+        stmt = stmt.where(SystemBalance.account == account)
+    result = await db.execute(stmt)
+    return {(row[0], row[1]): _quantize(row[2]) for row in result.all()}
+
+async def merge_hot_accounts(db: AsyncSession) -> int:
+    """Fold shard rows into shard 0; caller commits"""
+    # Deleting locks the shards, writers arriving meanwhile start new rows
+    result = await db.execute(
+        delete(SystemBalance)
+        .where(SystemBalance.shard > 0)
+        .returning(SystemBalance.account, SystemBalance.asset, SystemBalance.amount)
+    )
+    merged: Dict[Tuple[str, str], Decimal] = defaultdict(Decimal)
+    count = 0
+    for account, asset, amount in result.all():
+        merged[(account, asset)] += Decimal(str(amount))
+        count += 1
+    if not merged:
+        return 0
+
+    stmt = dialect_insert(db, SystemBalance).values([
+        {"account": account, "asset": asset, "shard": 0, "amount": amount}
+        for (account, asset), amount in merged.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SystemBalance.account, SystemBalance.asset, SystemBalance.shard],
+        set_={
+            "amount": SystemBalance.amount + stmt.excluded.amount,
+            "updated_at": func.now()
+        }
+    )
+    await db.execute(stmt)
+    return count
+
+def _quantize(value: Any) -> Decimal:
+    # SQLite sums numerics as floats
+    return Decimal(str(value or 0)).quantize(BALANCE_PRECISION)
+
+def _ledger_totals(user_id: Optional[int] = None):
+    """Per (user, asset) sums of user entries"""
+    amount = func.sum(LedgerEntry.amount)
+    reserved = func.sum(LedgerEntry.reserved)
+    stmt = (
+        select(
+            LedgerEntry.user_id,
+            LedgerEntry.asset,
+            amount.label("amount"),
+            reserved.label("reserved"),
+            (amount - reserved).label("available")
+        )
+        .where(LedgerEntry.account == USER_ACCOUNT)
+        .group_by(LedgerEntry.user_id, LedgerEntry.asset)
+    )
+    if user_id is not None:
+        stmt = stmt.where(LedgerEntry.user_id == user_id)
+    return stmt
+
+async def rebuild_balances(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Recompute the balances projections from the ledger; caller commits"""
+    clear = delete(Balance)
+    if user_id is not None:
+        clear = clear.where(Balance.user_id == user_id)
+    await db.execute(clear)
+
+    totals = _ledger_totals(user_id).subquery()
+    result = await db.execute(
+        insert(Balance).from_select(
+            ["user_id", "asset", "amount", "reserved", "available", "updated_at"],
+            select(
+                totals.c.user_id,
+                totals.c.asset,
+                totals.c.amount,
+                totals.c.reserved,
+                totals.c.available,
+                func.now()
+            )
+        )
+    )
+    rebuilt = result.rowcount
+
+    if user_id is None:
+        await db.execute(delete(SystemBalance))
+        await db.execute(
+            insert(SystemBalance).from_select(
+                ["account", "asset", "shard", "amount", "updated_at"],
+                select(
+                    LedgerEntry.account,
+                    LedgerEntry.asset,
+                    literal(0),
+                    func.sum(LedgerEntry.amount),
+                    func.now()
+                )
+                .where(LedgerEntry.account != USER_ACCOUNT)
+                .group_by(LedgerEntry.account, LedgerEntry.asset)
+            )
+        )
+
+    # Loaded and cached balances are stale now
+    db.expire_all()
+    balance_cache.invalidate(user_id)
+    return rebuilt
+
+async def verify_balances(db: AsyncSession, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Balances that differ from the ledger, plus assets whose entries don't net to zero"""
+    result = await db.execute(_ledger_totals(user_id))
+    expected = {(row.user_id, row.asset): row for row in result.all()}
+
+    stmt = select(Balance)
+    if user_id is not None:
+        stmt = stmt.where(Balance.user_id == user_id)
+    result = await db.execute(stmt)
+    actual = {(b.user_id, b.asset): b for b in result.scalars().all()}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        entry, balance = expected.get(key), actual.get(key)
+        ledger_amount = _quantize(entry.amount if entry else 0)
+        ledger_reserved = _quantize(entry.reserved if entry else 0)
+        amount = _quantize(balance.amount if balance else 0)
+        reserved = _quantize(balance.reserved if balance else 0)
+        available = _quantize(balance.available if balance else 0)
+        if (amount, reserved, available) != (ledger_amount, ledger_reserved, ledger_amount - ledger_reserved):
+            mismatches.append({
+                "user_id": key[0],
+                "asset": key[1],
+                "amount": amount,
+                "reserved": reserved,
+                "available": available,
+                "ledger_amount": ledger_amount,
+                "ledger_reserved": ledger_reserved
+            })
+
+    if user_id is None:
+        result = await db.execute(
+            select(LedgerEntry.account, LedgerEntry.asset, func.sum(LedgerEntry.amount))
+            .where(LedgerEntry.account != USER_ACCOUNT)
+            .group_by(LedgerEntry.account, LedgerEntry.asset)
+        )
+        ledger_system = {(row[0], row[1]): _quantize(row[2]) for row in result.all()}
+        projected = await system_balances(db)
+        for key in sorted(set(ledger_system) | set(projected)):
+            amount, ledger_amount = projected.get(key, _quantize(0)), ledger_system.get(key, _quantize(0))
+            if amount != ledger_amount:
+                mismatches.append({
+                    "account": key[0],
+                    "asset": key[1],
+                    "amount": amount,
+                    "ledger_amount": ledger_amount
+                })
+
+        result = await db.execute(
+            select(LedgerEntry.asset, func.sum(LedgerEntry.amount)).group_by(LedgerEntry.asset)
+        )
+        for asset, total in result.all():
+            if _quantize(total):
+                mismatches.append({"asset": asset, "ledger_total": _quantize(total)})
+    return mismatches
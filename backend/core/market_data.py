@@ -0,0 +1,155 @@
+"""
+WebSocket market data feed for Bridge Exchange
+"""
+from datetime import datetime
+from typing import Any, Dict, List
+
+from config import MARKET_DATA_DEPTH
+from core.broadcaster import Broadcaster, Subscriber, broadcaster
+from core.matching import matching_engine
+from models.order import Order, OrderSide, Trade
+
+def market_topic(pair: str) -> str:
+    return f"market:{pair}"
+
+def user_topic(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def _levels(levels) -> List[List[str]]:
+    return [[str(price), str(amount)] for price, amount in levels]
+
+class MarketDataFeed:
+    """Per-pair order book diffs, trades and tickers, plus per-user order events"""
+
+    def __init__(self, broadcaster: Broadcaster):
+        self.broadcaster = broadcaster
+        self.last_prices: Dict[str, Any] = {}
+
+    def subscribe(self, subscriber: Subscriber, pair: str):
+        """Subscribe to a pair and send its current snapshot"""
+        self.broadcaster.subscribe(subscriber, market_topic(pair))
+        self.broadcaster.send(subscriber, self._snapshot_message(pair))
+
+    def unsubscribe(self, subscriber: Subscriber, pair: str):
+        """Unsubscribe from a pair"""
+        self.broadcaster.unsubscribe(subscriber, market_topic(pair))
+
+    def subscribe_user(self, subscriber: Subscriber, user_id: int):
+        """Subscribe an authenticated client to its own order events"""
+        subscriber.user_id = user_id
+        self.broadcaster.subscribe(subscriber, user_topic(user_id))
+
+    def publish_book(self, pair: str):
+        """Publish levels changed since the last diff"""
+        diff = matching_engine.get_book(pair).drain_changes()
+        if diff is None:
+            return
+        topic = market_topic(pair)
+        if not self.broadcaster.has_subscribers(topic):
+            return
+        self.broadcaster.publish(topic, {
+            "type": "depth",
+            "pair": pair,
+            "prev_sequence": diff["prev_sequence"],
+            "sequence": diff["sequence"],
+            "bids": _levels(diff["bids"]),
+            "asks": _levels(diff["asks"])
+        })
+        self.publish_ticker(pair)
+
+    def publish_snapshot(self, pair: str):
+        """Publish a full snapshot, e.g. after the book was rebuilt"""
+        matching_engine.get_book(pair).mark_published()
+        topic = market_topic(pair)
+        if self.broadcaster.has_subscribers(topic):
+            self.broadcaster.publish(topic, self._snapshot_message(pair))
+
+    def publish_trades(self, pair: str, trades: List[Trade], taker_side: OrderSide):
+        """Publish executed trades"""
+        if not trades:
+            return
+        self.last_prices[pair] = trades[-1].price
+        topic = market_topic(pair)
+        if not self.broadcaster.has_subscribers(topic):
+            return
+        self.broadcaster.publish(topic, {
+            "type": "trades",
+            "pair": pair,
+            "trades": [
+                {
+                    "id": trade.id,
+                    "price": trade.price,
+                    "amount": trade.amount,
+                    "side": taker_side.value,
+                    "created_at": trade.created_at
+                }
+                for trade in trades
+            ]
+        })
+
+    def publish_ticker(self, pair: str):
+        """Publish best bid/ask and last price"""
+        topic = market_topic(pair)
+        if self.broadcaster.has_subscribers(topic):
+            self.broadcaster.publish(topic, self._ticker_message(pair))
+
+    def publish_order(self, order: Order):
+        """Publish an order status change to its owner"""
+        self.publish_user_event(order.user_id, {
+            "type": "order",
+            "order_id": order.id,
+            "pair": order.pair,
+            "side": order.side.value,
+            "status": order.status.value,
+            "filled": order.filled,
+            "remaining": order.remaining
+        })
+
+    def publish_fills(self, trades: List[Trade]):
+        """Publish each fill to the buyer and the seller"""
+        for trade in trades:
+            for user_id, order_id, side in (
+                (trade.buyer_id, trade.buy_order_id, OrderSide.BUY),
+                (trade.seller_id, trade.sell_order_id, OrderSide.SELL)
+            ):
+                self.publish_user_event(user_id, {
+                    "type": "fill",
+                    "trade_id": trade.id,
+                    "order_id": order_id,
+                    "pair": trade.pair,
+                    "side": side.value,
+                    "price": trade.price,
+                    "amount": trade.amount
+                })
+
+    def publish_user_event(self, user_id: int, message: Dict[str, Any]):
+        """Publish a private event to one user's connections"""
+        topic = user_topic(user_id)
+        if self.broadcaster.has_subscribers(topic):
+            self.broadcaster.publish(topic, message)
+
+    def _snapshot_message(self, pair: str) -> Dict[str, Any]:
+        snapshot = matching_engine.depth(pair, MARKET_DATA_DEPTH)
+        return {
+            "type": "snapshot",
+            "pair": pair,
+            "sequence": snapshot["sequence"],
+            "bids": _levels(snapshot["bids"]),
+            "asks": _levels(snapshot["asks"])
+        }
+
+    def _ticker_message(self, pair: str) -> Dict[str, Any]:
+        book = matching_engine.get_book(pair)
+        best_bid = book.bids.best()
+        best_ask = book.asks.best()
+        return {
+            "type": "ticker",
+            "pair": pair,
+            "sequence": book.sequence,
+            "last_price": self.last_prices.get(pair),
+            "best_bid": best_bid.price if best_bid else None,
+            "best_ask": best_ask.price if best_ask else None,
+            "timestamp": datetime.utcnow()
+        }
+
+market_feed = MarketDataFeed(broadcaster)
@@ -0,0 +1,392 @@
+"""
+In-memory matching engine for Bridge Exchange
+"""
+import bisect
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, and_, bindparam, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import MARKET_DATA_DEPTH
+from models.order import Order, OrderSide, OrderStatus
+
+class RestingOrder:
+    """Order resting on the in-memory book"""
+    __slots__ = ("order_id", "user_id", "side", "price", "amount", "remaining")
+
+    def __init__(
+        self,
+        order_id: int,
+        user_id: int,
+        side: OrderSide,
+        price: Decimal,
+        amount: Decimal,
+        remaining: Decimal
+    ):
+        self.order_id = order_id
+        self.user_id = user_id
+        self.side = side
+        self.price = price
+        self.amount = amount
+        self.remaining = remaining
+
+    @property
+    def filled(self) -> Decimal:
+        return self.amount - self.remaining
+
+    def __repr__(self):
+        return f"<RestingOrder(order_id={self.order_id}, side={self.side}, price={self.price}, remaining={self.remaining})>"
+
+class PriceLevel:
+    """FIFO queue of resting orders at one price"""
+    __slots__ = ("price", "orders", "total")
+
+    def __init__(self, price: Decimal):
+        self.price = price
+        self.orders: Deque[RestingOrder] = deque()
+        self.total = Decimal("0")
+
+    def append(self, order: RestingOrder):
+        self.orders.append(order)
+        self.total += order.remaining
+
+    def is_empty(self) -> bool:
+        # Cancelled orders are removed lazily, so only live volume counts
+        return self.total <= 0
+
+class BookSide:
+    """Sorted price levels for one side of a pair"""
+
+    def __init__(self, side: OrderSide):
+        self.side = side
+        self.levels: Dict[Decimal, PriceLevel] = {}
+        # Ascending sort keys; the best price is always the last key
+        self._keys: List[Decimal] = []
+
+    def _key(self, price: Decimal) -> Decimal:
+        return price if self.side == OrderSide.BUY else -price
+
+    def _price(self, key: Decimal) -> Decimal:
+        return key if self.side == OrderSide.BUY else -key
+
+    def best(self) -> Optional[PriceLevel]:
+        """Get the best price level"""
+        if not self._keys:
+            return None
+        return self.levels[self._price(self._keys[-1])]
+
+    def get_or_create_level(self, price: Decimal) -> PriceLevel:
+        """Get price level, inserting it in sort order if missing"""
+        level = self.levels.get(price)
+        if level is None:
+            level = PriceLevel(price)
+            self.levels[price] = level
+            bisect.insort(self._keys, self._key(price))
+        return level
+
+    def remove_level(self, price: Decimal):
+        """Remove an exhausted price level"""
+        if self.levels.pop(price, None) is None:
+            return
+        key = self._key(price)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def iter_levels(self):
+        """Iterate price levels from best to worst"""
+        for key in reversed(self._keys):
+            yield self.levels[self._price(key)]
+
+    def crosses(self, level: PriceLevel, limit_price: Optional[Decimal]) -> bool:
+        """Check if an incoming order at limit_price can trade against level"""
+        if limit_price is None:
+            return True
+        if self.side == OrderSide.SELL:
+            return limit_price >= level.price
+        return limit_price <= level.price
+
+@dataclass
+class Fill:
+    """Single execution between an incoming order and a resting maker"""
+    maker_order_id: int
+    maker_user_id: int
+    maker_side: OrderSide
+    maker_price: Decimal
+    maker_filled: Decimal
+    maker_remaining: Decimal
+    price: Decimal
+    amount: Decimal
+
+    @property
+    def maker_status(self) -> OrderStatus:
+        return OrderStatus.FILLED if self.maker_remaining <= 0 else OrderStatus.PARTIALLY_FILLED
+
+class PairBook:
+    """Price-time priority order book for one trading pair"""
+
+    def __init__(self, pair: str, depth_limit: int = MARKET_DATA_DEPTH):
+        self.pair = pair
+        # Levels per side clients see, in snapshots and diffs alike
+        self.depth_limit = depth_limit
+        self.bids = BookSide(OrderSide.BUY)
+        self.asks = BookSide(OrderSide.SELL)
+        self.orders: Dict[int, RestingOrder] = {}
+        # Bumped on every book change, exposed with depth snapshots
+        self.sequence = 0
+        self._snapshots: Dict[int, Dict[str, Any]] = {}
+        self._snapshot_sequence = -1
+        # Levels touched since the last published diff
+        self._changes: Dict[Tuple[OrderSide, Decimal], None] = {}
+        self._published_sequence = 0
+        # Top levels per side as of the last snapshot or diff
+        self._published: Dict[OrderSide, Dict[Decimal, Decimal]] = {OrderSide.BUY: {}, OrderSide.SELL: {}}
+
+    def get_side(self, side: OrderSide) -> BookSide:
+        return self.bids if side == OrderSide.BUY else self.asks
+
+    def match(
+        self,
+        side: OrderSide,
+        price: Optional[Decimal],
+        amount: Decimal
+    ) -> Tuple[List[Fill], Decimal]:
+        """Match an incoming order, returning fills and the unfilled amount"""
+        opposite = self.asks if side == OrderSide.BUY else self.bids
+        fills = []
+        remaining = amount
+
+        while remaining > 0:
+            level = opposite.best()
+            if level is None or not opposite.crosses(level, price):
+                break
+
+            while remaining > 0 and level.orders:
+                maker = level.orders[0]
+                if maker.remaining <= 0:
+                    # Lazily drop cancelled orders
+                    level.orders.popleft()
+                    continue
+
+                trade_amount = min(remaining, maker.remaining)
+                self._changes[(maker.side, level.price)] = None
+                maker.remaining -= trade_amount
+                level.total -= trade_amount
+                remaining -= trade_amount
+
+                fills.append(Fill(
+                    maker_order_id=maker.order_id,
+                    maker_user_id=maker.user_id,
+                    maker_side=maker.side,
+                    maker_price=maker.price,
+                    maker_filled=maker.filled,
+                    maker_remaining=maker.remaining,
+                    price=level.price,  # Use resting order price
+                    amount=trade_amount
+                ))
+
+                if maker.remaining <= 0:
+                    level.orders.popleft()
+                    del self.orders[maker.order_id]
+
+            if level.is_empty():
+                opposite.remove_level(level.price)
+
+        if fills:
+            self.sequence += 1
+
+        return fills, remaining
+
+    def add(self, order: RestingOrder):
+        """Rest an order at the back of its price level"""
+        if order.order_id in self.orders or order.remaining <= 0:
+            return
+        self.get_side(order.side).get_or_create_level(order.price).append(order)
+        self.orders[order.order_id] = order
+        self._changes[(order.side, order.price)] = None
+        self.sequence += 1
+
+    def cancel(self, order_id: int) -> Optional[RestingOrder]:
+        """Remove a resting order by id"""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+
+        book_side = self.get_side(order.side)
+        level = book_side.levels.get(order.price)
+        if level is not None:
+            level.total -= order.remaining
+            if level.is_empty():
+                book_side.remove_level(order.price)
+        # Leave the entry in the level queue; matching skips it
+        order.remaining = Decimal("0")
+        self._changes[(order.side, order.price)] = None
+        self.sequence += 1
+        return order
+
+    def depth(self, limit: int = 25) -> Dict[str, Any]:
+        """Aggregated L2 depth, cached until the next book change"""
+        if self._snapshot_sequence != self.sequence:
+            self._snapshots = {}
+            self._snapshot_sequence = self.sequence
+
+        snapshot = self._snapshots.get(limit)
+        if snapshot is None:
+            snapshot = {
+                "pair": self.pair,
+                "sequence": self.sequence,
+                "bids": self._top_levels(self.bids, limit),
+                "asks": self._top_levels(self.asks, limit),
+                "timestamp": datetime.utcnow()
+            }
+            self._snapshots[limit] = snapshot
+        return snapshot
+
+    def drain_changes(self) -> Optional[Dict[str, Any]]:
+        """Collect changes to the top depth levels since the last call as an absolute-size diff"""
+        if not self._changes:
+            return None
+
+        diff = {
+            "pair": self.pair,
+            "prev_sequence": self._published_sequence,
+            "sequence": self.sequence,
+            "bids": [],
+            "asks": []
+        }
+        for side in {side for side, _ in self._changes}:
+            published = self._published[side]
+            current = dict(self._top_levels(self.get_side(side), self.depth_limit))
+            key = "bids" if side == OrderSide.BUY else "asks"
+            # Size zero means the level was removed or pushed out of the window;
+            # a level moving up into the window is sent like a new one
+            diff[key] = [(price, Decimal("0")) for price in published if price not in current]
+            diff[key].extend((price, total) for price, total in current.items() if published.get(price) != total)
+            self._published[side] = current
+        self._changes.clear()
+
+        # Changes below the window leave the client's view as it is
+        if not diff["bids"] and not diff["asks"]:
+            return None
+        self._published_sequence = self.sequence
+        return diff
+
+    def mark_published(self):
+        """Drop pending changes, e.g. after a full snapshot was sent"""
+        self._changes.clear()
+        self._published_sequence = self.sequence
+        self._published = {
+            OrderSide.BUY: dict(self._top_levels(self.bids, self.depth_limit)),
+            OrderSide.SELL: dict(self._top_levels(self.asks, self.depth_limit))
+        }
+
+    @staticmethod
+    def _top_levels(book_side: BookSide, limit: int) -> List[Tuple[Decimal, Decimal]]:
+        levels = []
+        for level in book_side.iter_levels():
+            if len(levels) >= limit:
+                break
+            levels.append((level.price, level.total))
+        return levels
+
+class MatchingEngine:
+    """In-process matching engine holding one book per pair"""
+
+    def __init__(self):
+        self.books: Dict[str, PairBook] = {}
+
+    def get_book(self, pair: str) -> PairBook:
+        """Get order book for a pair"""
+        book = self.books.get(pair)
+        if book is None:
+            book = PairBook(pair)
+            self.books[pair] = book
+        return book
+
+    def process(self, order: Order) -> List[Fill]:
+        """Match a new order and rest any limit remainder"""
+        book = self.get_book(order.pair)
+        fills, remaining = book.match(order.side, order.price, order.remaining)
+
+        if remaining > 0 and order.price is not None:
+            book.add(RestingOrder(
+                order_id=order.id,
+                user_id=order.user_id,
+                side=order.side,
+                price=order.price,
+                amount=order.amount,
+                remaining=remaining
+            ))
+
+        return fills
+
+    def depth(self, pair: str, limit: int = 25) -> Dict[str, Any]:
+        """Get L2 depth snapshot for a pair"""
+        book = self.books.get(pair)
+        if book is None:
+            # Don't allocate books for arbitrary pairs from query strings
+            return PairBook(pair).depth(limit)
+        return book.depth(limit)
+
+    def cancel(self, pair: str, order_id: int) -> Optional[RestingOrder]:
+        """Cancel a resting order"""
+        book = self.books.get(pair)
+        if book is None:
+            return None
+        return book.cancel(order_id)
+
+    @staticmethod
+    def open_orders_query(pair: Optional[str] = None):
+        """Resting limit orders in ix_orders_open order"""
+        open_statuses = bindparam(
+            "open_statuses",
+            [OrderStatus.PENDING, OrderStatus.PARTIALLY_FILLED],
+            expanding=True,
+            literal_execute=True
+        )
+        # Inlined so the planner can match the partial index predicate
+        query = select(Order).where(and_(
+            Order.status.in_(open_statuses),
+            Order.remaining > literal_column("0"),
+            Order.price.is_not(None)
+        ))
+        if pair:
+            query = query.where(Order.pair == pair)
+        return query.order_by(Order.pair, Order.side, Order.price, Order.id)
+
+    async def rebuild(self, db: AsyncSession, pair: Optional[str] = None):
+        """Rebuild books from open orders in the database"""
+        query = self.open_orders_query(pair)
+
+        if pair:
+            previous = {pair: self.books.pop(pair)} if pair in self.books else {}
+        else:
+            previous = self.books
+            self.books = {}
+
+        # Id order within a price restores time priority within each level
+        result = await db.execute(query)
+        for order in result.scalars().all():
+            self.get_book(order.pair).add(RestingOrder(
+                order_id=order.id,
+                user_id=order.user_id,
+                side=order.side,
+                price=order.price,
+                amount=order.amount,
+                remaining=order.remaining
+            ))
+
+        # Keep sequences moving forward so subscribers never see them go back
+        for book_pair, old_book in previous.items():
+            self.get_book(book_pair).sequence += old_book.sequence + 1
+
+        # Subscribers resync from a fresh snapshot rather than a diff
+        for book_pair, book in self.books.items():
+            if pair is None or book_pair == pair:
+                book.mark_published()
+
+matching_engine = MatchingEngine()
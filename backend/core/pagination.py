@@ -0,0 +1,65 @@
+"""
+Keyset pagination on (created_at, id) for history endpoints
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+class InvalidCursor(ValueError):
+    """Cursor was not issued by this API"""
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past a row"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise ValueError(row_id)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+def page_size(limit: Optional[int]) -> int:
+    """Requested page size clamped to 1..MAX_PAGE_SIZE"""
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+def keyset_page(query: Select, model: Any, cursor: Optional[str], limit: int) -> Select:
+    """Newest-first page of query after cursor, fetching one extra row to detect more"""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        # Compare against the stored timestamp of the cursor row so stored and bound
+        # datetime formats can't disagree; the encoded one covers deleted rows
+        anchor_row = aliased(model)
+        anchor = func.coalesce(
+            select(anchor_row.created_at).where(anchor_row.id == row_id).scalar_subquery(),
+            created_at
+        )
+        # The redundant upper bound lets the index seek straight to the cursor
+        query = query.where(
+            model.created_at <= anchor,
+            or_(model.created_at < anchor, and_(model.created_at == anchor, model.id < row_id))
+        )
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Rows of one page and the cursor of the next, if there is one"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+async def count_rows(db: AsyncSession, query: Select) -> int:
+    """COUNT(*) of a query's rows without loading them"""
+    result = await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))
+    return result.scalar_one()
@@ -0,0 +1,159 @@
+"""
+Last-value price store for Bridge Exchange
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import dialect_insert
+from models.price import Price
+
+@dataclass
+class PriceQuote:
+    """Latest known price of an asset in a quote currency"""
+    asset: str
+    quote: str
+    price: Decimal
+    change_24h: Optional[Decimal] = None
+    volume_24h: Optional[Decimal] = None
+    market_cap: Optional[Decimal] = None
+    source: str = "coingecko"
+    updated_at: Optional[datetime] = None
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(value))
+
+def gecko_quotes(prices: Dict[str, Any], coin_ids: Dict[str, str], quote: str = "usd") -> List[PriceQuote]:
+    """Convert a CoinGecko simple/price response into quotes"""
+    quotes = []
+    for asset, coin_id in coin_ids.items():
+        data = prices.get(coin_id)
+        if not data or data.get(quote) is None:
+            continue
+        quotes.append(PriceQuote(
+            asset=asset,
+            quote=quote.upper(),
+            price=_decimal(data[quote]),
+            change_24h=_decimal(data.get(f"{quote}_24h_change")),
+            volume_24h=_decimal(data.get(f"{quote}_24h_vol")),
+            market_cap=_decimal(data.get(f"{quote}_market_cap"))
+        ))
+    return quotes
+
+class PriceStore:
+    """Prices table plus an in-memory index keyed by (asset, quote)"""
+
+    def __init__(self):
+        self.index: Dict[Tuple[str, str], PriceQuote] = {}
+        self.loaded_at: Optional[datetime] = None
+
+    def get(self, asset: str, quote: str = "USD") -> Optional[PriceQuote]:
+        """Get the latest quote for an asset"""
+        return self.index.get((asset.upper(), quote.upper()))
+
+    def get_price(self, asset: str, quote: str = "USD") -> Optional[Decimal]:
+        """Get the latest price for an asset"""
+        entry = self.get(asset, quote)
+        return entry.price if entry else None
+
+    def value(self, asset: str, amount: Decimal, quote: str = "USD") -> Optional[Decimal]:
+        """Value an amount of asset in quote, or None if unpriced"""
+        if asset.upper() == quote.upper():
+            return amount
+        price = self.get_price(asset, quote)
+        return None if price is None else amount * price
+
+    def total_value(self, amounts: Dict[str, Decimal], quote: str = "USD") -> Decimal:
+        """Value a set of holdings, skipping unpriced assets"""
+        total = Decimal("0")
+        for asset, amount in amounts.items():
+            value = self.value(asset, Decimal(str(amount)), quote)
+            if value is not None:
+                total += value
+        return total
+
+    def market_data(self, assets: Iterable[str], quote: str = "USD") -> Dict[str, Dict[str, Any]]:
+        """Latest price data for assets, as passed to the AI assistant"""
+        data = {}
+        for asset in assets:
+            entry = self.get(asset, quote)
+            if entry is None:
+                continue
+            data[entry.asset] = {
+                "price": float(entry.price),
+                "change_24h": float(entry.change_24h) if entry.change_24h is not None else None,
+                "volume_24h": float(entry.volume_24h) if entry.volume_24h is not None else None,
+                "market_cap": float(entry.market_cap) if entry.market_cap is not None else None,
+                "updated_at": entry.updated_at.isoformat() if entry.updated_at else None
+            }
+        return data
+
+    async def update(self, db: AsyncSession, quotes: List[PriceQuote]):
+        """Upsert quotes into the prices table and the index; caller commits"""
+        if not quotes:
+            return
+
+        stmt = dialect_insert(db, Price).values([
+            {
+                "asset": q.asset,
+                "quote": q.quote,
+                "price": q.price,
+                "change_24h": q.change_24h,
+                "volume_24h": q.volume_24h,
+                "market_cap": q.market_cap,
+                "source": q.source
+            }
+            for q in quotes
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Price.asset, Price.quote],
+            set_={
+                "price": stmt.excluded.price,
+                "change_24h": stmt.excluded.change_24h,
+                "volume_24h": stmt.excluded.volume_24h,
+                "market_cap": stmt.excluded.market_cap,
+                "source": stmt.excluded.source,
+                "updated_at": func.now()
+            }
+        )
+        await db.execute(stmt)
+
+        now = datetime.utcnow()
+        for q in quotes:
+            q.updated_at = q.updated_at or now
+            self.index[(q.asset, q.quote)] = q
+
+    async def load(self, db: AsyncSession):
+        """Replace the index with the contents of the prices table"""
+        result = await db.execute(select(Price))
+        self.index = {
+            (row.asset, row.quote): PriceQuote(
+                asset=row.asset,
+                quote=row.quote,
+                price=row.price,
+                change_24h=row.change_24h,
+                volume_24h=row.volume_24h,
+                market_cap=row.market_cap,
+                source=row.source,
+                updated_at=row.updated_at
+            )
+            for row in result.scalars().all()
+        }
+        self.loaded_at = datetime.utcnow()
+
+    async def run_sync(self, session_factory, interval: float):
+        """Reload the index periodically from rows written by the background worker"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as db:
+                    await self.load(db)
+            except Exception as e:
+                print(f"Error loading prices: {e}")
+
+price_store = PriceStore()
@@ -0,0 +1,168 @@
+"""
+Per-job scheduler for background tasks
+"""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.leases import LeaseManager
+
+class Job:
+    """A coroutine run on its own interval, never overlapping itself"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        timeout: Optional[float] = None,
+        jitter: float = 0.1
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.standby = 0
+        self.last_duration: Optional[float] = None
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_error: Optional[str] = None
+
+    def next_delay(self) -> float:
+        """Interval with +/- jitter so jobs don't fire in lockstep"""
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+    async def run_once(self) -> bool:
+        """Run the job unless a previous run is still going"""
+        if self.running:
+            self.skipped += 1
+            return False
+
+        self.running = True
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.func(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.last_error = f"timed out after {self.timeout}s"
+            print(f"Job {self.name} timed out after {self.timeout}s")
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"Job {self.name} failed: {e}")
+        finally:
+            duration = time.monotonic() - started
+            self.runs += 1
+            self.last_duration = duration
+            self.total_duration += duration
+            self.max_duration = max(self.max_duration, duration)
+            self.running = False
+            if duration > self.interval:
+                print(f"Job {self.name} took {duration:.1f}s, longer than its {self.interval}s interval")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Run counts and durations"""
+        return {
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "standby": self.standby,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "avg_duration": self.total_duration / self.runs if self.runs else None,
+            "last_error": self.last_error
+        }
+
+class Scheduler:
+    """Runs each registered job in its own loop, optionally only while holding its lease"""
+
+    def __init__(self, leases: Optional[LeaseManager] = None):
+        self.jobs: Dict[str, Job] = {}
+        self.leases = leases
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        timeout: Optional[float] = None,
+        jitter: float = 0.1
+    ) -> Job:
+        """Register a job"""
+        job = Job(name, func, interval, timeout, jitter)
+        self.jobs[name] = job
+        return job
+
+    async def _run_job(self, job: Job):
+        # Stagger first runs across the jitter window
+        await asyncio.sleep(random.uniform(0, job.interval * job.jitter))
+        while True:
+            if await self._is_leader(job):
+                await job.run_once()
+            else:
+                job.standby += 1
+            await asyncio.sleep(job.next_delay())
+
+    async def _is_leader(self, job: Job) -> bool:
+        if self.leases is None:
+            return True
+        try:
+            return await self.leases.ensure(job.name)
+        except Exception as e:
+            print(f"Lease check for {job.name} failed: {e}")
+            return False
+
+    def busy_jobs(self) -> List[str]:
+        """Jobs currently mid-run"""
+        return [name for name, job in self.jobs.items() if job.running]
+
+    def start(self):
+        """Start one loop per job"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run_job(job), name=f"job:{job.name}")
+            for job in self.jobs.values()
+        ]
+        if self.leases is not None:
+            self.leases.jobs.update(self.jobs)
+            self._tasks.append(asyncio.create_task(
+                self.leases.run_heartbeat(self.busy_jobs), name="job-leases"
+            ))
+
+    async def stop(self):
+        """Cancel all job loops"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.leases is not None:
+            try:
+                await self.leases.release_all()
+            except Exception as e:
+                print(f"Releasing job leases failed: {e}")
+
+    async def run(self):
+        """Run until cancelled"""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-job metrics"""
+        return {name: job.stats() for name, job in self.jobs.items()}
@@ -0,0 +1,88 @@
+"""
+Per-pair order sequencer for Bridge Exchange
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class PairSequencer:
+    """Single writer for one trading pair's book"""
+
+    def __init__(self, pair: str):
+        self.pair = pair
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.processed = 0
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name=f"sequencer:{self.pair}")
+
+    async def submit(self, job: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Queue a job and wait for its result"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((job, args, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            job, args, future = await self.queue.get()
+            try:
+                # Caller went away before its turn, skip the job
+                if future.cancelled():
+                    continue
+                try:
+                    result = await job(*args)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+
+    async def stop(self):
+        """Drain queued jobs and stop the worker"""
+        if self._worker is None:
+            return
+        await self.queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+class OrderSequencer:
+    """Routes every order and cancel for a pair through that pair's sequencer"""
+
+    def __init__(self):
+        self.sequencers: Dict[str, PairSequencer] = {}
+
+    def get_sequencer(self, pair: str) -> PairSequencer:
+        """Get sequencer for a pair"""
+        sequencer = self.sequencers.get(pair)
+        if sequencer is None:
+            sequencer = PairSequencer(pair)
+            self.sequencers[pair] = sequencer
+        return sequencer
+
+    async def submit(self, pair: str, job: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Run job serially with all other jobs for the pair"""
+        return await self.get_sequencer(pair).submit(job, *args)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get queue depth and processed count per pair"""
+        return {
+            pair: {"queued": s.queue.qsize(), "processed": s.processed}
+            for pair, s in self.sequencers.items()
+        }
+
+    async def stop(self):
+        """Stop all pair sequencers"""
+        for sequencer in self.sequencers.values():
+            await sequencer.stop()
+
+order_sequencer = OrderSequencer()
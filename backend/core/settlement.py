@@ -0,0 +1,54 @@
+"""
+Batch balance settlement for Bridge Exchange
+"""
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.ledger import Journal, FEES_ACCOUNT, EXTERNAL_LIQUIDITY_ACCOUNT
+from models.balance import Balance
+from models.order import Trade
+
+EXTERNAL_USER_ID = 0  # buyer_id/seller_id of trades filled on Bybit
+
+class Settlement(Journal):
+    """Accumulates balance deltas across all fills of one match"""
+
+    def __init__(self, reason: str = "trade", reference: Optional[str] = None):
+        super().__init__(reason, reference)
+        self.trades: List[Trade] = []
+
+    def _leg(self, user_id: int, asset: str, amount: Decimal, reserved: Decimal = Decimal("0")):
+        if user_id == EXTERNAL_USER_ID:
+            self.adjust_system(EXTERNAL_LIQUIDITY_ACCOUNT, asset, amount)
+        else:
+            self.adjust(user_id, asset, amount=amount, reserved=reserved)
+
+    def add_trade(self, trade: Trade, buy_price: Decimal):
+        """Record a trade; buy_price is the limit the buy order reserved at"""
+        base_asset, quote_asset = trade.pair.split("/")
+        cost = trade.price * trade.amount
+        # The fee is in base and comes out of what a user buyer receives
+        fee = Decimal("0")
+        if trade.buyer_id != EXTERNAL_USER_ID:
+            fee = trade.fee or Decimal("0")
+
+        # Buyer pays quote, receives base, and releases its quote reservation
+        self._leg(trade.buyer_id, quote_asset, -cost, -(buy_price * trade.amount))
+        self._leg(trade.buyer_id, base_asset, trade.amount - fee)
+        if fee:
+            self.adjust_system(FEES_ACCOUNT, base_asset, fee)
+
+        # Seller pays base out of its reservation and receives quote
+        self._leg(trade.seller_id, base_asset, -trade.amount, -trade.amount)
+        self._leg(trade.seller_id, quote_asset, cost)
+
+        self.trades.append(trade)
+
+    async def apply(self, db: AsyncSession) -> List[Balance]:
+        """Insert trades, ledger entries and balance deltas in one statement each"""
+        if self.trades:
+            # Flushed together as one multi-row INSERT
+            db.add_all(self.trades)
+        return await super().apply(db)
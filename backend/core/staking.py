@@ -0,0 +1,72 @@
+"""
+Reward-index staking accrual for Bridge Exchange
+"""
+from datetime import datetime
+from decimal import Decimal, ROUND_DOWN
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import dialect_insert
+from models.reward_pool import RewardPool
+from models.stake import Stake
+
+SECONDS_PER_YEAR = Decimal(365 * 24 * 60 * 60)
+REWARD_PRECISION = Decimal("0.00000001")  # Balance scale
+
+def index_at(pool: RewardPool, now: datetime) -> Decimal:
+    """Pool reward index extrapolated to now"""
+    elapsed = Decimal(str(max((now - pool.updated_at).total_seconds(), 0)))
+    return Decimal(pool.reward_index) + Decimal(pool.apr) * elapsed / SECONDS_PER_YEAR
+
+def pending_reward(stake: Stake, index: Decimal) -> Decimal:
+    """Reward earned by a stake since it was last paid"""
+    return Decimal(stake.amount) * (index - Decimal(stake.entry_index or 0))
+
+async def get_pool(db: AsyncSession, asset: str, apr: Decimal, now: datetime) -> RewardPool:
+    """Get the pool for an asset/APR, creating it at index zero"""
+    await db.execute(
+        dialect_insert(db, RewardPool)
+        .values(asset=asset, apr=apr, reward_index=Decimal("0"), updated_at=now)
+        .on_conflict_do_nothing(index_elements=[RewardPool.asset, RewardPool.apr])
+    )
+    result = await db.execute(
+        select(RewardPool)
+        .where(RewardPool.asset == asset, RewardPool.apr == apr)
+        .with_for_update()
+    )
+    return result.scalar_one()
+
+async def advance_pool(db: AsyncSession, asset: str, apr: Decimal, now: Optional[datetime] = None) -> RewardPool:
+    """Checkpoint a pool's reward index at now"""
+    now = now or datetime.utcnow()
+    pool = await get_pool(db, asset, apr, now)
+    if now > pool.updated_at:
+        pool.reward_index = index_at(pool, now)
+        pool.updated_at = now
+    return pool
+
+async def advance_all_pools(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Checkpoint every pool; cost depends on pools, not stakers"""
+    now = now or datetime.utcnow()
+    result = await db.execute(select(RewardPool).with_for_update())
+    pools = result.scalars().all()
+    for pool in pools:
+        if now > pool.updated_at:
+            pool.reward_index = index_at(pool, now)
+            pool.updated_at = now
+    return len(pools)
+
+async def enter_stake(db: AsyncSession, stake: Stake, now: Optional[datetime] = None):
+    """Start a new stake accruing from the pool's current index"""
+    pool = await advance_pool(db, stake.asset, stake.apr, now)
+    stake.entry_index = pool.reward_index
+
+async def settle_stake(db: AsyncSession, stake: Stake, now: Optional[datetime] = None) -> Decimal:
+    """Pay out a stake's pending reward in O(1); caller credits the balance and commits"""
+    pool = await advance_pool(db, stake.asset, stake.apr, now)
+    reward = pending_reward(stake, pool.reward_index).quantize(REWARD_PRECISION, rounding=ROUND_DOWN)
+    stake.entry_index = pool.reward_index
+    stake.rewards_claimed = Decimal(stake.rewards_claimed or 0) + reward
+    return reward
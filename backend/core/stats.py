@@ -0,0 +1,201 @@
+"""
+Incrementally maintained counters behind the admin dashboard
+
+Importing this module (core.ledger does) hooks User, Transaction and Ticket
+flushes everywhere: each one also upserts stat_counters in the same
+transaction. Databases without that table are skipped, so their sessions
+flush as before and the counters can be rebuilt once it exists.
+"""
+import random
+import weakref
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Mapping, Tuple, Union
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import STAT_COUNTER_SHARDS
+from database import dialect_insert
+from models.balance import Balance
+from models.stat_counter import StatCounter
+from models.ticket import Ticket, TicketStatus
+from models.transaction import Transaction, TransactionStatus, TransactionType
+from models.user import User
+
+Counter = Tuple[str, str]
+
+USERS_TOTAL = ("users", "total")
+USERS_ACTIVE = ("users", "active")
+PENDING_WITHDRAWALS = ("withdrawals", "pending")
+OPEN_TICKETS = ("tickets", "open")
+VOLUME = "volume"  # Completed transaction amounts, keyed by asset
+BALANCES = "balances"  # User balance amounts, keyed by asset
+
+def _user_counters(values: Dict[str, Any]) -> Dict[Counter, Decimal]:
+    # Unflushed column defaults read as None
+    return {USERS_TOTAL: Decimal(1), USERS_ACTIVE: Decimal(values["is_active"] is not False)}
+
+def _transaction_counters(values: Dict[str, Any]) -> Dict[Counter, Decimal]:
+    status = values["status"] or TransactionStatus.PENDING
+    counters = {}
+    if values["type"] == TransactionType.WITHDRAW and status == TransactionStatus.PENDING:
+        counters[PENDING_WITHDRAWALS] = Decimal(1)
+    if status == TransactionStatus.COMPLETED:
+        counters[(VOLUME, values["asset"])] = Decimal(str(values["amount"] or 0))
+    return counters
+
+def _ticket_counters(values: Dict[str, Any]) -> Dict[Counter, Decimal]:
+    status = values["status"] or TicketStatus.OPEN
+    return {OPEN_TICKETS: Decimal(status == TicketStatus.OPEN)}
+
+# Model -> (attributes its counters depend on, counters of one row)
+ROLLUPS: Dict[type, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Dict[Counter, Decimal]]]] = {
+    User: (("is_active",), _user_counters),
+    Transaction: (("type", "status", "asset", "amount"), _transaction_counters),
+    Ticket: (("status",), _ticket_counters)
+}
+
+def _values(target: Any, attrs: Tuple[str, ...], before: bool = False) -> Dict[str, Any]:
+    state = inspect(target)
+    values = {}
+    for attr in attrs:
+        history = state.attrs[attr].history
+        values[attr] = history.deleted[0] if before and history.deleted else getattr(target, attr)
+    return values
+
+# Engine -> whether its database has stat_counters, checked once per engine
+_tracked: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+
+def _is_tracked(connection: Connection) -> bool:
+    tracked = _tracked.get(connection.engine)
+    if tracked is None:
+        tracked = inspect(connection).has_table(StatCounter.__tablename__)
+        _tracked[connection.engine] = tracked
+    return tracked
+
+def _increments(db: Union[AsyncSession, Connection], deltas: Mapping[Counter, Decimal]):
+    """Upsert adding each delta into a random shard of its counter"""
+    rows = [
+        {"name": name, "key": key, "shard": random.randrange(STAT_COUNTER_SHARDS), "value": value}
+        for (name, key), value in deltas.items()
+        if value
+    ]
+    if not rows:
+        return None
+    stmt = dialect_insert(db, StatCounter).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[StatCounter.name, StatCounter.key, StatCounter.shard],
+        set_={"value": StatCounter.value + stmt.excluded.value, "updated_at": func.now()}
+    )
+
+async def record(db: AsyncSession, deltas: Mapping[Counter, Decimal]):
+    """Add deltas to counters in the caller's transaction"""
+    stmt = _increments(db, deltas)
+    if stmt is not None and await (await db.connection()).run_sync(_is_tracked):
+        await db.execute(stmt)
+
+def _write(connection: Connection, deltas: Mapping[Counter, Decimal]):
+    if not _is_tracked(connection):
+        return
+    stmt = _increments(connection, deltas)
+    if stmt is not None:
+        connection.execute(stmt)
+
+def _after_insert(mapper, connection: Connection, target: Any):
+    attrs, counters = ROLLUPS[mapper.class_]
+    _write(connection, counters(_values(target, attrs)))
+
+def _after_update(mapper, connection: Connection, target: Any):
+    attrs, counters = ROLLUPS[mapper.class_]
+    state = inspect(target)
+    if not any(state.attrs[attr].history.has_changes() for attr in attrs):
+        return
+    deltas: Dict[Counter, Decimal] = defaultdict(Decimal)
+    for counter, value in counters(_values(target, attrs)).items():
+        deltas[counter] += value
+    for counter, value in counters(_values(target, attrs, before=True)).items():
+        deltas[counter] -= value
+    _write(connection, deltas)
+
+def _after_delete(mapper, connection: Connection, target: Any):
+    attrs, counters = ROLLUPS[mapper.class_]
+    _write(connection, {counter: -value for counter, value in counters(_values(target, attrs, before=True)).items()})
+
+# Rows are counted in the flush that writes them, so counters commit or roll back with the data
+for model in ROLLUPS:
+    event.listen(model, "after_insert", _after_insert)
+    event.listen(model, "after_update", _after_update)
+    event.listen(model, "after_delete", _after_delete)
+
+async def read_stats(db: AsyncSession) -> Dict[Counter, Decimal]:
+    """All counters with shards merged at read time"""
+    result = await db.execute(
+        select(StatCounter.name, StatCounter.key, func.sum(StatCounter.value))
+        .group_by(StatCounter.name, StatCounter.key)
+    )
+    # SQLite sums numerics as floats
+    return {(name, key): Decimal(str(value or 0)) for name, key, value in result.all()}
+
+async def compact_stats(db: AsyncSession) -> int:
+    """Fold counter shards into shard 0; caller commits"""
+    # Deleting locks the shards, writers arriving meanwhile start new rows
+    result = await db.execute(
+        delete(StatCounter)
+        .where(StatCounter.shard > 0)
+        .returning(StatCounter.name, StatCounter.key, StatCounter.value)
+    )
+    merged: Dict[Counter, Decimal] = defaultdict(Decimal)
+    count = 0
+    for name, key, value in result.all():
+        merged[(name, key)] += Decimal(str(value))
+        count += 1
+    if not merged:
+        return 0
+
+    stmt = dialect_insert(db, StatCounter).values([
+        {"name": name, "key": key, "shard": 0, "value": value}
+        for (name, key), value in merged.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StatCounter.name, StatCounter.key, StatCounter.shard],
+        set_={"value": StatCounter.value + stmt.excluded.value, "updated_at": func.now()}
+    )
+    await db.execute(stmt)
+    return count
+
+async def rebuild_stats(db: AsyncSession) -> Dict[Counter, Decimal]:
+    """Recount every counter from the source tables; caller commits"""
+    counters: Dict[Counter, Decimal] = {}
+    counters[USERS_TOTAL] = await db.scalar(select(func.count(User.id)))
+    counters[USERS_ACTIVE] = await db.scalar(
+        select(func.count(User.id)).where(User.is_active.is_not(False))
+    )
+    counters[PENDING_WITHDRAWALS] = await db.scalar(
+        select(func.count(Transaction.id)).where(
+            Transaction.type == TransactionType.WITHDRAW,
+            Transaction.status == TransactionStatus.PENDING
+        )
+    )
+    counters[OPEN_TICKETS] = await db.scalar(
+        select(func.count(Ticket.id)).where(Ticket.status == TicketStatus.OPEN)
+    )
+    volume = await db.execute(
+        select(Transaction.asset, func.sum(Transaction.amount))
+        .where(Transaction.status == TransactionStatus.COMPLETED)
+        .group_by(Transaction.asset)
+    )
+    counters.update({(VOLUME, asset): amount for asset, amount in volume.all()})
+    balances = await db.execute(select(Balance.asset, func.sum(Balance.amount)).group_by(Balance.asset))
+    counters.update({(BALANCES, asset): amount for asset, amount in balances.all()})
+
+    counters = {counter: Decimal(str(value or 0)) for counter, value in counters.items()}
+    await db.execute(delete(StatCounter))
+    await db.execute(
+        dialect_insert(db, StatCounter).values([
+            {"name": name, "key": key, "shard": 0, "value": value}
+            for (name, key), value in counters.items()
+        ])
+    )
+    return counters
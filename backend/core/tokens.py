@@ -0,0 +1,131 @@
+"""
+Fast HMAC JWT verification for Bridge Exchange
+"""
+import base64
+import hashlib
+import hmac
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from config import JWT_SECRET_KEY, JWT_ALGORITHM, TOKEN_CACHE_SIZE, MAX_TOKEN_LENGTH
+
+DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512
+}
+
+# header.payload.signature, each unpadded base64url
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+")
+
+class InvalidToken(Exception):
+    """Token is malformed, badly signed or expired"""
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+class TokenVerifier:
+    """Verifies HS* tokens with a pre-keyed HMAC and caches verified tokens until they expire"""
+
+    def __init__(
+        self,
+        secret: str = JWT_SECRET_KEY,
+        algorithm: str = JWT_ALGORITHM,
+        cache_size: int = TOKEN_CACHE_SIZE,
+        max_length: int = MAX_TOKEN_LENGTH
+    ):
+        if algorithm not in DIGESTS:
+            raise ValueError(f"Unsupported JWT algorithm {algorithm}")
+        self.algorithm = algorithm
+        # Keyed once; each verification copies the initialised state
+        self._mac = hmac.new(secret.encode(), digestmod=DIGESTS[algorithm])
+        self.cache_size = cache_size
+        self.max_length = max_length
+        # token -> (payload, exp)
+        self.cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Headers already seen to name our algorithm, by their encoded form
+        self._headers = {
+            _b64encode(json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode()),
+            _b64encode(json.dumps({"alg": algorithm, "typ": "JWT"}).encode())
+        }
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, or raise InvalidToken"""
+        now = time.time()
+        cached = self.cache.get(token)
+        if cached is not None:
+            if cached[1] > now:
+                self.hits += 1
+                self.cache.move_to_end(token)
+                return cached[0]
+            del self.cache[token]
+
+        self.misses += 1
+        try:
+            payload = self._verify(token, now)
+        except InvalidToken:
+            self.rejected += 1
+            raise
+
+        self.cache[token] = (payload, float(payload["exp"]))
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return payload
+
+    def _verify(self, token: str, now: float) -> Dict[str, Any]:
+        # Cheap shape checks before any decoding
+        if not isinstance(token, str) or len(token) > self.max_length or not TOKEN_PATTERN.fullmatch(token):
+            raise InvalidToken("Malformed token")
+        header, payload, signature = token.split(".")
+
+        known_header = header in self._headers
+        if not known_header:
+            try:
+                claims = json.loads(_b64decode(header))
+            except ValueError:
+                raise InvalidToken("Malformed header")
+            if not isinstance(claims, dict) or claims.get("alg") != self.algorithm or "crit" in claims:
+                raise InvalidToken("Unexpected algorithm")
+
+        mac = self._mac.copy()
+        mac.update(f"{header}.{payload}".encode())
+        try:
+            expected = _b64decode(signature)
+        except ValueError:
+            raise InvalidToken("Malformed signature")
+        if not hmac.compare_digest(mac.digest(), expected):
+            raise InvalidToken("Bad signature")
+        if not known_header:
+            self._headers.add(header)
+
+        # Only signed payloads are parsed
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise InvalidToken("Malformed payload")
+        if not isinstance(claims, dict):
+            raise InvalidToken("Malformed payload")
+
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or isinstance(exp, bool):
+            raise InvalidToken("Missing expiry")
+        if exp <= now:
+            raise InvalidToken("Token expired")
+        nbf = claims.get("nbf")
+        if isinstance(nbf, (int, float)) and nbf > now:
+            raise InvalidToken("Token not yet valid")
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self.cache), "hits": self.hits, "misses": self.misses, "rejected": self.rejected}
+
+token_verifier = TokenVerifier()
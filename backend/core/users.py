@@ -0,0 +1,104 @@
+"""
+Per-process cache of authenticated user principals
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from config import USER_CACHE_TTL, USER_CACHE_MAX_SIZE
+from models.user import User
+
+PENDING_KEY = "user_cache_pending"
+
+def user_principal(user: User) -> Dict[str, Any]:
+    """What routers get as current_user"""
+    return {
+        "id": user.id,
+        "telegram_id": user.telegram_id,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "is_premium": user.is_premium,
+        "level": user.level,
+        "xp": user.xp,
+        "kyc_status": user.kyc_status,
+        "is_active": user.is_active,
+        "is_admin": user.is_admin,
+        "created_at": user.created_at
+    }
+
+class UserCache:
+    """Bounded LRU of principals keyed by telegram_id, each trusted for ttl seconds"""
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_MAX_SIZE):
+        # Bounds staleness from changes made by other processes
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[int, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Cached principal, or None if missing or expired"""
+        entry = self.entries.get(telegram_id)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        self.entries.move_to_end(telegram_id)
+        return entry[0]
+
+    def set(self, principal: Dict[str, Any]):
+        telegram_id = principal["telegram_id"]
+        self.entries[telegram_id] = (principal, time.monotonic() + self.ttl)
+        self.entries.move_to_end(telegram_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def load(self, db: AsyncSession, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Principal for a telegram_id, looked up only on a miss"""
+        principal = self.get(telegram_id)
+        if principal is not None:
+            self.hits += 1
+            return principal
+
+        self.misses += 1
+        result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+        principal = user_principal(user)
+        self.set(principal)
+        return principal
+
+    def invalidate(self, telegram_id: Optional[int] = None):
+        """Drop one principal, or all of them"""
+        if telegram_id is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(telegram_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+user_cache = UserCache()
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, user: User):
+    # Profile changes and freezes; dropped now and again once committed,
+    # so a read in between can't re-cache the old row for long
+    user_cache.invalidate(user.telegram_id)
+    session = object_session(user)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(user.telegram_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for telegram_id in session.info.pop(PENDING_KEY, ()):
+        user_cache.invalidate(telegram_id)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
@@ -2,7 +2,9 @@
 Database configuration and session management
 """
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import DeclarativeBase
+from typing import Union
 from config import DATABASE_URL
 
 # Create async engine
@@ -39,15 +41,27 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+def dialect_insert(db: Union[AsyncSession, Connection], model):
+    """
+    INSERT construct supporting ON CONFLICT for the session's or connection's dialect
+    """
+    dialect = db.dialect if isinstance(db, Connection) else db.bind.dialect
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
 async def init_db():
     """
     Initialize database tables
     """
     async with engine.begin() as conn:
         # Import all models to ensure they are registered
-        from backend.models import (
-            user, wallet, balance, transaction, invoice, order, 
-            order_book, trade, nft_item, p2p_offer, stake,
-            dao_proposal, referral, ticket, admin_log
+        from models import (
+            user, wallet, balance, transaction, invoice, order,
+            nft_item, p2p_offer, stake, dao_proposal, referral,
+            ticket, admin_log, price, job_lease, reward_pool, ledger_entry,
+            system_balance, stat_counter, candle
         )
         await conn.run_sync(Base.metadata.create_all)
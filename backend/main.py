@@ -5,10 +5,19 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
-from config import ALLOWED_ORIGINS, DEBUG
-from database import init_db
+from config import (
+    ALLOWED_ORIGINS, DEBUG, GECKO_BASE_URL, TONAPI_BASE_URL, CRYPTOPAY_API_HOST,
+    PRICE_UPDATE_INTERVAL, CANDLE_FLUSH_INTERVAL
+)
+from database import init_db, AsyncSessionLocal
+from core.matching import matching_engine
+from core.sequencer import order_sequencer
+from core.prices import price_store
+from core.candles import candle_builder
+from services.http import http_pool
 from routers import (
     auth, wallet, exchange, nft, p2p, stake, dao, 
     admin, support, ai
@@ -22,9 +31,27 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     await init_db()
+    
+    # Open the shared outbound connection pools
+    await http_pool.start([GECKO_BASE_URL, TONAPI_BASE_URL, CRYPTOPAY_API_HOST])
+    
+    # Rebuild in-memory order books and the price index
+    async with AsyncSessionLocal() as db:
+        await matching_engine.rebuild(db)
+        await price_store.load(db)
+        await candle_builder.backfill(db)
+    
+    # Pick up prices written by the background worker
+    price_sync = asyncio.create_task(price_store.run_sync(AsyncSessionLocal, PRICE_UPDATE_INTERVAL))
+    candle_flush = asyncio.create_task(candle_builder.run_flush(AsyncSessionLocal, CANDLE_FLUSH_INTERVAL))
     yield
     # Shutdown
-    pass
+    price_sync.cancel()
+    candle_flush.cancel()
+    async with AsyncSessionLocal() as db:
+        await candle_builder.flush(db)
+    await order_sequencer.stop()
+    await http_pool.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -6,7 +6,7 @@ from .wallet import Wallet
 from .balance import Balance
 from .transaction import Transaction
 from .invoice import Invoice
-from .order import Order, OrderBook, Trade
+from .order import Order, Trade
 from .nft_item import NFTItem
 from .p2p_offer import P2POffer
 from .stake import Stake
@@ -14,6 +14,13 @@ from .dao_proposal import DAOProposal
 from .referral import Referral
 from .ticket import Ticket
 from .admin_log import AdminLog
+from .price import Price
+from .job_lease import JobLease
+from .reward_pool import RewardPool
+from .ledger_entry import LedgerEntry
+from .system_balance import SystemBalance
+from .stat_counter import StatCounter
+from .candle import Candle
 
 __all__ = [
     "User",
@@ -22,7 +29,6 @@ __all__ = [
     "Transaction",
     "Invoice",
     "Order",
-    "OrderBook", 
     "Trade",
     "NFTItem",
     "P2POffer",
@@ -30,5 +36,12 @@ __all__ = [
     "DAOProposal",
     "Referral",
     "Ticket",
-    "AdminLog"
+    "AdminLog",
+    "Price",
+    "JobLease",
+    "RewardPool",
+    "LedgerEntry",
+    "SystemBalance",
+    "StatCounter",
+    "Candle"
 ]
@@ -13,6 +13,7 @@ class Balance(Base):
     amount = Column(Numeric(20, 8), default=0)  # Total balance
     reserved = Column(Numeric(20, 8), default=0)  # Reserved for orders
     available = Column(Numeric(20, 8), default=0)  # Available = amount - reserved
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on every write
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -0,0 +1,23 @@
+"""
+OHLCV candle model for Bridge Exchange
+"""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class Candle(Base):
+    __tablename__ = "candles"
+    
+    pair = Column(String(20), primary_key=True)
+    interval = Column(String(4), primary_key=True)  # 1m, 5m, 1h, 1d
+    open_time = Column(DateTime(timezone=True), primary_key=True)  # UTC bucket start
+    open = Column(Numeric(20, 8), nullable=False)
+    high = Column(Numeric(20, 8), nullable=False)
+    low = Column(Numeric(20, 8), nullable=False)
+    close = Column(Numeric(20, 8), nullable=False)
+    volume = Column(Numeric(30, 8), nullable=False)  # Base asset traded
+    trades = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Candle(pair={self.pair}, interval={self.interval}, open_time={self.open_time}, close={self.close})>"
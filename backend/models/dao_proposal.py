@@ -1,7 +1,7 @@
 """
 DAO Proposal model for Bridge Exchange
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum, Index
 from sqlalchemy.sql import func
 from database import Base
 import enum
@@ -28,5 +28,9 @@ class DAOProposal(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     voting_ends_at = Column(DateTime(timezone=True), nullable=True)
     
+    __table_args__ = (
+        Index("ix_dao_proposals_created", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<DAOProposal(id={self.id}, title={self.title}, status={self.status}, votes_for={self.votes_for})>"
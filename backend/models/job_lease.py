@@ -0,0 +1,17 @@
+"""
+Job lease model for Bridge Exchange
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from database import Base
+
+class JobLease(Base):
+    __tablename__ = "job_leases"
+    
+    name = Column(String(100), primary_key=True)  # job name, job:shard or node:<id>
+    holder = Column(String(255), nullable=False)  # node id
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    acquired_at = Column(DateTime(timezone=True), nullable=False)
+    generation = Column(Integer, nullable=False, default=1)  # takeovers so far, for auditing; not a fencing token
+    
+    def __repr__(self):
+        return f"<JobLease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
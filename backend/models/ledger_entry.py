@@ -0,0 +1,30 @@
+"""
+Ledger entry model for Bridge Exchange
+"""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Index
+from sqlalchemy.sql import func
+from database import Base
+
+USER_ACCOUNT = "user"
+
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    journal_id = Column(String(32), nullable=False, index=True)  # Entries of one journal sum to zero per asset
+    account = Column(String(32), nullable=False)  # "user" or a system account: external, rewards, staking, ...
+    user_id = Column(Integer, nullable=True)  # Set for user accounts only
+    asset = Column(String(10), nullable=False)
+    amount = Column(Numeric(20, 8), nullable=False, default=0)  # Signed change to the balance
+    reserved = Column(Numeric(20, 8), nullable=False, default=0)  # Signed change to the reserved part
+    reason = Column(String(32), nullable=False)  # trade, deposit, withdraw, transfer, ...
+    reference = Column(String(100), nullable=True)  # e.g. order:42, stake:7
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    __table_args__ = (
+        Index("ix_ledger_entries_user_asset", "user_id", "asset", "id"),
+        Index("ix_ledger_entries_account_asset", "account", "asset"),
+    )
+    
+    def __repr__(self):
+        return f"<LedgerEntry(journal_id={self.journal_id}, account={self.account}, user_id={self.user_id}, asset={self.asset}, amount={self.amount})>"
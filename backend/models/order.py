@@ -1,11 +1,14 @@
 """
 Order and Trade models for Bridge Exchange
 """
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Enum, Boolean, Index, text
 from sqlalchemy.sql import func
 from database import Base
 import enum
 
+# Enums are stored by name; queries must render these same terms to use the partial index
+OPEN_ORDER_PREDICATE = "status IN ('PENDING', 'PARTIALLY_FILLED') AND remaining > 0"
+
 class OrderSide(enum.Enum):
     BUY = "buy"
     SELL = "sell"
@@ -38,22 +41,17 @@ class Order(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    def __repr__(self):
-        return f"<Order(id={self.id}, user_id={self.user_id}, pair={self.pair}, side={self.side}, amount={self.amount})>"
-
-class OrderBook(Base):
-    __tablename__ = "order_book"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    pair = Column(String(20), nullable=False, index=True)
-    side = Column(Enum(OrderSide), nullable=False)
-    price = Column(Numeric(20, 8), nullable=False)
-    amount = Column(Numeric(20, 8), nullable=False)
-    order_id = Column(Integer, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        # Resting orders only, by book side in price then time order
+        Index(
+            "ix_orders_open", "pair", "side", "price", "id",
+            sqlite_where=text(OPEN_ORDER_PREDICATE),
+            postgresql_where=text(OPEN_ORDER_PREDICATE)
+        ),
+    )
     
     def __repr__(self):
-        return f"<OrderBook(pair={self.pair}, side={self.side}, price={self.price}, amount={self.amount})>"
+        return f"<Order(id={self.id}, user_id={self.user_id}, pair={self.pair}, side={self.side}, amount={self.amount})>"
 
 class Trade(Base):
     __tablename__ = "trades"
@@ -69,5 +67,12 @@ class Trade(Base):
     seller_id = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # One per side of a user's trade history, newest first
+        Index("ix_trades_buyer_created", "buyer_id", "created_at", "id"),
+        Index("ix_trades_seller_created", "seller_id", "created_at", "id"),
+        Index("ix_trades_pair_created", "pair", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Trade(id={self.id}, pair={self.pair}, price={self.price}, amount={self.amount})>"
@@ -0,0 +1,21 @@
+"""
+Price model for Bridge Exchange
+"""
+from sqlalchemy import Column, String, Numeric, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class Price(Base):
+    __tablename__ = "prices"
+    
+    asset = Column(String(10), primary_key=True)
+    quote = Column(String(10), primary_key=True)  # USD, USDT, ...
+    price = Column(Numeric(20, 8), nullable=False)
+    change_24h = Column(Numeric(10, 4), nullable=True)  # Percent
+    volume_24h = Column(Numeric(30, 2), nullable=True)
+    market_cap = Column(Numeric(30, 2), nullable=True)
+    source = Column(String(20), nullable=False, default="coingecko")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Price(asset={self.asset}, quote={self.quote}, price={self.price})>"
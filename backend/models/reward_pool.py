@@ -0,0 +1,16 @@
+"""
+Reward pool model for Bridge Exchange staking
+"""
+from sqlalchemy import Column, String, Numeric, DateTime
+from database import Base
+
+class RewardPool(Base):
+    __tablename__ = "reward_pools"
+    
+    asset = Column(String(10), primary_key=True)
+    apr = Column(Numeric(5, 2), primary_key=True)
+    reward_index = Column(Numeric(38, 18), nullable=False, default=0)  # Cumulative reward per staked unit
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # Time reward_index was last advanced to
+    
+    def __repr__(self):
+        return f"<RewardPool(asset={self.asset}, apr={self.apr}, reward_index={self.reward_index})>"
@@ -17,6 +17,7 @@ class Stake(Base):
     until = Column(DateTime(timezone=True), nullable=False)
     is_active = Column(Boolean, default=True)
     rewards_claimed = Column(Numeric(20, 8), default=0)
+    entry_index = Column(Numeric(38, 18), nullable=False, default=0)  # Pool reward_index when last paid
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     def __repr__(self):
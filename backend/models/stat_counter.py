@@ -0,0 +1,18 @@
+"""
+Admin statistics rollup model for Bridge Exchange
+"""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+    
+    name = Column(String(32), primary_key=True)  # users, tickets, withdrawals, volume, balances
+    key = Column(String(32), primary_key=True)  # total, open, pending, or an asset
+    shard = Column(Integer, primary_key=True, default=0)  # Concurrent writers spread over sub-rows
+    value = Column(Numeric(30, 8), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<StatCounter(name={self.name}, key={self.key}, shard={self.shard}, value={self.value})>"
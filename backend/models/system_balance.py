@@ -0,0 +1,18 @@
+"""
+System account balance model for Bridge Exchange
+"""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class SystemBalance(Base):
+    __tablename__ = "system_balances"
+    
+    account = Column(String(32), primary_key=True)  # fees, external, external_liquidity, ...
+    asset = Column(String(10), primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)  # Hot accounts spread writes over sub-rows
+    amount = Column(Numeric(20, 8), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<SystemBalance(account={self.account}, asset={self.asset}, shard={self.shard}, amount={self.amount})>"
@@ -1,7 +1,7 @@
 """
 Support Ticket model for Bridge Exchange
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum, Index
 from sqlalchemy.sql import func
 from database import Base
 import enum
@@ -32,5 +32,9 @@ class Ticket(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_tickets_user_created", "user_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Ticket(id={self.id}, user_id={self.user_id}, subject={self.subject}, status={self.status})>"
@@ -3,20 +3,29 @@ Admin router for Bridge Exchange
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from database import get_db
 from models.user import User
 from models.transaction import Transaction
-from models.balance import Balance
-from models.ticket import Ticket
 from schemas.admin import (
     AdminActionRequest, AdjustBalanceRequest, FreezeUserRequest, 
     RefundRequest, AdminLogResponse, AdminStatsResponse
 )
 from routers.auth import get_current_user
+from core.broadcaster import broadcaster
+from core.sequencer import order_sequencer
+from core.prices import price_store
+from core.balances import balance_cache
+from core.users import user_cache
+from core.ledger import rebuild_balances, verify_balances, system_balances
+from core.stats import (
+    BALANCES, OPEN_TICKETS, PENDING_WITHDRAWALS, USERS_ACTIVE, USERS_TOTAL, VOLUME,
+    read_stats, rebuild_stats
+)
+from core.exports import MEDIA_TYPES, export_response, trade_export_query, transaction_export_query
 
 router = APIRouter()
 
@@ -37,61 +46,143 @@ async def get_admin_stats(
     await check_admin_permissions(current_user)
     
     try:
-        # Get user counts
-        user_result = await db.execute(select(func.count(User.id)))
-        total_users = user_result.scalar()
-        
-        active_user_result = await db.execute(
-            select(func.count(User.id)).where(User.is_active == True)
-        )
-        active_users = active_user_result.scalar()
-        
-        # Get transaction volume (simplified)
-        volume_result = await db.execute(
-            select(func.sum(Transaction.amount)).where(
-                Transaction.status == "completed",
-                Transaction.asset == "USDT"
-            )
-        )
-        total_volume = volume_result.scalar() or Decimal("0")
-        
-        # Get pending withdrawals
-        pending_result = await db.execute(
-            select(func.count(Transaction.id)).where(
-                Transaction.type == "withdraw",
-                Transaction.status == "pending"
-            )
-        )
-        pending_withdrawals = pending_result.scalar()
+        # Counters are kept current by the write paths
+        counters = await read_stats(db)
+        total_balances = {key: value for (name, key), value in counters.items() if name == BALANCES}
         
-        # Get open tickets
-        ticket_result = await db.execute(
-            select(func.count(Ticket.id)).where(Ticket.status == "open")
+        return AdminStatsResponse(
+            total_users=int(counters.get(USERS_TOTAL, 0)),
+            active_users=int(counters.get(USERS_ACTIVE, 0)),
+            total_volume_24h=counters.get((VOLUME, "USDT"), Decimal("0")),
+            pending_withdrawals=int(counters.get(PENDING_WITHDRAWALS, 0)),
+            open_tickets=int(counters.get(OPEN_TICKETS, 0)),
+            total_balance=total_balances,
+            total_balance_usd=price_store.total_value(total_balances)
         )
-        open_tickets = ticket_result.scalar()
         
-        # Get total balances
-        balance_result = await db.execute(
-            select(Balance.asset, func.sum(Balance.amount))
-            .group_by(Balance.asset)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get stats"
         )
-        total_balances = {row[0]: row[1] for row in balance_result.fetchall()}
+
+@router.post("/stats/rebuild")
+async def rebuild_admin_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Recount dashboard counters from the source tables"""
+    await check_admin_permissions(current_user)
+    
+    try:
+        counters = await rebuild_stats(db)
+        await db.commit()
+        return {"success": True, "counters": len(counters)}
         
-        return AdminStatsResponse(
-            total_users=total_users,
-            active_users=active_users,
-            total_volume_24h=total_volume,
-            pending_withdrawals=pending_withdrawals,
-            open_tickets=open_tickets,
-            total_balance=total_balances
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to rebuild stats"
         )
+
+@router.get("/realtime_stats")
+async def get_realtime_stats(
+    current_user: dict = Depends(get_current_user)
+):
+    """Get WebSocket fan-out, order sequencer and cache metrics"""
+    await check_admin_permissions(current_user)
+    
+    return {
+        "broadcaster": broadcaster.stats(),
+        "sequencers": order_sequencer.stats(),
+        "balance_cache": balance_cache.stats(),
+        "user_cache": user_cache.stats()
+    }
+
+@router.get("/ledger/verify")
+async def verify_ledger(
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Compare balances with the ledger"""
+    await check_admin_permissions(current_user)
+    
+    mismatches = await verify_balances(db, user_id)
+    return {"consistent": not mismatches, "mismatches": mismatches}
+
+@router.get("/ledger/system_balances")
+async def get_system_balances(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get fee, liquidity and other system account balances"""
+    await check_admin_permissions(current_user)
+    
+    balances = await system_balances(db)
+    return {
+        "balances": [
+            {"account": account, "asset": asset, "amount": amount}
+            for (account, asset), amount in sorted(balances.items())
+        ]
+    }
+
+@router.post("/ledger/rebuild")
+async def rebuild_ledger_balances(
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Rebuild balances from the ledger"""
+    await check_admin_permissions(current_user)
+    
+    try:
+        rebuilt = await rebuild_balances(db, user_id)
+        await db.commit()
+        return {"success": True, "balances": rebuilt}
         
     except Exception as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get stats"
+            detail="Failed to rebuild balances"
         )
 
+@router.get("/export/trades")
+async def export_all_trades(
+    user_id: Optional[int] = None,
+    pair: Optional[str] = None,
+    format: str = "csv",
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream trades across all users as CSV or NDJSON"""
+    await check_admin_permissions(current_user)
+    if format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported export format"
+        )
+    
+    return export_response(trade_export_query(user_id, pair), format, "trades")
+
+@router.get("/export/transactions")
+async def export_all_transactions(
+    user_id: Optional[int] = None,
+    asset: Optional[str] = None,
+    format: str = "csv",
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream transactions across all users as CSV or NDJSON"""
+    await check_admin_permissions(current_user)
+    if format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported export format"
+        )
+    
+    return export_response(transaction_export_query(user_id, asset), format, "transactions")
+
 @router.post("/adjust_balance")
 async def adjust_user_balance(
     request: AdjustBalanceRequest,
@@ -114,14 +205,9 @@ async def adjust_user_balance(
                 detail="User not found"
             )
         
-        # Get or create balance
-        from routers.wallet import get_user_balance
-        balance = await get_user_balance(db, request.user_id, request.asset)
-        
         # Adjust balance
-        balance.amount += request.amount
-        balance.available = balance.amount - balance.reserved
-        await db.commit()
+        from routers.wallet import update_balance
+        balance = await update_balance(db, request.user_id, request.asset, request.amount)
         
         # Create transaction record
         from models.transaction import Transaction, TransactionType, TransactionStatus
@@ -168,7 +254,7 @@ async def freeze_user(
                 detail="User not found"
             )
         
-        # Freeze user
+        # Freeze user; the commit drops its cached principal
         user.is_active = False
         await db.commit()
         
@@ -208,7 +294,10 @@ async def process_refund(
         refund_amount = request.amount or transaction.amount
         
         from routers.wallet import update_balance
-        await update_balance(db, transaction.user_id, transaction.asset, refund_amount)
+        await update_balance(
+            db, transaction.user_id, transaction.asset, refund_amount,
+            reason="refund", reference=f"transaction:{transaction.id}"
+        )
         
         # Create refund transaction
         refund_transaction = Transaction(
@@ -11,6 +11,8 @@ from models.balance import Balance
 from models.transaction import Transaction
 from services.openai_assistant import OpenAIAssistant
 from services.gecko import GeckoClient
+from core.prices import price_store
+from config import GECKO_COIN_IDS
 from routers.auth import get_current_user
 
 router = APIRouter()
@@ -59,11 +61,9 @@ async def analyze_portfolio(
             for trade in trades
         ]
         
-        # Get market data
-        market_data = await gecko_client.get_price(
-            ids=["bitcoin", "ethereum", "tether"],
-            vs_currencies=["usd"]
-        )
+        # Get market data from the price store; never waits on CoinGecko
+        market_data = price_store.market_data(set(user_balances) | {"BTC", "ETH", "USDT"})
+        market_data["portfolio_value_usd"] = float(price_store.total_value(user_balances))
         
         # Analyze portfolio
         analysis = await ai_assistant.analyze_portfolio(
@@ -114,11 +114,14 @@ async def get_trading_signal(
 ):
     """Get AI trading signal for a pair"""
     try:
-        # Get market data
-        market_data = await gecko_client.get_price(
-            ids=[pair.split("/")[0].lower()],
-            vs_currencies=["usd"]
-        )
+        # Get market data, falling back to the cached CoinGecko client
+        base_asset = pair.split("/")[0].upper()
+        market_data = price_store.market_data([base_asset])
+        if not market_data:
+            market_data = await gecko_client.get_price(
+                ids=[GECKO_COIN_IDS.get(base_asset, base_asset.lower())],
+                vs_currencies=["usd"]
+            )
         
         # Generate signal
         signal = await ai_assistant.generate_trading_signal(pair, market_data)
@@ -5,15 +5,18 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from jose import JWTError, jwt
+from jose import jwt
 from passlib.context import CryptContext
 import hashlib
 import hmac
 import json
 from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
 
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from models.user import User
+from core.tokens import InvalidToken, token_verifier
+from core.users import user_cache
 from schemas.auth import TelegramLoginRequest, TelegramLoginResponse, Token
 from config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES, TELEGRAM_BOT_TOKEN
 
@@ -95,6 +98,27 @@ async def create_user(db: AsyncSession, telegram_data: dict) -> User:
     await db.refresh(user)
     return user
 
+async def get_user_from_token(token: str) -> Optional[Dict[str, Any]]:
+    """Resolve a raw access token to its active user, or None if invalid"""
+    if not token:
+        return None
+    try:
+        payload = token_verifier.verify(token)
+    except InvalidToken:
+        return None
+    
+    telegram_id = payload.get("telegram_id")
+    if telegram_id is None:
+        return None
+    
+    principal = user_cache.get(telegram_id)
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            principal = await user_cache.load(db, telegram_id)
+    if principal is None or not principal["is_active"]:
+        return None
+    return principal
+
 @router.post("/telegram_login", response_model=TelegramLoginResponse)
 async def telegram_login(
     request: TelegramLoginRequest,
@@ -144,36 +168,31 @@ async def get_current_user(
 ):
     """Get current user information"""
     try:
-        payload = jwt.decode(token.credentials, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = token_verifier.verify(token.credentials)
         telegram_id: int = payload.get("telegram_id")
         if telegram_id is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token"
             )
-    except JWTError:
+    except InvalidToken:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
     
-    user = await get_user_by_telegram_id(db, telegram_id)
+    # Cached per process; freezes and profile updates invalidate it
+    user = await user_cache.load(db, telegram_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
     
-    return {
-        "id": user.id,
-        "telegram_id": user.telegram_id,
-        "username": user.username,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "is_premium": user.is_premium,
-        "level": user.level,
-        "xp": user.xp,
-        "kyc_status": user.kyc_status,
-        "is_admin": user.is_admin,
-        "created_at": user.created_at
-    }
+    if not user["is_active"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is frozen"
+        )
+    
+    return dict(user)
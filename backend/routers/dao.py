@@ -5,11 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timedelta
+from typing import Optional
 
 from database import get_db
 from models.dao_proposal import DAOProposal, ProposalStatus
 from schemas.dao import DAOProposalCreate, DAOProposalResponse, VoteRequest, ProposalListResponse
 from routers.auth import get_current_user
+from core.pagination import InvalidCursor, count_rows, keyset_page, page_size, split_page
 
 router = APIRouter()
 
@@ -118,25 +120,19 @@ async def vote_on_proposal(
 
 @router.get("/proposals")
 async def get_proposals(
-    page: int = 1,
+    cursor: Optional[str] = None,
     per_page: int = 20,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get DAO proposals"""
+    """Get DAO proposals, newest first"""
     try:
-        offset = (page - 1) * per_page
+        per_page = page_size(per_page)
+        query = select(DAOProposal)
         
-        result = await db.execute(
-            select(DAOProposal)
-            .order_by(DAOProposal.created_at.desc())
-            .offset(offset)
-            .limit(per_page)
-        )
-        proposals = result.scalars().all()
+        result = await db.execute(keyset_page(query, DAOProposal, cursor, per_page))
+        proposals, next_cursor = split_page(result.scalars().all(), per_page)
         
-        # Get total count
-        count_result = await db.execute(select(DAOProposal))
-        total = len(count_result.scalars().all())
+        total = await count_rows(db, query)
         
         return ProposalListResponse(
             proposals=[
@@ -156,10 +152,15 @@ async def get_proposals(
                 for p in proposals
             ],
             total=total,
-            page=page,
-            per_page=per_page
+            per_page=per_page,
+            next_cursor=next_cursor
         )
         
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
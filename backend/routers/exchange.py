@@ -1,180 +1,215 @@
 """
 Exchange router for Bridge Exchange
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, update, and_, union_all
+from sqlalchemy.orm import aliased
 from decimal import Decimal
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from models.user import User
-from models.balance import Balance
-from models.order import Order, OrderBook, Trade, OrderSide, OrderType, OrderStatus
+from models.order import Order, Trade, OrderSide, OrderType, OrderStatus
 from models.transaction import Transaction, TransactionType, TransactionStatus
 from schemas.order import (
     OrderCreate, OrderResponse, OrderBookResponse, OrderBookEntry,
-    TradeResponse, CancelOrderRequest
+    TradeResponse, TradeListResponse, CandleResponse, CandleListResponse, CancelOrderRequest
 )
 from services.bybit import BybitClient
-from routers.auth import get_current_user
+from core.matching import RestingOrder, matching_engine
+from core.sequencer import order_sequencer
+from core.balances import BalanceSnapshot, balance_cache
+from core.ledger import Journal, InsufficientBalance
+from core.settlement import Settlement, EXTERNAL_USER_ID
+from core.broadcaster import Subscriber, broadcaster
+from core.market_data import market_feed
+from core.prices import price_store
+from core.pagination import InvalidCursor, keyset_page, page_size, split_page
+from core.exports import MEDIA_TYPES, export_response, trade_export_query
+from core.candles import INTERVALS, candle_builder, get_candles
+from config import DEFAULT_TRADING_PAIRS, MAX_CANDLES
+from routers.auth import get_current_user, get_user_from_token
 
 router = APIRouter()
 bybit = BybitClient()
 
-async def get_order_book_entries(
-    db: AsyncSession, 
-    pair: str, 
-    side: OrderSide, 
-    limit: int = 25
-) -> List[OrderBookEntry]:
-    """Get order book entries for a pair and side"""
-    result = await db.execute(
-        select(OrderBook)
-        .where(and_(OrderBook.pair == pair, OrderBook.side == side))
-        .order_by(OrderBook.price.desc() if side == OrderSide.BUY else OrderBook.price.asc())
-        .limit(limit)
-    )
-    
-    entries = result.scalars().all()
-    return [
-        OrderBookEntry(
-            price=entry.price,
-            amount=entry.amount,
-            total=entry.price * entry.amount
-        )
-        for entry in entries
-    ]
+# Orders held off the book while Bybit is asked; only touched by jobs on their pair's sequencer
+external_holds: Set[int] = set()
 
-async def match_orders(db: AsyncSession, new_order: Order) -> List[Trade]:
-    """Simple matching engine"""
-    trades = []
-    
-    # Get opposite side orders
-    opposite_side = OrderSide.SELL if new_order.side == OrderSide.BUY else OrderSide.BUY
-    
-    result = await db.execute(
-        select(Order)
-        .where(and_(
-            Order.pair == new_order.pair,
-            Order.side == opposite_side,
-            Order.status == OrderStatus.PENDING,
-            Order.remaining > 0
-        ))
-        .order_by(Order.price.asc() if opposite_side == OrderSide.SELL else Order.price.desc())
-    )
-    
-    opposite_orders = result.scalars().all()
+def release_reservation(journal: Journal, order: Order):
+    """Release what an order still holds reserved for its remainder"""
+    base_asset, quote_asset = order.pair.split("/")
+    if order.side == OrderSide.BUY:
+        journal.adjust(order.user_id, quote_asset, reserved=-(order.remaining * (order.price or Decimal("0"))))
+    else:
+        journal.adjust(order.user_id, base_asset, reserved=-order.remaining)
+
+def expire_remainder(journal: Journal, order: Order):
+    """Close a market order's unfilled remainder; market orders never rest"""
+    release_reservation(journal, order)
+    order.status = OrderStatus.FILLED if order.filled > 0 else OrderStatus.CANCELLED
+    order.remaining = Decimal("0")
+
+async def match_orders(
+    db: AsyncSession,
+    new_order: Order,
+    settlement: Optional[Settlement] = None,
+    keep_unfilled: bool = False
+) -> List[Trade]:
+    """Match an order against the in-memory book and persist the deltas"""
+    settlement = settlement or Settlement(reference=f"order:{new_order.id}")
+    maker_updates = []
     
-    remaining_amount = new_order.remaining
+    fills = matching_engine.process(new_order)
     
-    for opposite_order in opposite_orders:
-        if remaining_amount <= 0:
-            break
-            
-        # Check if orders can match
-        if new_order.side == OrderSide.BUY:
-            if new_order.price < opposite_order.price:
-                break
-        else:
-            if new_order.price > opposite_order.price:
-                break
-        
-        # Calculate trade amount
-        trade_amount = min(remaining_amount, opposite_order.remaining)
-        trade_price = opposite_order.price  # Use existing order price
-        
+    for fill in fills:
         # Create trade
         trade = Trade(
-            buy_order_id=new_order.id if new_order.side == OrderSide.BUY else opposite_order.id,
-            sell_order_id=opposite_order.id if new_order.side == OrderSide.BUY else new_order.id,
+            buy_order_id=new_order.id if new_order.side == OrderSide.BUY else fill.maker_order_id,
+            sell_order_id=fill.maker_order_id if new_order.side == OrderSide.BUY else new_order.id,
             pair=new_order.pair,
-            price=trade_price,
-            amount=trade_amount,
-            fee=trade_amount * Decimal("0.001"),  # 0.1% fee
-            buyer_id=new_order.user_id if new_order.side == OrderSide.BUY else opposite_order.user_id,
-            seller_id=opposite_order.user_id if new_order.side == OrderSide.BUY else new_order.user_id
+            price=fill.price,
+            amount=fill.amount,
+            fee=fill.amount * Decimal("0.001"),  # 0.1% fee
+            buyer_id=new_order.user_id if new_order.side == OrderSide.BUY else fill.maker_user_id,
+            seller_id=fill.maker_user_id if new_order.side == OrderSide.BUY else new_order.user_id
         )
         
-        db.add(trade)
-        trades.append(trade)
-        
-        # Update order amounts
-        new_order.filled += trade_amount
-        new_order.remaining -= trade_amount
-        opposite_order.filled += trade_amount
-        opposite_order.remaining -= trade_amount
+        # Buy side reservation was taken at the buy order's own limit
+        buy_price = (new_order.price or Decimal("0")) if new_order.side == OrderSide.BUY else fill.maker_price
+        settlement.add_trade(trade, buy_price)
         
-        # Update order statuses
-        if new_order.remaining <= 0:
-            new_order.status = OrderStatus.FILLED
-        elif new_order.filled > 0:
-            new_order.status = OrderStatus.PARTIALLY_FILLED
-            
-        if opposite_order.remaining <= 0:
-            opposite_order.status = OrderStatus.FILLED
-        elif opposite_order.filled > 0:
-            opposite_order.status = OrderStatus.PARTIALLY_FILLED
+        # Only touched makers are written back
+        maker_updates.append({
+            "id": fill.maker_order_id,
+            "filled": fill.maker_filled,
+            "remaining": fill.maker_remaining,
+            "status": fill.maker_status
+        })
         
-        remaining_amount -= trade_amount
-        
-        # Update balances
-        await update_balances_for_trade(db, trade)
+        new_order.filled += fill.amount
+        new_order.remaining -= fill.amount
     
-    return trades
-
-async def update_balances_for_trade(db: AsyncSession, trade: Trade):
-    """Update user balances after a trade"""
-    # Get base and quote assets from pair
-    base_asset, quote_asset = trade.pair.split("/")
+    if maker_updates:
+        await db.execute(update(Order), maker_updates)
     
-    # Update buyer balance (receive base, pay quote)
-    buyer_quote_balance = await get_user_balance(db, trade.buyer_id, quote_asset)
-    buyer_quote_balance.amount -= trade.price * trade.amount
-    buyer_quote_balance.available = buyer_quote_balance.amount - buyer_quote_balance.reserved
+    # Update order status
+    if new_order.remaining <= 0:
+        new_order.status = OrderStatus.FILLED
+    elif new_order.filled > 0:
+        new_order.status = OrderStatus.PARTIALLY_FILLED
     
-    buyer_base_balance = await get_user_balance(db, trade.buyer_id, base_asset)
-    buyer_base_balance.amount += trade.amount
-    buyer_base_balance.available = buyer_base_balance.amount - buyer_base_balance.reserved
+    # Market orders are immediate-or-cancel, released in the same journal as the fills;
+    # keep_unfilled leaves an untouched one open for external liquidity
+    if new_order.price is None and new_order.remaining > 0 and (fills or not keep_unfilled):
+        expire_remainder(settlement, new_order)
     
-    # Update seller balance (receive quote, pay base)
-    seller_base_balance = await get_user_balance(db, trade.seller_id, base_asset)
-    seller_base_balance.amount -= trade.amount
-    seller_base_balance.available = seller_base_balance.amount - seller_base_balance.reserved
+    # Settle all fills at once
+    await settlement.apply(db)
     
-    seller_quote_balance = await get_user_balance(db, trade.seller_id, quote_asset)
-    seller_quote_balance.amount += trade.price * trade.amount
-    seller_quote_balance.available = seller_quote_balance.amount - seller_quote_balance.reserved
+    return settlement.trades
 
-async def get_user_balance(db: AsyncSession, user_id: int, asset: str) -> Balance:
+async def get_user_balance(db: AsyncSession, user_id: int, asset: str) -> BalanceSnapshot:
     """Get user balance for specific asset"""
-    result = await db.execute(
-        select(Balance).where(
-            Balance.user_id == user_id,
-            Balance.asset == asset
-        )
+    return await balance_cache.get(db, user_id, asset)
+
+async def execute_order(request: OrderCreate, user_id: int) -> Dict[str, Any]:
+    """Reserve, insert and match an order; runs on the pair's sequencer"""
+    # Not the request's session: a client disconnect would close it under the queued job
+    async with AsyncSessionLocal() as db:
+        return await _execute_order(db, request, user_id)
+
+async def _execute_order(db: AsyncSession, request: OrderCreate, user_id: int) -> Dict[str, Any]:
+    # Get base and quote assets
+    base_asset, quote_asset = request.pair.split("/")
+    
+    # Check balance for the order
+    if request.side == OrderSide.BUY:
+        # Need quote currency
+        balance = await get_user_balance(db, user_id, quote_asset)
+        required_amount = request.amount * (request.price or Decimal("0"))
+        
+        if balance.available < required_amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient balance"
+            )
+    else:
+        # Need base currency
+        balance = await get_user_balance(db, user_id, base_asset)
+        if balance.available < request.amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient balance"
+            )
+    
+    # Create order
+    order = Order(
+        user_id=user_id,
+        pair=request.pair,
+        side=request.side,
+        type=request.type,
+        price=request.price,
+        amount=request.amount,
+        filled=Decimal("0"),
+        remaining=request.amount,
+        status=OrderStatus.PENDING
     )
-    balance = result.scalar_one_or_none()
     
-    if not balance:
-        balance = Balance(
-            user_id=user_id,
-            asset=asset,
-            amount=Decimal("0"),
-            reserved=Decimal("0"),
-            available=Decimal("0")
-        )
-        db.add(balance)
+    touched = False
+    try:
+        # Flush to get the order id; nothing is committed until matching is done
+        db.add(order)
+        await db.flush()
+        
+        # Reserve before matching, so a short balance fails while the book is untouched
+        reservation = Journal("reserve", reference=f"order:{order.id}")
+        if request.side == OrderSide.BUY:
+            reservation.adjust(user_id, quote_asset, reserved=required_amount)
+        else:
+            reservation.adjust(user_id, base_asset, reserved=request.amount)
+        await reservation.apply(db)
+        
+        # Try to match orders; any limit remainder rests on the in-memory book,
+        # an unmatched one is held for Bybit when immediate fill was requested
+        touched = True
+        trades = await match_orders(db, order, keep_unfilled=wants_external_liquidity(request))
+        held = not trades and wants_external_liquidity(request)
         await db.commit()
-        await db.refresh(balance)
+    except Exception:
+        await db.rollback()
+        if touched:
+            # The in-memory book already applied the match, reload it from the database
+            await matching_engine.rebuild(db, request.pair)
+            market_feed.publish_snapshot(request.pair)
+        raise
+    
+    # Publish only what was committed
+    candle_builder.add_trades(trades)
+    market_feed.publish_trades(order.pair, trades, order.side)
+    market_feed.publish_book(order.pair)
+    market_feed.publish_fills(trades)
+    market_feed.publish_order(order)
     
-    return balance
+    # Held off the book while Bybit is asked, so no local taker can fill it as well
+    if held:
+        external_holds.add(order.id)
+        matching_engine.cancel(order.pair, order.id)
+        market_feed.publish_book(order.pair)
+    
+    return {
+        "order_id": order.id,
+        "status": order.status.value,
+        "filled": order.filled,
+        "remaining": order.remaining,
+        "trades": len(trades)
+    }
 
 @router.post("/order")
 async def place_order(
     request: OrderCreate,
-    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Place a trading order"""
@@ -186,181 +221,212 @@ async def place_order(
                 detail="Price required for limit orders"
             )
         
-        # Get base and quote assets
-        base_asset, quote_asset = request.pair.split("/")
-        
-        # Check balance for the order
-        if request.side == OrderSide.BUY:
-            # Need quote currency
-            balance = await get_user_balance(db, current_user["id"], quote_asset)
-            required_amount = request.amount * (request.price or Decimal("0"))
-            
-            if balance.available < required_amount:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient balance"
-                )
-        else:
-            # Need base currency
-            balance = await get_user_balance(db, current_user["id"], base_asset)
-            if balance.available < request.amount:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Insufficient balance"
-                )
-        
-        # Create order
-        order = Order(
-            user_id=current_user["id"],
-            pair=request.pair,
-            side=request.side,
-            type=request.type,
-            price=request.price,
-            amount=request.amount,
-            remaining=request.amount,
-            status=OrderStatus.PENDING
+        # Orders for the same pair are processed one at a time
+        response = await order_sequencer.submit(
+            request.pair, execute_order, request, current_user["id"]
         )
         
-        db.add(order)
-        await db.commit()
-        await db.refresh(order)
-        
-        # Reserve funds
-        if request.side == OrderSide.BUY:
-            balance.reserved += required_amount
-        else:
-            balance.reserved += request.amount
-        
-        balance.available = balance.amount - balance.reserved
-        await db.commit()
-        
-        # Add to order book
-        order_book_entry = OrderBook(
-            pair=request.pair,
-            side=request.side,
-            price=request.price or Decimal("0"),
-            amount=request.amount,
-            order_id=order.id
-        )
-        db.add(order_book_entry)
-        await db.commit()
-        
-        # Try to match orders
-        trades = await match_orders(db, order)
-        
         # If immediate fill requested and no matches, try external liquidity
-        if request.immediate_fill and not trades:
-            await try_external_liquidity(db, order)
+        if not response["trades"] and wants_external_liquidity(request):
+            # The Bybit round trip runs outside the queue so it never stalls the pair
+            fill = await try_external_liquidity(response["order_id"], request)
+            if await order_sequencer.submit(request.pair, settle_external_fill, response["order_id"], fill):
+                response.update(
+                    status=OrderStatus.FILLED.value,
+                    filled=request.amount,
+                    remaining=Decimal("0"),
+                    trades=1
+                )
+            elif request.price is None:
+                # Bybit didn't take it either, so the market order expired
+                response.update(status=OrderStatus.CANCELLED.value, remaining=Decimal("0"))
         
-        return {
-            "order_id": order.id,
-            "status": order.status.value,
-            "filled": order.filled,
-            "remaining": order.remaining,
-            "trades": len(trades)
-        }
+        return response
         
     except HTTPException:
         raise
+    except InsufficientBalance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient balance"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to place order"
         )
 
-async def try_external_liquidity(db: AsyncSession, order: Order):
-    """Try to fill order using external liquidity (Bybit)"""
+def wants_external_liquidity(request: OrderCreate) -> bool:
+    """Whether an unmatched order may be filled from Bybit"""
+    # Market buys reserve nothing to pay an external fill with
+    return request.immediate_fill and not (request.price is None and request.side == OrderSide.BUY)
+
+async def try_external_liquidity(order_id: int, request: OrderCreate) -> Optional[Tuple[Decimal, str]]:
+    """Fill an order on Bybit; the fill price and Bybit order id, or None"""
     try:
         # Get market data from Bybit
-        ticker = await bybit.get_ticker(order.pair)
+        ticker = await bybit.get_ticker(request.pair)
+        if ticker.get("retCode") != 0:
+            return None
+        price = Decimal(ticker["result"]["list"][0]["lastPrice"])
+        
+        # Never fill through the order's own limit
+        if request.price is not None and (
+            price > request.price if request.side == OrderSide.BUY else price < request.price
+        ):
+            return None
+        
+        # Place market order on Bybit (simplified)
+        bybit_order = await bybit.place_order(
+            symbol=request.pair,
+            side=request.side.value,
+            order_type="Market",
+            qty=str(request.amount)
+        )
+        if bybit_order.get("retCode") != 0:
+            return None
+        return price, bybit_order.get("result", {}).get("orderId")
         
-        if ticker.get("retCode") == 0:
-            # Place market order on Bybit (simplified)
-            bybit_order = await bybit.place_order(
-                symbol=order.pair,
-                side=order.side.value,
-                order_type="Market",
-                qty=str(order.amount)
-            )
-            
-            if bybit_order.get("retCode") == 0:
+    except Exception as e:
+        print(f"External liquidity failed for order {order_id}: {e}")
+        return None
+
+async def settle_external_fill(order_id: int, fill: Optional[Tuple[Decimal, str]]) -> bool:
+    """Settle a Bybit fill, or put the held order back on the book; runs on the pair's sequencer"""
+    external_holds.discard(order_id)
+    async with AsyncSessionLocal() as db:
+        # Cancels are refused while the order is held, so it is still open here
+        order = await db.get(Order, order_id)
+        pair = order.pair
+        
+        if fill is not None:
+            price, bybit_order_id = fill
+            try:
                 # Update order as filled
                 order.status = OrderStatus.FILLED
                 order.filled = order.amount
                 order.remaining = Decimal("0")
-                await db.commit()
                 
                 # Create trade record
                 trade = Trade(
                     buy_order_id=order.id if order.side == OrderSide.BUY else 0,
                     sell_order_id=0 if order.side == OrderSide.BUY else order.id,
-                    pair=order.pair,
-                    price=Decimal(ticker["result"]["list"][0]["lastPrice"]),
+                    pair=pair,
+                    price=price,
                     amount=order.amount,
                     fee=order.amount * Decimal("0.001"),
-                    buyer_id=order.user_id if order.side == OrderSide.BUY else 0,
-                    seller_id=0 if order.side == OrderSide.BUY else order.user_id
+                    buyer_id=order.user_id if order.side == OrderSide.BUY else EXTERNAL_USER_ID,
+                    seller_id=EXTERNAL_USER_ID if order.side == OrderSide.BUY else order.user_id
                 )
-                db.add(trade)
-                await db.commit()
                 
-    except Exception as e:
-        # External liquidity failed, keep order open
-        pass
+                # Settle against the external liquidity account
+                settlement = Settlement(reference=f"order:{order_id}")
+                settlement.add_trade(trade, order.price or Decimal("0"))
+                await settlement.apply(db)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"Bybit order {bybit_order_id} filled order {order_id} but could not be settled: {e}")
+                await db.refresh(order)
+            else:
+                candle_builder.add_trades(settlement.trades)
+                market_feed.publish_trades(pair, settlement.trades, order.side)
+                market_feed.publish_order(order)
+                return True
+        
+        # Not filled externally: a market order expires
+        if order.price is None:
+            journal = Journal("expire", reference=f"order:{order_id}")
+            expire_remainder(journal, order)
+            await journal.apply(db)
+            await db.commit()
+            market_feed.publish_order(order)
+            return False
+        
+        # A limit order rests again, at the back of its price level
+        matching_engine.get_book(pair).add(RestingOrder(
+            order_id=order.id,
+            user_id=order.user_id,
+            side=order.side,
+            price=order.price,
+            amount=order.amount,
+            remaining=order.remaining
+        ))
+        market_feed.publish_book(pair)
+        return False
+
+async def execute_cancel(order_id: int, user_id: int) -> Dict[str, Any]:
+    """Release funds and cancel an order; runs on the pair's sequencer"""
+    async with AsyncSessionLocal() as db:
+        return await _execute_cancel(db, order_id, user_id)
+
+async def _execute_cancel(db: AsyncSession, order_id: int, user_id: int) -> Dict[str, Any]:
+    # Loaded inside the job, so a fill that landed while this cancel was queued is seen
+    result = await db.execute(
+        select(Order).where(Order.id == order_id, Order.user_id == user_id)
+    )
+    order = result.scalar_one_or_none()
+    
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    if order.status not in [OrderStatus.PENDING, OrderStatus.PARTIALLY_FILLED]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot cancel order"
+        )
+    
+    if order.id in external_holds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order is being filled externally"
+        )
+    
+    # Release reserved funds
+    journal = Journal("cancel", reference=f"order:{order.id}")
+    release_reservation(journal, order)
+    await journal.apply(db)
+    
+    # Update order status
+    order.status = OrderStatus.CANCELLED
+    order.remaining = Decimal("0")
+    
+    # Remove from order book
+    matching_engine.cancel(order.pair, order.id)
+    
+    await db.commit()
+    market_feed.publish_book(order.pair)
+    market_feed.publish_order(order)
+    
+    return {"success": True, "order_id": order.id}
 
 @router.post("/cancel")
 async def cancel_order(
     request: CancelOrderRequest,
-    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Cancel an order"""
     try:
-        # Get order
-        result = await db.execute(
-            select(Order).where(
-                Order.id == request.order_id,
-                Order.user_id == current_user["id"]
+        # Get the order's pair; the connection goes back to the pool before the queue wait
+        async with AsyncSessionLocal() as db:
+            pair = await db.scalar(
+                select(Order.pair).where(
+                    Order.id == request.order_id,
+                    Order.user_id == current_user["id"]
+                )
             )
-        )
-        order = result.scalar_one_or_none()
         
-        if not order:
+        if not pair:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Order not found"
             )
         
-        if order.status not in [OrderStatus.PENDING, OrderStatus.PARTIALLY_FILLED]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot cancel order"
-            )
-        
-        # Release reserved funds
-        base_asset, quote_asset = order.pair.split("/")
-        
-        if order.side == OrderSide.BUY:
-            balance = await get_user_balance(db, current_user["id"], quote_asset)
-            balance.reserved -= order.remaining * (order.price or Decimal("0"))
-        else:
-            balance = await get_user_balance(db, current_user["id"], base_asset)
-            balance.reserved -= order.remaining
-        
-        balance.available = balance.amount - balance.reserved
-        
-        # Update order status
-        order.status = OrderStatus.CANCELLED
-        order.remaining = Decimal("0")
-        
-        # Remove from order book
-        await db.execute(
-            select(OrderBook).where(OrderBook.order_id == order.id)
-        )
-        
-        await db.commit()
-        
-        return {"success": True, "order_id": order.id}
+        # Cancels share the pair's queue with new orders
+        return await order_sequencer.submit(pair, execute_cancel, request.order_id, current_user["id"])
         
     except HTTPException:
         raise
@@ -373,19 +439,24 @@ async def cancel_order(
 @router.get("/orderbook")
 async def get_orderbook(
     pair: str,
-    limit: int = 25,
-    db: AsyncSession = Depends(get_db)
+    limit: int = 25
 ):
     """Get order book for a trading pair"""
     try:
-        bids = await get_order_book_entries(db, pair, OrderSide.BUY, limit)
-        asks = await get_order_book_entries(db, pair, OrderSide.SELL, limit)
+        snapshot = matching_engine.depth(pair, limit)
         
         return OrderBookResponse(
             pair=pair,
-            bids=bids,
-            asks=asks,
-            timestamp=datetime.utcnow()
+            bids=[
+                OrderBookEntry(price=price, amount=amount, total=price * amount)
+                for price, amount in snapshot["bids"]
+            ],
+            asks=[
+                OrderBookEntry(price=price, amount=amount, total=price * amount)
+                for price, amount in snapshot["asks"]
+            ],
+            sequence=snapshot["sequence"],
+            timestamp=snapshot["timestamp"]
         )
         
     except Exception as e:
@@ -394,15 +465,119 @@ async def get_orderbook(
             detail="Failed to get order book"
         )
 
+@router.get("/candles")
+async def get_pair_candles(
+    pair: str,
+    interval: str = "1m",
+    limit: int = 500,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get OHLCV candles for a trading pair, oldest first"""
+    if interval not in INTERVALS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Interval must be one of {', '.join(INTERVALS)}"
+        )
+    
+    try:
+        candles = await get_candles(db, pair, interval, max(1, min(limit, MAX_CANDLES)), end)
+        
+        return CandleListResponse(
+            pair=pair,
+            interval=interval,
+            candles=[CandleResponse(**candle) for candle in candles]
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get candles"
+        )
+
+@router.get("/prices")
+async def get_prices(quote: str = "USD"):
+    """Get latest reference prices from the price store"""
+    return {
+        "quote": quote.upper(),
+        "prices": {
+            entry.asset: {
+                "price": entry.price,
+                "change_24h": entry.change_24h,
+                "updated_at": entry.updated_at
+            }
+            for entry in price_store.index.values()
+            if entry.quote == quote.upper()
+        }
+    }
+
+@router.websocket("/ws")
+async def market_data_ws(websocket: WebSocket):
+    """Stream order book diffs, trades and tickers per pair, and private order events"""
+    await websocket.accept()
+    subscriber = Subscriber(websocket)
+    subscriber.start()
+    
+    try:
+        while not subscriber.closed:
+            message = await websocket.receive_json()
+            op = message.get("op")
+            pair = message.get("pair")
+            
+            if op in ("subscribe", "unsubscribe") and pair not in DEFAULT_TRADING_PAIRS \
+                    and pair not in matching_engine.books:
+                broadcaster.send(subscriber, {"type": "error", "detail": "Unknown pair", "pair": pair})
+            elif op == "subscribe":
+                # Snapshot first; diffs follow from its sequence
+                market_feed.subscribe(subscriber, pair)
+            elif op == "unsubscribe":
+                market_feed.unsubscribe(subscriber, pair)
+            elif op == "auth":
+                user = await get_user_from_token(message.get("token"))
+                if user is None:
+                    broadcaster.send(subscriber, {"type": "error", "detail": "Invalid token"})
+                else:
+                    market_feed.subscribe_user(subscriber, user["id"])
+                    broadcaster.send(subscriber, {"type": "authenticated", "user_id": user["id"]})
+            elif op == "ping":
+                broadcaster.send(subscriber, {"type": "pong"})
+            else:
+                broadcaster.send(subscriber, {"type": "error", "detail": "Unknown op"})
+                
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        # Malformed frames or a socket closed after a slow-consumer drop
+        pass
+    finally:
+        broadcaster.disconnect(subscriber)
+
+def user_trades_query(user_id: int, pair: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50):
+    """One page of a user's trades, newest first, merged from the buyer and seller indexes"""
+    # Each side seeks its own index to the cursor; self-trades come from the buy side only
+    sides = []
+    for condition in (
+        Trade.buyer_id == user_id,
+        and_(Trade.seller_id == user_id, Trade.buyer_id != user_id)
+    ):
+        query = select(Trade).where(condition)
+        if pair:
+            query = query.where(Trade.pair == pair)
+        sides.append(select(keyset_page(query, Trade, cursor, limit).subquery()))
+    
+    trade = aliased(Trade, union_all(*sides).subquery())
+    return select(trade).order_by(trade.created_at.desc(), trade.id.desc()).limit(limit + 1)
+
 @router.get("/trades")
 async def get_trades(
     user_id: int,
     pair: Optional[str] = None,
+    cursor: Optional[str] = None,
     limit: int = 100,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get user trade history"""
+    """Get user trade history, newest first"""
     # Check if user is requesting their own trades or is admin
     if current_user["id"] != user_id and not current_user.get("is_admin"):
         raise HTTPException(
@@ -411,36 +586,57 @@ async def get_trades(
         )
     
     try:
-        query = select(Trade).where(
-            or_(Trade.buyer_id == user_id, Trade.seller_id == user_id)
+        limit = page_size(limit)
+        result = await db.execute(user_trades_query(user_id, pair, cursor, limit))
+        trades, next_cursor = split_page(result.scalars().all(), limit)
+        
+        return TradeListResponse(
+            trades=[
+                TradeResponse(
+                    id=trade.id,
+                    buy_order_id=trade.buy_order_id,
+                    sell_order_id=trade.sell_order_id,
+                    pair=trade.pair,
+                    price=trade.price,
+                    amount=trade.amount,
+                    fee=trade.fee,
+                    buyer_id=trade.buyer_id,
+                    seller_id=trade.seller_id,
+                    created_at=trade.created_at
+                )
+                for trade in trades
+            ],
+            next_cursor=next_cursor
         )
         
-        if pair:
-            query = query.where(Trade.pair == pair)
-        
-        query = query.order_by(Trade.created_at.desc()).limit(limit)
-        
-        result = await db.execute(query)
-        trades = result.scalars().all()
-        
-        return [
-            TradeResponse(
-                id=trade.id,
-                buy_order_id=trade.buy_order_id,
-                sell_order_id=trade.sell_order_id,
-                pair=trade.pair,
-                price=trade.price,
-                amount=trade.amount,
-                fee=trade.fee,
-                buyer_id=trade.buyer_id,
-                seller_id=trade.seller_id,
-                created_at=trade.created_at
-            )
-            for trade in trades
-        ]
-        
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get trades"
         )
+
+@router.get("/trades/export")
+async def export_trades(
+    user_id: int,
+    pair: Optional[str] = None,
+    format: str = "csv",
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream a user's full trade history as CSV or NDJSON"""
+    if current_user["id"] != user_id and not current_user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    if format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported export format"
+        )
+    
+    return export_response(trade_export_query(user_id, pair), format, f"trades-{user_id}")
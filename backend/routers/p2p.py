@@ -8,6 +8,7 @@ from decimal import Decimal
 
 from database import get_db
 from models.p2p_offer import P2POffer, P2PStatus
+from core.ledger import Journal, InsufficientBalance
 from schemas.p2p import P2POfferCreate, P2POfferResponse, P2PAcceptRequest, P2PReleaseRequest
 from routers.auth import get_current_user
 
@@ -31,11 +32,6 @@ async def create_p2p_offer(
                 detail="Insufficient balance"
             )
         
-        # Reserve funds
-        balance.reserved += request.amount
-        balance.available = balance.amount - balance.reserved
-        await db.commit()
-        
         # Create offer
         offer = P2POffer(
             seller_id=current_user["id"],
@@ -48,6 +44,12 @@ async def create_p2p_offer(
         )
         
         db.add(offer)
+        await db.flush()
+        
+        # Reserve funds
+        journal = Journal("p2p_offer", reference=f"p2p:{offer.id}")
+        journal.adjust(current_user["id"], request.asset, reserved=request.amount)
+        await journal.apply(db)
         await db.commit()
         await db.refresh(offer)
         
@@ -68,6 +70,11 @@ async def create_p2p_offer(
         
     except HTTPException:
         raise
+    except InsufficientBalance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient balance"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -138,9 +145,11 @@ async def release_p2p_funds(
             )
         
         if request.action == "release":
-            # Release funds to buyer
-            from routers.wallet import update_balance
-            await update_balance(db, offer.buyer_id, offer.asset, offer.amount)
+            # Release the seller's reserved funds to the buyer
+            journal = Journal("p2p_release", reference=f"p2p:{offer.id}")
+            journal.adjust(offer.seller_id, offer.asset, amount=-offer.amount, reserved=-offer.amount)
+            journal.adjust(offer.buyer_id, offer.asset, amount=offer.amount)
+            await journal.apply(db)
             offer.status = P2PStatus.COMPLETED
         elif request.action == "dispute":
             # Create dispute
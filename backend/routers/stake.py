@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 
 from database import get_db
 from models.stake import Stake
+from core.ledger import Journal, InsufficientBalance, REWARDS_ACCOUNT, STAKING_ACCOUNT
+from core.staking import enter_stake, settle_stake
 from schemas.stake import StakeCreate, StakeResponse, UnstakeRequest, ClaimRewardsRequest
 from routers.auth import get_current_user
 
@@ -46,12 +48,15 @@ async def create_stake(
             is_active=True
         )
         
-        # Lock funds
-        balance.amount -= request.amount
-        balance.available = balance.amount - balance.reserved
-        await db.commit()
-        
+        # Accrue from the pool's current reward index
+        await enter_stake(db, stake, stake.since)
         db.add(stake)
+        await db.flush()
+        
+        # Lock funds
+        journal = Journal("stake", reference=f"stake:{stake.id}")
+        journal.transfer(STAKING_ACCOUNT, current_user["id"], request.asset, -request.amount)
+        await journal.apply(db)
         await db.commit()
         await db.refresh(stake)
         
@@ -70,6 +75,11 @@ async def create_stake(
         
     except HTTPException:
         raise
+    except InsufficientBalance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient balance"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -105,16 +115,19 @@ async def unstake(
                 detail="Stake not active"
             )
         
-        # Deactivate stake
+        # Pay out pending rewards and deactivate stake
+        rewards = await settle_stake(db, stake)
         stake.is_active = False
         
         # Return funds
-        from routers.wallet import update_balance
-        await update_balance(db, current_user["id"], stake.asset, stake.amount)
+        journal = Journal("unstake", reference=f"stake:{stake.id}")
+        journal.transfer(STAKING_ACCOUNT, current_user["id"], stake.asset, stake.amount)
+        journal.transfer(REWARDS_ACCOUNT, current_user["id"], stake.asset, rewards)
+        await journal.apply(db)
         
         await db.commit()
         
-        return {"success": True, "amount": stake.amount, "asset": stake.asset}
+        return {"success": True, "amount": stake.amount, "rewards": rewards, "asset": stake.asset}
         
     except HTTPException:
         raise
@@ -147,10 +160,14 @@ async def claim_rewards(
                 detail="Stake not found"
             )
         
-        # Calculate rewards
-        days_staked = (datetime.utcnow() - stake.since).days
-        total_rewards = stake.amount * stake.apr / Decimal("365") * days_staked
-        unclaimed_rewards = total_rewards - stake.rewards_claimed
+        if not stake.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stake not active"
+            )
+        
+        # Rewards since the last claim, from the pool's reward index
+        unclaimed_rewards = await settle_stake(db, stake)
         
         if unclaimed_rewards <= 0:
             raise HTTPException(
@@ -158,12 +175,10 @@ async def claim_rewards(
                 detail="No rewards to claim"
             )
         
-        # Update stake
-        stake.rewards_claimed = total_rewards
-        
         # Credit rewards
-        from routers.wallet import update_balance
-        await update_balance(db, current_user["id"], stake.asset, unclaimed_rewards)
+        journal = Journal("staking_reward", reference=f"stake:{stake.id}")
+        journal.transfer(REWARDS_ACCOUNT, current_user["id"], stake.asset, unclaimed_rewards)
+        await journal.apply(db)
         
         await db.commit()
         
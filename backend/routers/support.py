@@ -4,12 +4,13 @@ Support router for Bridge Exchange
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 
 from database import get_db
 from models.ticket import Ticket, TicketStatus, TicketPriority
 from schemas.ticket import TicketCreate, TicketResponse, MessageCreate, TicketListResponse
 from routers.auth import get_current_user
+from core.pagination import InvalidCursor, count_rows, keyset_page, page_size, split_page
 
 router = APIRouter()
 
@@ -104,29 +105,20 @@ async def add_message(
 
 @router.get("/tickets")
 async def get_user_tickets(
-    page: int = 1,
+    cursor: Optional[str] = None,
     per_page: int = 20,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get user tickets"""
+    """Get user tickets, newest first"""
     try:
-        offset = (page - 1) * per_page
+        per_page = page_size(per_page)
+        query = select(Ticket).where(Ticket.user_id == current_user["id"])
         
-        result = await db.execute(
-            select(Ticket)
-            .where(Ticket.user_id == current_user["id"])
-            .order_by(Ticket.created_at.desc())
-            .offset(offset)
-            .limit(per_page)
-        )
-        tickets = result.scalars().all()
+        result = await db.execute(keyset_page(query, Ticket, cursor, per_page))
+        tickets, next_cursor = split_page(result.scalars().all(), per_page)
         
-        # Get total count
-        count_result = await db.execute(
-            select(Ticket).where(Ticket.user_id == current_user["id"])
-        )
-        total = len(count_result.scalars().all())
+        total = await count_rows(db, query)
         
         return TicketListResponse(
             tickets=[
@@ -145,10 +137,15 @@ async def get_user_tickets(
                 for t in tickets
             ],
             total=total,
-            page=page,
-            per_page=per_page
+            per_page=per_page,
+            next_cursor=next_cursor
         )
         
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
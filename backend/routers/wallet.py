@@ -5,11 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from decimal import Decimal
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from database import get_db
 from models.user import User
-from models.balance import Balance
 from models.transaction import Transaction, TransactionType, TransactionStatus
 from models.invoice import Invoice, InvoiceStatus
 from schemas.wallet import (
@@ -17,49 +16,37 @@ from schemas.wallet import (
     BalanceResponse, WalletResponse
 )
 from services.cryptopay import CryptoPayClient
+from core.prices import price_store
+from core.deposits import settle_paid_invoices
+from core.balances import BalanceSnapshot, balance_cache
+from core.ledger import Journal, InsufficientBalance, ADJUSTMENTS_ACCOUNT
+from core.exports import MEDIA_TYPES, export_response, transaction_export_query
 from routers.auth import get_current_user
 
 router = APIRouter()
 cryptopay = CryptoPayClient()
 
-async def get_user_balance(db: AsyncSession, user_id: int, asset: str) -> Balance:
+async def get_user_balance(db: AsyncSession, user_id: int, asset: str) -> BalanceSnapshot:
     """Get user balance for specific asset"""
-    result = await db.execute(
-        select(Balance).where(
-            Balance.user_id == user_id,
-            Balance.asset == asset
-        )
-    )
-    balance = result.scalar_one_or_none()
-    
-    if not balance:
-        # Create new balance record
-        balance = Balance(
-            user_id=user_id,
-            asset=asset,
-            amount=Decimal("0"),
-            reserved=Decimal("0"),
-            available=Decimal("0")
-        )
-        db.add(balance)
-        await db.commit()
-        await db.refresh(balance)
-    
-    return balance
+    return await balance_cache.get(db, user_id, asset)
 
 async def update_balance(
     db: AsyncSession, 
     user_id: int, 
     asset: str, 
-    amount_change: Decimal
-) -> Balance:
-    """Update user balance"""
-    balance = await get_user_balance(db, user_id, asset)
-    balance.amount += amount_change
-    balance.available = balance.amount - balance.reserved
+    amount_change: Decimal,
+    reason: str = "adjustment",
+    account: str = ADJUSTMENTS_ACCOUNT,
+    reference: Optional[str] = None
+) -> BalanceSnapshot:
+    """Update user balance against a system account"""
+    journal = Journal(reason, reference)
+    journal.transfer(account, user_id, asset, amount_change)
+    balances = await journal.apply(db)
     await db.commit()
-    await db.refresh(balance)
-    return balance
+    if balances:
+        return BalanceSnapshot.from_row(balances[0])
+    return await get_user_balance(db, user_id, asset)
 
 @router.post("/deposit")
 async def create_deposit(
@@ -141,8 +128,9 @@ async def create_withdraw(
             )
         
         # Reserve funds
-        balance.reserved += total_amount
-        balance.available = balance.amount - balance.reserved
+        journal = Journal("withdraw")
+        journal.adjust(current_user["id"], request.asset, reserved=total_amount)
+        await journal.apply(db)
         await db.commit()
         
         # Create transaction
@@ -175,6 +163,11 @@ async def create_withdraw(
         
     except HTTPException:
         raise
+    except InsufficientBalance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient balance"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -195,10 +188,7 @@ async def get_balances(
             detail="Access denied"
         )
     
-    result = await db.execute(
-        select(Balance).where(Balance.user_id == user_id)
-    )
-    balances = result.scalars().all()
+    balances = list((await balance_cache.get_balances(db, user_id)).values())
     
     return {
         "user_id": user_id,
@@ -207,12 +197,37 @@ async def get_balances(
                 "asset": balance.asset,
                 "amount": balance.amount,
                 "reserved": balance.reserved,
-                "available": balance.available
+                "available": balance.available,
+                "value_usd": price_store.value(balance.asset, balance.amount)
             }
             for balance in balances
-        ]
+        ],
+        "total_value_usd": price_store.total_value(
+            {balance.asset: balance.amount for balance in balances}
+        )
     }
 
+@router.get("/transactions/export")
+async def export_transactions(
+    user_id: int,
+    asset: Optional[str] = None,
+    format: str = "csv",
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream a user's full transaction history as CSV or NDJSON"""
+    if current_user["id"] != user_id and not current_user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    if format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported export format"
+        )
+    
+    return export_response(transaction_export_query(user_id, asset), format, f"transactions-{user_id}")
+
 @router.post("/transfer")
 async def internal_transfer(
     request: TransferRequest,
@@ -241,12 +256,10 @@ async def internal_transfer(
             )
         
         # Perform transfer
-        from_balance.amount -= request.amount
-        from_balance.available = from_balance.amount - from_balance.reserved
-        
-        to_balance = await get_user_balance(db, request.to_user_id, request.asset)
-        to_balance.amount += request.amount
-        to_balance.available = to_balance.amount - to_balance.reserved
+        journal = Journal("transfer")
+        journal.adjust(request.from_user_id, request.asset, amount=-request.amount)
+        journal.adjust(request.to_user_id, request.asset, amount=request.amount)
+        await journal.apply(db)
         
         # Create transaction records
         from_transaction = Transaction(
@@ -283,6 +296,11 @@ async def internal_transfer(
         
     except HTTPException:
         raise
+    except InsufficientBalance:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient balance"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -317,25 +335,12 @@ async def cryptopay_webhook(
         if invoice.status == InvoiceStatus.PAID:
             return {"status": "already_processed"}
         
-        # Update invoice status
-        invoice.status = InvoiceStatus.PAID
+        # Mark paid, credit balance and record the deposit atomically
+        settled = await settle_paid_invoices(db, [invoice.id])
         await db.commit()
         
-        # Credit user balance
-        await update_balance(db, invoice.user_id, invoice.asset, invoice.amount)
-        
-        # Create transaction record
-        transaction = Transaction(
-            user_id=invoice.user_id,
-            type=TransactionType.DEPOSIT,
-            amount=invoice.amount,
-            asset=invoice.asset,
-            status=TransactionStatus.COMPLETED,
-            meta={"invoice_id": invoice.id}
-        )
-        
-        db.add(transaction)
-        await db.commit()
+        if not settled:
+            return {"status": "already_processed"}
         
         return {"status": "success"}
         
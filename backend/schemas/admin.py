@@ -52,3 +52,4 @@ class AdminStatsResponse(BaseModel):
     pending_withdrawals: int
     open_tickets: int
     total_balance: Dict[str, Decimal]
+    total_balance_usd: Decimal = Decimal("0")
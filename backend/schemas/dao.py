@@ -36,5 +36,5 @@ class VoteRequest(BaseModel):
 class ProposalListResponse(BaseModel):
     proposals: list[DAOProposalResponse]
     total: int
-    page: int
     per_page: int
+    next_cursor: Optional[str] = None
@@ -2,7 +2,7 @@
 Order and Trade schemas
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
 from models.order import OrderSide, OrderType, OrderStatus
@@ -43,6 +43,7 @@ class OrderBookResponse(BaseModel):
     pair: str
     bids: list[OrderBookEntry]
     asks: list[OrderBookEntry]
+    sequence: int = 0
     timestamp: datetime
 
 class TradeResponse(BaseModel):
@@ -60,6 +61,24 @@ class TradeResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TradeListResponse(BaseModel):
+    trades: List[TradeResponse]
+    next_cursor: Optional[str] = None
+
+class CandleResponse(BaseModel):
+    open_time: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    volume: Decimal
+    trades: int
+
+class CandleListResponse(BaseModel):
+    pair: str
+    interval: str
+    candles: List[CandleResponse]
+
 class CancelOrderRequest(BaseModel):
     user_id: int
     order_id: int
@@ -39,5 +39,5 @@ class TicketResponse(BaseModel):
 class TicketListResponse(BaseModel):
     tickets: List[TicketResponse]
     total: int
-    page: int
     per_page: int
+    next_cursor: Optional[str] = None
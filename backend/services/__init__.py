@@ -6,11 +6,16 @@ from .bybit import BybitClient
 from .ton import TONClient
 from .gecko import GeckoClient
 from .openai_assistant import OpenAIAssistant
+from .http import HTTPClientPool, http_pool
+from .cache import TTLCache
 
 __all__ = [
     "CryptoPayClient",
     "BybitClient", 
     "TONClient",
     "GeckoClient",
-    "OpenAIAssistant"
+    "OpenAIAssistant",
+    "HTTPClientPool",
+    "http_pool",
+    "TTLCache"
 ]
@@ -1,13 +1,13 @@
 """
 Bybit API client for Bridge Exchange
 """
-import httpx
 import hmac
 import hashlib
 import time
 import json
 from typing import Dict, Any, Optional, List
 from config import BYBIT_API_KEY, BYBIT_API_SECRET, BYBIT_TESTNET, TEST_MODE
+from .http import http_pool
 
 class BybitClient:
     def __init__(self):
@@ -59,9 +59,8 @@ class BybitClient:
             }
         
         url = f"{self.base_url}/v5/market/time"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            return response.json()
+        response = await http_pool.get(url).get(url)
+        return response.json()
     
     async def get_ticker(self, symbol: str) -> Dict[str, Any]:
         """Get ticker information"""
@@ -98,9 +97,8 @@ class BybitClient:
         url = f"{self.base_url}/v5/market/tickers"
         params = {"category": "spot", "symbol": symbol}
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params)
+        return response.json()
     
     async def get_orderbook(self, symbol: str, limit: int = 25) -> Dict[str, Any]:
         """Get order book"""
@@ -124,9 +122,8 @@ class BybitClient:
         url = f"{self.base_url}/v5/market/orderbook"
         params = {"category": "spot", "symbol": symbol, "limit": limit}
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params)
+        return response.json()
     
     async def get_account_balance(self) -> Dict[str, Any]:
         """Get account balance"""
@@ -161,9 +158,8 @@ class BybitClient:
         params = {"accountType": "UNIFIED"}
         headers = self._get_headers(json.dumps(params))
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params, headers=headers)
+        return response.json()
     
     async def place_order(
         self, 
@@ -197,9 +193,8 @@ class BybitClient:
         
         headers = self._get_headers(json.dumps(data))
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).post(url, json=data, headers=headers)
+        return response.json()
     
     async def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """Cancel an order"""
@@ -222,9 +217,8 @@ class BybitClient:
         
         headers = self._get_headers(json.dumps(data))
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).post(url, json=data, headers=headers)
+        return response.json()
     
     async def get_open_orders(self, symbol: Optional[str] = None) -> Dict[str, Any]:
         """Get open orders"""
@@ -244,6 +238,5 @@ class BybitClient:
         
         headers = self._get_headers(json.dumps(params))
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params, headers=headers)
+        return response.json()
@@ -0,0 +1,107 @@
+"""
+Async TTL cache with stale-while-revalidate and request coalescing
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+Loader = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+class TTLCache:
+    """Per-key TTL cache; concurrent misses for a key share one upstream load"""
+
+    def __init__(self, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (value, fresh_until, stale_until)
+        self.entries: Dict[Hashable, Tuple[Any, float, float]] = {}
+        self.inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value with its own TTL"""
+        now = time.monotonic()
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        self.entries[key] = (value, fresh_until, fresh_until + self.stale_ttl)
+
+    def set_many(self, values: Dict[Hashable, Any], ttl: Optional[float] = None):
+        for key, value in values.items():
+            self.set(key, value, ttl)
+
+    async def get_many(self, keys: List[Hashable], loader: Loader) -> Dict[Hashable, Any]:
+        """Get values, loading misses in one call and refreshing stale ones in the background"""
+        now = time.monotonic()
+        result = {}
+        stale = []
+        missing = []
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is not None and now < entry[1]:
+                self.hits += 1
+                result[key] = entry[0]
+            elif entry is not None and now < entry[2]:
+                self.stale_hits += 1
+                result[key] = entry[0]
+                stale.append(key)
+            else:
+                self.misses += 1
+                missing.append(key)
+
+        if stale:
+            self._start_load(stale, loader)
+
+        if missing:
+            self._start_load(missing, loader)
+            tasks = {self.inflight[key] for key in missing if key in self.inflight}
+            await asyncio.gather(*tasks)
+            for key in missing:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    result[key] = entry[0]
+
+        return result
+
+    async def refresh(self, keys: List[Hashable], loader: Loader) -> Dict[Hashable, Any]:
+        """Reload keys now, e.g. from a background job keeping the cache warm"""
+        self._start_load(keys, loader)
+        tasks = {self.inflight[key] for key in keys if key in self.inflight}
+        await asyncio.gather(*tasks)
+        return {key: self.entries[key][0] for key in keys if key in self.entries}
+
+    def _start_load(self, keys: List[Hashable], loader: Loader):
+        # Keys already being loaded join the running load
+        keys = [key for key in keys if key not in self.inflight]
+        if not keys:
+            return
+        task = asyncio.create_task(self._load(keys, loader))
+        task.add_done_callback(self._log_failure)
+        for key in keys:
+            self.inflight[key] = task
+
+    async def _load(self, keys: List[Hashable], loader: Loader):
+        self.loads += 1
+        try:
+            self.set_many(await loader(keys))
+        finally:
+            current = asyncio.current_task()
+            for key in keys:
+                if self.inflight.get(key) is current:
+                    del self.inflight[key]
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Cache load failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters"""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "loads": self.loads
+        }
@@ -1,12 +1,12 @@
 """
 CryptoPay API client for Bridge Exchange
 """
-import httpx
 import hmac
 import hashlib
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from config import CRYPTOPAY_API_TOKEN, CRYPTOPAY_API_HOST, CRYPTOPAY_WEBHOOK_SECRET, TEST_MODE
+from .http import http_pool
 
 class CryptoPayClient:
     def __init__(self):
@@ -60,9 +60,8 @@ class CryptoPayClient:
             "payload": payload
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=data)
-            return response.json()
+        response = await http_pool.get(url).post(url, headers=headers, json=data)
+        return response.json()
     
     async def get_invoice(self, invoice_id: str) -> Dict[str, Any]:
         """Get invoice status"""
@@ -89,9 +88,47 @@ class CryptoPayClient:
         }
         params = {"invoice_ids": invoice_id}
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers, params=params)
+        return response.json()
+    
+    async def get_invoices(
+        self,
+        invoice_ids: List[str],
+        status: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get many invoices in one call"""
+        if self.test_mode or not self.api_token or self.api_token.startswith("TODO"):
+            # Mock response
+            return {
+                "ok": True,
+                "result": {
+                    "items": [
+                        {
+                            "invoice_id": invoice_id,
+                            "status": "paid",
+                            "hash": f"test_hash_{invoice_id}",
+                            "asset": "USDT",
+                            "amount": "100.00",
+                            "paid_at": "2023-01-01T00:01:00.000Z"
+                        }
+                        for invoice_id in invoice_ids
+                    ]
+                }
+            }
+        
+        url = f"{self.api_host}/api/getInvoices"
+        headers = {
+            "Crypto-Pay-API-Token": self.api_token
+        }
+        params = {
+            "invoice_ids": ",".join(str(invoice_id) for invoice_id in invoice_ids),
+            "count": len(invoice_ids)
+        }
+        if status:
+            params["status"] = status
+        
+        response = await http_pool.get(url).get(url, headers=headers, params=params)
+        return response.json()
     
     async def create_transfer(
         self, 
@@ -127,9 +164,8 @@ class CryptoPayClient:
             "spend_id": spend_id
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=data)
-            return response.json()
+        response = await http_pool.get(url).post(url, headers=headers, json=data)
+        return response.json()
     
     def verify_webhook(self, payload: str, signature: str) -> bool:
         """Verify webhook signature"""
@@ -164,6 +200,5 @@ class CryptoPayClient:
             "Crypto-Pay-API-Token": self.api_token
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
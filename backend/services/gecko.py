@@ -1,9 +1,13 @@
 """
 CoinGecko API client for Bridge Exchange
 """
-import httpx
 from typing import Dict, Any, Optional, List
-from config import GECKO_API_KEY, GECKO_BASE_URL, TEST_MODE
+from config import GECKO_API_KEY, GECKO_BASE_URL, TEST_MODE, PRICE_CACHE_TTL, PRICE_CACHE_STALE_TTL
+from .cache import TTLCache
+from .http import http_pool
+
+# Shared by every GeckoClient so routers and background jobs hit one cache
+price_cache = TTLCache(ttl=PRICE_CACHE_TTL, stale_ttl=PRICE_CACHE_STALE_TTL)
 
 class GeckoClient:
     def __init__(self):
@@ -26,7 +30,48 @@ class GeckoClient:
         include_24hr_vol: bool = True,
         include_24hr_change: bool = True
     ) -> Dict[str, Any]:
-        """Get cryptocurrency prices"""
+        """Get cryptocurrency prices, served from the shared price cache"""
+        options = (tuple(vs_currencies), include_market_cap, include_24hr_vol, include_24hr_change)
+        values = await price_cache.get_many(
+            [(coin_id, options) for coin_id in ids],
+            self._price_loader(options)
+        )
+        return {key[0]: value for key, value in values.items()}
+    
+    async def refresh_prices(
+        self,
+        ids: List[str],
+        vs_currencies: List[str] = ["usd"],
+        include_market_cap: bool = True,
+        include_24hr_vol: bool = True,
+        include_24hr_change: bool = True
+    ) -> Dict[str, Any]:
+        """Fetch prices upstream and store them in the cache"""
+        options = (tuple(vs_currencies), include_market_cap, include_24hr_vol, include_24hr_change)
+        values = await price_cache.refresh(
+            [(coin_id, options) for coin_id in ids],
+            self._price_loader(options)
+        )
+        return {key[0]: value for key, value in values.items()}
+    
+    def _price_loader(self, options: tuple):
+        """Build a cache loader fetching all missing coins in one request"""
+        async def load(keys: List[tuple]) -> Dict[tuple, Any]:
+            coin_ids = [key[0] for key in keys]
+            prices = await self.fetch_price(coin_ids, list(options[0]), *options[1:])
+            # Error payloads carry no coin ids, so nothing bogus gets cached
+            return {(coin_id, options): prices[coin_id] for coin_id in coin_ids if coin_id in prices}
+        return load
+    
+    async def fetch_price(
+        self, 
+        ids: List[str], 
+        vs_currencies: List[str] = ["usd"],
+        include_market_cap: bool = True,
+        include_24hr_vol: bool = True,
+        include_24hr_change: bool = True
+    ) -> Dict[str, Any]:
+        """Get cryptocurrency prices from the API, bypassing the cache"""
         if self.test_mode:
             # Mock price data
             prices = {}
@@ -49,9 +94,8 @@ class GeckoClient:
         }
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params, headers=headers)
+        return response.json()
     
     async def get_coin_list(self, include_platform: bool = False) -> List[Dict[str, Any]]:
         """Get list of all coins"""
@@ -81,9 +125,8 @@ class GeckoClient:
         params = {"include_platform": include_platform}
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params, headers=headers)
+        return response.json()
     
     async def get_coin_market_data(
         self, 
@@ -138,9 +181,8 @@ class GeckoClient:
         }
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, params=params, headers=headers)
+        return response.json()
     
     async def get_coin_by_id(self, coin_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific coin"""
@@ -168,9 +210,8 @@ class GeckoClient:
         url = f"{self.base_url}/coins/{coin_id}"
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
     
     async def get_trending_coins(self) -> Dict[str, Any]:
         """Get trending coins"""
@@ -198,6 +239,5 @@ class GeckoClient:
         url = f"{self.base_url}/search/trending"
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
@@ -0,0 +1,58 @@
+"""
+Shared HTTP connection pool for external service clients
+"""
+import httpx
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from config import (
+    HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_PER_HOST, HTTP_KEEPALIVE_EXPIRY
+)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HTTPClientPool:
+    """One keep-alive AsyncClient per upstream host, owned by the app lifespan"""
+
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.http2 = HTTP2_AVAILABLE
+        self.timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        # Each host gets its own pool, so these limits apply per host
+        self.limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """Get the shared client for the host of url"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self.clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=self.limits
+            )
+            self.clients[origin] = client
+        return client
+
+    async def start(self, origins: Optional[list] = None):
+        """Create clients up front for known hosts"""
+        for origin in origins or []:
+            self.get(origin)
+
+    async def close(self):
+        """Close every pooled connection"""
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+http_pool = HTTPClientPool()
@@ -1,9 +1,9 @@
 """
 TON API client for Bridge Exchange
 """
-import httpx
 from typing import Dict, Any, Optional
 from config import TONAPI_KEY, TONAPI_BASE_URL, TEST_MODE
+from .http import http_pool
 
 class TONClient:
     def __init__(self):
@@ -33,9 +33,8 @@ class TONClient:
         url = f"{self.base_url}/v2/accounts/{address}"
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
     
     async def get_jetton_balances(self, address: str) -> Dict[str, Any]:
         """Get jetton balances for an account"""
@@ -67,9 +66,8 @@ class TONClient:
         url = f"{self.base_url}/v2/accounts/{address}/jettons"
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
     
     async def mint_nft(
         self, 
@@ -94,9 +92,8 @@ class TONClient:
             "metadata": metadata
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).post(url, json=data, headers=headers)
+        return response.json()
     
     async def get_nft_info(self, token_id: str) -> Dict[str, Any]:
         """Get NFT information"""
@@ -132,9 +129,8 @@ class TONClient:
         url = f"{self.base_url}/v2/nfts/{token_id}"
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
     
     async def transfer_nft(
         self, 
@@ -161,9 +157,8 @@ class TONClient:
             "to_address": to_address
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=data, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).post(url, json=data, headers=headers)
+        return response.json()
     
     async def get_rates(self) -> Dict[str, Any]:
         """Get TON rates"""
@@ -184,6 +179,5 @@ class TONClient:
         url = f"{self.base_url}/v2/rates"
         headers = self._get_headers()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            return response.json()
+        response = await http_pool.get(url).get(url, headers=headers)
+        return response.json()
@@ -2,109 +2,121 @@
 Background tasks for Bridge Exchange
 """
 import asyncio
+from functools import partial
+from typing import Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_
 
 from database import AsyncSessionLocal
 from models.invoice import Invoice, InvoiceStatus
-from models.transaction import Transaction, TransactionStatus
-from models.stake import Stake
+from models.transaction import Transaction, TransactionType, TransactionStatus
 from services.cryptopay import CryptoPayClient
 from services.bybit import BybitClient
 from services.gecko import GeckoClient
-from config import INVOICE_POLLING_INTERVAL, PRICE_UPDATE_INTERVAL, RECONCILE_INTERVAL
+from core.prices import gecko_quotes, price_store
+from core.deposits import settle_paid_invoices
+from core.ledger import Journal, EXTERNAL_ACCOUNT, FEES_ACCOUNT, merge_hot_accounts
+from core.stats import compact_stats
+from core.staking import advance_all_pools
+from core.scheduler import Scheduler
+from core.leases import LeaseManager
+from config import (
+    INVOICE_POLLING_INTERVAL, PRICE_UPDATE_INTERVAL, RECONCILE_INTERVAL, GECKO_COIN_IDS,
+    INVOICE_POLL_BATCH_SIZE, INVOICE_POLL_CONCURRENCY, STAKING_REWARD_INTERVAL,
+    API_MONITOR_INTERVAL, BACKGROUND_JOB_TIMEOUT, BACKGROUND_JOB_JITTER, INVOICE_POLL_SHARDS,
+    HOT_ACCOUNT_MERGE_INTERVAL, STAT_COMPACTION_INTERVAL
+)
 
 cryptopay = CryptoPayClient()
 bybit = BybitClient()
 gecko = GeckoClient()
 
-async def poll_invoices():
-    """Poll pending invoices and update status"""
+async def poll_invoices(shard: int = 0, shards: int = 1):
+    """Poll pending invoices in batches and settle newly paid ones"""
     async with AsyncSessionLocal() as db:
         try:
-            # Get pending invoices
-            result = await db.execute(
-                select(Invoice).where(Invoice.status == InvoiceStatus.PENDING)
+            # Get pending invoices in this shard
+            query = select(Invoice.id, Invoice.provider_invoice_id).where(
+                Invoice.status == InvoiceStatus.PENDING
             )
-            invoices = result.scalars().all()
+            if shards > 1:
+                query = query.where(Invoice.id % shards == shard)
+            result = await db.execute(query)
+            pending = {str(provider_id): invoice_id for invoice_id, provider_id in result.all()}
+            if not pending:
+                return
             
-            for invoice in invoices:
-                try:
-                    # Check invoice status with CryptoPay
-                    invoice_data = await cryptopay.get_invoice(invoice.provider_invoice_id)
-                    
-                    if invoice_data.get("ok") and invoice_data["result"]["status"] == "paid":
-                        # Update invoice status
-                        invoice.status = InvoiceStatus.PAID
-                        await db.commit()
-                        
-                        # Credit user balance
-                        from backend.routers.wallet import update_balance
-                        await update_balance(db, invoice.user_id, invoice.asset, invoice.amount)
-                        
-                        # Create transaction record
-                        transaction = Transaction(
-                            user_id=invoice.user_id,
-                            type=TransactionType.DEPOSIT,
-                            amount=invoice.amount,
-                            asset=invoice.asset,
-                            status=TransactionStatus.COMPLETED,
-                            meta={"invoice_id": invoice.id}
-                        )
-                        db.add(transaction)
-                        await db.commit()
-                        
-                except Exception as e:
-                    print(f"Error processing invoice {invoice.id}: {e}")
+            provider_ids = list(pending)
+            batches = [
+                provider_ids[i:i + INVOICE_POLL_BATCH_SIZE]
+                for i in range(0, len(provider_ids), INVOICE_POLL_BATCH_SIZE)
+            ]
+            semaphore = asyncio.Semaphore(INVOICE_POLL_CONCURRENCY)
+            
+            async def fetch(batch):
+                async with semaphore:
+                    return await cryptopay.get_invoices(batch)
+            
+            responses = await asyncio.gather(
+                *[fetch(batch) for batch in batches],
+                return_exceptions=True
+            )
+            
+            paid = []
+            expired = []
+            for batch, response in zip(batches, responses):
+                if isinstance(response, Exception) or not response.get("ok"):
+                    print(f"Error polling {len(batch)} invoices: {response}")
                     continue
+                for item in response["result"]["items"]:
+                    invoice_id = pending.get(str(item.get("invoice_id")))
+                    if invoice_id is None:
+                        continue
+                    if item.get("status") == "paid":
+                        paid.append(invoice_id)
+                    elif item.get("status") == "expired":
+                        expired.append(invoice_id)
+            
+            # Settle every newly paid invoice in one transaction
+            await settle_paid_invoices(db, paid)
+            if expired:
+                await db.execute(
+                    update(Invoice)
+                    .where(Invoice.id.in_(expired), Invoice.status == InvoiceStatus.PENDING)
+                    .values(status=InvoiceStatus.EXPIRED)
+                )
+            await db.commit()
                     
         except Exception as e:
+            await db.rollback()
             print(f"Error in poll_invoices: {e}")
 
 async def update_prices():
     """Update cryptocurrency prices"""
     try:
-        # Get prices from CoinGecko
-        prices = await gecko.get_price(
-            ids=["bitcoin", "ethereum", "tether", "binancecoin", "cardano"],
+        # Keep the shared price cache warm so API requests never wait on CoinGecko
+        prices = await gecko.refresh_prices(
+            ids=list(GECKO_COIN_IDS.values()),
             vs_currencies=["usd"]
         )
         
-        # Store prices in cache or database
-        # This is a simplified version - in production, you'd store in Redis or database
-        print(f"Updated prices: {prices}")
+        # Persist last values for routers and portfolio valuation
+        async with AsyncSessionLocal() as db:
+            await price_store.update(db, gecko_quotes(prices, GECKO_COIN_IDS))
+            await db.commit()
         
     except Exception as e:
         print(f"Error updating prices: {e}")
 
 async def calculate_staking_rewards():
-    """Calculate and distribute staking rewards"""
+    """Checkpoint staking reward indexes; stakes are paid on claim"""
     async with AsyncSessionLocal() as db:
         try:
-            # Get active stakes
-            result = await db.execute(
-                select(Stake).where(Stake.is_active == True)
-            )
-            stakes = result.scalars().all()
-            
-            for stake in stakes:
-                # Calculate rewards
-                days_staked = (datetime.utcnow() - stake.since).days
-                total_rewards = stake.amount * stake.apr / Decimal("365") * days_staked
-                unclaimed_rewards = total_rewards - stake.rewards_claimed
-                
-                if unclaimed_rewards > 0:
-                    # Update stake with new rewards
-                    stake.rewards_claimed = total_rewards
-                    await db.commit()
-                    
-                    # Credit rewards to user balance
-                    from backend.routers.wallet import update_balance
-                    await update_balance(db, stake.user_id, stake.asset, unclaimed_rewards)
-                    
+            await advance_all_pools(db)
+            await db.commit()
         except Exception as e:
+            await db.rollback()
             print(f"Error calculating staking rewards: {e}")
 
 async def reconcile_transactions():
@@ -122,22 +134,52 @@ async def reconcile_transactions():
             )
             withdrawals = result.scalars().all()
             
+            # Completed withdrawals leave the reserved funds in one journal
+            journal = Journal("withdraw")
             for withdrawal in withdrawals:
-                try:
-                    # Check if withdrawal was processed externally
-                    # This is a simplified version - in production, you'd check blockchain
-                    
-                    # For now, just mark as completed after some time
-                    if datetime.utcnow() - withdrawal.created_at > timedelta(hours=1):
-                        withdrawal.status = TransactionStatus.COMPLETED
-                        await db.commit()
-                        
-                except Exception as e:
-                    print(f"Error reconciling withdrawal {withdrawal.id}: {e}")
+                # Check if withdrawal was processed externally
+                # This is a simplified version - in production, you'd check blockchain
+                
+                # For now, just mark as completed after some time
+                if datetime.utcnow() - withdrawal.created_at > timedelta(hours=1):
+                    fee = withdrawal.fee or Decimal("0")
+                    total = withdrawal.amount + fee
+                    journal.adjust(withdrawal.user_id, withdrawal.asset, amount=-total, reserved=-total)
+                    journal.adjust_system(EXTERNAL_ACCOUNT, withdrawal.asset, withdrawal.amount)
+                    journal.adjust_system(FEES_ACCOUNT, withdrawal.asset, fee)
+                    withdrawal.status = TransactionStatus.COMPLETED
+            
+            await journal.apply(db)
+            await db.commit()
                     
         except Exception as e:
+            await db.rollback()
             print(f"Error in reconcile_transactions: {e}")
 
+async def merge_hot_account_shards():
+    """Fold hot system account shards back into one row"""
+    async with AsyncSessionLocal() as db:
+        try:
+            merged = await merge_hot_accounts(db)
+            await db.commit()
+            if merged:
+                print(f"Merged {merged} hot account shards")
+        except Exception as e:
+            await db.rollback()
+            print(f"Error merging hot account shards: {e}")
+
+async def compact_stat_counters():
+    """Fold admin dashboard counter shards back into one row"""
+    async with AsyncSessionLocal() as db:
+        try:
+            compacted = await compact_stats(db)
+            await db.commit()
+            if compacted:
+                print(f"Compacted {compacted} stat counter shards")
+        except Exception as e:
+            await db.rollback()
+            print(f"Error compacting stat counters: {e}")
+
 async def monitor_external_apis():
     """Monitor external API health"""
     try:
@@ -157,7 +199,7 @@ async def monitor_external_apis():
         
         # Check CoinGecko
         try:
-            await gecko.get_price(["bitcoin"], ["usd"])
+            await gecko.fetch_price(["bitcoin"], ["usd"])
             print("CoinGecko API: OK")
         except Exception as e:
             print(f"CoinGecko API: ERROR - {e}")
@@ -165,26 +207,34 @@ async def monitor_external_apis():
     except Exception as e:
         print(f"Error monitoring APIs: {e}")
 
+def create_scheduler(leases: Optional[LeaseManager] = None) -> Scheduler:
+    """Register every background job on its own interval"""
+    scheduler = Scheduler(leases)
+    # Each invoice shard is a separate leased job, so shards spread across nodes
+    invoice_jobs = [
+        (f"poll_invoices:{shard}", partial(poll_invoices, shard, INVOICE_POLL_SHARDS), INVOICE_POLLING_INTERVAL)
+        for shard in range(INVOICE_POLL_SHARDS)
+    ]
+    for name, func, interval in invoice_jobs + [
+        ("update_prices", update_prices, PRICE_UPDATE_INTERVAL),
+        ("calculate_staking_rewards", calculate_staking_rewards, STAKING_REWARD_INTERVAL),
+        ("reconcile_transactions", reconcile_transactions, RECONCILE_INTERVAL),
+        ("merge_hot_account_shards", merge_hot_account_shards, HOT_ACCOUNT_MERGE_INTERVAL),
+        ("compact_stat_counters", compact_stat_counters, STAT_COMPACTION_INTERVAL),
+        ("monitor_external_apis", monitor_external_apis, API_MONITOR_INTERVAL)
+    ]:
+        scheduler.add_job(
+            name,
+            func,
+            interval,
+            timeout=BACKGROUND_JOB_TIMEOUT,
+            jitter=BACKGROUND_JOB_JITTER
+        )
+    return scheduler
+
 async def run_background_tasks():
-    """Run all background tasks"""
-    while True:
-        try:
-            # Run tasks in parallel
-            await asyncio.gather(
-                poll_invoices(),
-                update_prices(),
-                calculate_staking_rewards(),
-                reconcile_transactions(),
-                monitor_external_apis(),
-                return_exceptions=True
-            )
-            
-            # Wait before next iteration
-            await asyncio.sleep(60)  # Run every minute
-            
-        except Exception as e:
-            print(f"Error in background tasks: {e}")
-            await asyncio.sleep(60)
+    """Run all background tasks, each job on exactly one node holding its lease"""
+    await create_scheduler(LeaseManager(AsyncSessionLocal)).run()
 
 if __name__ == "__main__":
     asyncio.run(run_background_tasks())
@@ -0,0 +1,22 @@
+"""
+Shared fixtures for the backend tests
+"""
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from database import Base
+import models  # Registers every table on Base.metadata
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    """A fresh SQLite database with every table"""
+    # A file rather than :memory:, so concurrent sessions get their own connections
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    """Sessions on the test database"""
+    return async_sessionmaker(engine, expire_on_commit=False)
@@ -0,0 +1,99 @@
+"""
+Tests for the incrementally maintained admin statistics
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from database import Base
+from models.balance import Balance
+from models.ledger_entry import LedgerEntry
+from models.system_balance import SystemBalance
+from models.stat_counter import StatCounter
+from models.ticket import Ticket, TicketStatus
+from models.transaction import Transaction, TransactionType, TransactionStatus
+from models.user import User
+from core.ledger import Journal, EXTERNAL_ACCOUNT
+from core.stats import (
+    BALANCES, OPEN_TICKETS, PENDING_WITHDRAWALS, USERS_ACTIVE, USERS_TOTAL, VOLUME,
+    compact_stats, read_stats, rebuild_stats
+)
+
+@pytest.mark.asyncio
+async def test_write_paths_keep_counters_current(session_factory):
+    """Test inserts, status changes and journals move counters as a full recount would"""
+    async with session_factory() as db:
+        alice = User(telegram_id=1, username="alice")
+        db.add_all([alice, User(telegram_id=2, username="bob"), User(telegram_id=3, username="eve", is_active=False)])
+        ticket = Ticket(user_id=1, subject="help", category="general")
+        withdrawal = Transaction(user_id=1, type=TransactionType.WITHDRAW, amount=Decimal("40"), asset="USDT")
+        db.add_all([ticket, withdrawal])
+        
+        deposit = Journal("deposit")
+        deposit.transfer(EXTERNAL_ACCOUNT, 1, "USDT", Decimal("100"))
+        await deposit.apply(db)
+        await db.commit()
+        
+        stats = await read_stats(db)
+        assert stats[USERS_TOTAL] == 3
+        assert stats[USERS_ACTIVE] == 2
+        assert stats[OPEN_TICKETS] == 1
+        assert stats[PENDING_WITHDRAWALS] == 1
+        assert stats[(BALANCES, "USDT")] == Decimal("100")
+        
+        alice.is_active = False
+        ticket.status = TicketStatus.CLOSED
+        withdrawal.status = TransactionStatus.COMPLETED
+        await db.commit()
+        
+        # Rolled-back writes leave counters untouched
+        db.add(User(telegram_id=4, username="mallory"))
+        await db.flush()
+        await db.rollback()
+        
+        stats = await read_stats(db)
+        assert stats[USERS_TOTAL] == 3
+        assert stats[USERS_ACTIVE] == 1
+        assert stats[OPEN_TICKETS] == 0
+        assert stats[PENDING_WITHDRAWALS] == 0
+        assert stats[(VOLUME, "USDT")] == Decimal("40")
+        
+        recounted = await rebuild_stats(db)
+        await db.commit()
+        assert {counter: value for counter, value in stats.items() if value} == \
+            {counter: value for counter, value in recounted.items() if value}
+
+@pytest.mark.asyncio
+async def test_compaction_folds_shards_without_changing_totals(session_factory):
+    """Test compaction leaves one row per counter and the same totals"""
+    async with session_factory() as db:
+        for i in range(20):
+            db.add(User(telegram_id=100 + i, username=f"user{i}"))
+            await db.commit()
+        before = await read_stats(db)
+        
+        assert await compact_stats(db) > 0
+        await db.commit()
+        
+        rows = await db.scalar(select(func.count()).select_from(StatCounter))
+        assert rows == len(before)
+        assert await read_stats(db) == before
+
+@pytest.mark.asyncio
+async def test_databases_without_counters_are_skipped(tmp_path):
+    """Test sessions on a database without stat_counters still flush"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/plain.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[
+            User.__table__, Balance.__table__, LedgerEntry.__table__, SystemBalance.__table__
+        ])
+    
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        db.add(User(telegram_id=1, username="alice"))
+        deposit = Journal("deposit")
+        deposit.transfer(EXTERNAL_ACCOUNT, 1, "USDT", Decimal("100"))
+        await deposit.apply(db)
+        await db.commit()
+        
+        assert await db.scalar(select(func.count(User.id))) == 1
+    await engine.dispose()
@@ -0,0 +1,81 @@
+"""
+Tests for the write-through balance cache
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy import event
+from core.balances import BalanceCache, BalanceSnapshot
+from core.ledger import Journal, InsufficientBalance, EXTERNAL_ACCOUNT
+import core.balances
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    monkeypatch.setattr(core.balances, "balance_cache", BalanceCache(ttl=60))
+
+def count_selects(engine):
+    selects = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: selects.append(statement)
+        if statement.lstrip().upper().startswith("SELECT") else None
+    )
+    return selects
+
+async def deposit(db, user_id, asset, amount):
+    journal = Journal("deposit")
+    journal.transfer(EXTERNAL_ACCOUNT, user_id, asset, Decimal(amount))
+    await journal.apply(db)
+
+@pytest.mark.asyncio
+async def test_cache_is_written_through_on_commit(engine, session_factory):
+    """Test reads hit the cache and committed writes update it without a query"""
+    cache = core.balances.balance_cache
+    selects = count_selects(engine)
+    
+    async with session_factory() as db:
+        await deposit(db, 1, "USDT", "100")
+        await deposit(db, 1, "TON", "5")
+        await db.commit()
+        
+        balances = await cache.get_balances(db, 1)
+        assert {asset: b.amount for asset, b in balances.items()} == {
+            "USDT": Decimal("100"), "TON": Decimal("5")
+        }
+        assert len(selects) == 1
+        
+        await deposit(db, 1, "USDT", "25")
+        # Not visible until the transaction commits
+        assert (await cache.get(db, 1, "USDT")).amount == Decimal("100")
+        await db.commit()
+        
+        usdt = await cache.get(db, 1, "USDT")
+        assert (usdt.amount, usdt.version) == (Decimal("125"), 2)
+        assert (await cache.get(db, 1, "BTC")).available == Decimal("0")
+        assert len(selects) == 1
+        
+        # Rolled back writes drop the user so the next read reloads
+        await deposit(db, 1, "USDT", "1000")
+        await db.rollback()
+        assert (await cache.get(db, 1, "USDT")).amount == Decimal("125")
+        assert len(selects) == 2
+
+def test_older_versions_are_ignored():
+    """Test a write committed out of order doesn't overwrite a newer balance"""
+    cache = BalanceCache(ttl=60)
+    cache.users[1] = core.balances.UserBalances({}, float("inf"))
+    newer = BalanceSnapshot(1, "USDT", Decimal("10"), Decimal("0"), Decimal("10"), version=3)
+    older = BalanceSnapshot(1, "USDT", Decimal("7"), Decimal("0"), Decimal("7"), version=2)
+    cache.put_many([newer, older])
+    assert cache.users[1].balances["USDT"] is newer
+
+@pytest.mark.asyncio
+async def test_debits_are_checked_on_written_rows(session_factory):
+    """Test a stale pre-check can't take available below zero"""
+    async with session_factory() as db:
+        await deposit(db, 1, "USDT", "10")
+        await db.commit()
+        
+        journal = Journal("withdraw")
+        journal.adjust(1, "USDT", reserved=Decimal("11"))
+        with pytest.raises(InsufficientBalance):
+            await journal.apply(db)
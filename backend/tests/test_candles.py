@@ -0,0 +1,82 @@
+"""
+Tests for OHLCV candle building and backfill
+"""
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import select
+from models.candle import Candle
+from models.order import Trade
+from core.candles import CandleBuilder, bucket_start, get_candles
+import core.candles
+
+def test_bucket_start_aligns_to_interval():
+    """Test buckets start on UTC interval boundaries"""
+    at = datetime(2026, 10, 17, 13, 47, 31, 500000)
+    assert bucket_start(at, "1m") == datetime(2026, 10, 17, 13, 47)
+    assert bucket_start(at, "5m") == datetime(2026, 10, 17, 13, 45)
+    assert bucket_start(at, "1h") == datetime(2026, 10, 17, 13, 0)
+    assert bucket_start(at, "1d") == datetime(2026, 10, 17)
+
+def test_trades_roll_bars_per_interval():
+    """Test OHLCV accumulates within a bucket and a new bucket opens a new bar"""
+    builder = CandleBuilder()
+    for second, price, amount in [(0, "100", "1"), (20, "105", "2"), (40, "98", "1"), (70, "101", "3")]:
+        builder.add_trade("BTC/USDT", Decimal(price), Decimal(amount), datetime(2026, 1, 1) + timedelta(seconds=second))
+    
+    first, second = builder.bars("BTC/USDT", "1m")
+    assert (first.open, first.high, first.low, first.close, first.volume, first.trades) == \
+        (Decimal("100"), Decimal("105"), Decimal("98"), Decimal("98"), Decimal("4"), 3)
+    assert (second.open, second.close, second.trades) == (Decimal("101"), Decimal("101"), 1)
+    
+    (hour,) = builder.bars("BTC/USDT", "1h")
+    assert (hour.open, hour.high, hour.low, hour.close, hour.volume, hour.trades) == \
+        (Decimal("100"), Decimal("105"), Decimal("98"), Decimal("101"), Decimal("7"), 4)
+
+def trade(i: int, price: str, amount: str, at: datetime) -> Trade:
+    return Trade(
+        buy_order_id=i, sell_order_id=i, pair="BTC/USDT", price=Decimal(price), amount=Decimal(amount),
+        fee=Decimal("0"), buyer_id=1, seller_id=2, created_at=at
+    )
+
+@pytest.mark.asyncio
+async def test_backfill_matches_live_building(session_factory, monkeypatch):
+    """Test rebuilding from trades gives the candles live building flushed"""
+    trades = [
+        trade(1, "100", "1", datetime(2026, 1, 1, 23, 58, 10)),
+        trade(2, "110", "2", datetime(2026, 1, 1, 23, 59, 50)),
+        trade(3, "90", "1", datetime(2026, 1, 2, 0, 0, 0)),
+        trade(4, "95", "1", datetime(2026, 1, 2, 0, 3, 5))
+    ]
+    live = CandleBuilder()
+    monkeypatch.setattr(core.candles, "candle_builder", live)
+    async with session_factory() as db:
+        db.add_all(trades)
+        await db.commit()
+        live.add_trades(trades)
+        
+        # Unflushed bars are served from memory
+        candles = await get_candles(db, "BTC/USDT", "1d", 10)
+        assert [(c["open_time"], c["close"], c["trades"]) for c in candles] == [
+            (datetime(2026, 1, 1), Decimal("110"), 2),
+            (datetime(2026, 1, 2), Decimal("95"), 2)
+        ]
+        
+        await live.flush(db)
+        result = await db.execute(select(Candle).order_by(Candle.interval, Candle.open_time))
+        flushed = [(c.interval, c.open_time, c.open, c.high, c.low, c.close, c.volume, c.trades) for c in result.scalars()]
+        # 1m: 4 bars, 5m, 1h and 1d: 2 each
+        assert len(flushed) == 10
+        
+        # Lose recent minute bars; a restart replays only trades from the last stored day on
+        await db.execute(
+            Candle.__table__.delete().where(Candle.interval == "1m", Candle.open_time >= datetime(2026, 1, 2))
+        )
+        await db.commit()
+        restarted = CandleBuilder()
+        assert await restarted.backfill(db) == 2
+        
+        db.expire_all()
+        result = await db.execute(select(Candle).order_by(Candle.interval, Candle.open_time))
+        assert [(c.interval, c.open_time, c.open, c.high, c.low, c.close, c.volume, c.trades) for c in result.scalars()] == flushed
+        assert restarted.current[("BTC/USDT", "1h")].open_time == datetime(2026, 1, 2)
@@ -0,0 +1,57 @@
+"""
+Tests for streaming trade and transaction exports
+"""
+import csv
+import io
+import json
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from decimal import Decimal
+from models.order import Trade
+from models.transaction import Transaction, TransactionType, TransactionStatus
+from core.exports import export_rows, trade_export_query, transaction_export_query
+
+@pytest_asyncio.fixture
+async def engine(engine, session_factory):
+    async with session_factory() as db:
+        for i, (buyer, seller) in enumerate([(1, 2), (2, 3), (3, 1), (1, 4), (4, 1)]):
+            db.add(Trade(
+                buy_order_id=i, sell_order_id=i, pair="BTC/USDT", price=Decimal("50000.5"),
+                amount=Decimal("0.1"), fee=Decimal("0.0001"), buyer_id=buyer, seller_id=seller,
+                created_at=datetime(2026, 1, 1, 0, 0, i)
+            ))
+        db.add(Transaction(
+            user_id=1, type=TransactionType.DEPOSIT, status=TransactionStatus.COMPLETED,
+            amount=Decimal("100"), asset="USDT", meta={"note": "ignored"}
+        ))
+        await db.commit()
+    return engine
+
+async def collect(query, fmt, engine):
+    return [chunk async for chunk in export_rows(query, fmt, engine, batch_size=2)]
+
+@pytest.mark.asyncio
+async def test_csv_export_streams_in_batches(engine):
+    """Test CSV exports write a header then one chunk per fetched batch"""
+    chunks = await collect(trade_export_query(user_id=1), "csv", engine)
+    
+    # Header, then 4 matching trades in batches of 2
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert [row["id"] for row in rows] == ["1", "3", "4", "5"]
+    assert rows[0]["price"] == "50000.50000000"
+    assert rows[0]["created_at"] == "2026-01-01T00:00:00"
+
+@pytest.mark.asyncio
+async def test_ndjson_export_encodes_one_object_per_line(engine):
+    """Test NDJSON exports serialise decimals, dates and enums losslessly"""
+    chunks = await collect(transaction_export_query(user_id=1), "ndjson", engine)
+    
+    lines = "".join(chunks).splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["type"] == "deposit"
+    assert record["status"] == "completed"
+    assert record["amount"] == "100.00000000"
+    assert "meta" not in record
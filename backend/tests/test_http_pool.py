@@ -0,0 +1,20 @@
+"""
+Tests for the shared HTTP connection pool
+"""
+import pytest
+from services.http import HTTPClientPool
+
+@pytest.mark.asyncio
+async def test_clients_are_shared_per_host():
+    """Test one client is reused per origin and closed on shutdown"""
+    pool = HTTPClientPool()
+    await pool.start(["https://api.coingecko.com/api/v3"])
+    
+    client = pool.get("https://api.coingecko.com/api/v3/simple/price")
+    assert pool.get("https://api.coingecko.com/api/v3/coins/list") is client
+    assert pool.get("https://tonapi.io/v2/rates") is not client
+    assert len(pool.clients) == 2
+    
+    await pool.close()
+    assert client.is_closed
+    assert pool.clients == {}
@@ -0,0 +1,73 @@
+"""
+Tests for batched invoice polling and deposit settlement
+"""
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from sqlalchemy import select
+from models.balance import Balance
+from models.invoice import Invoice, InvoiceStatus
+from models.transaction import Transaction
+import tasks
+
+class FakeCryptoPay:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+    
+    async def get_invoices(self, invoice_ids):
+        self.calls.append(list(invoice_ids))
+        return {
+            "ok": True,
+            "result": {
+                "items": [
+                    {"invoice_id": int(i), "status": self.statuses.get(i, "active")}
+                    for i in invoice_ids
+                ]
+            }
+        }
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(tasks, "AsyncSessionLocal", session_factory)
+    return session_factory
+
+@pytest.mark.asyncio
+async def test_poll_invoices_batches_and_settles(session_factory, monkeypatch):
+    """Test invoices are polled in batches and paid ones credited once"""
+    async with session_factory() as db:
+        for i in range(1, 8):
+            db.add(Invoice(
+                user_id=1 if i < 4 else 2,
+                provider_invoice_id=str(i),
+                asset="USDT",
+                amount=Decimal("10")
+            ))
+        await db.commit()
+    
+    fake = FakeCryptoPay({"1": "paid", "2": "paid", "5": "paid", "6": "expired"})
+    monkeypatch.setattr(tasks, "cryptopay", fake)
+    monkeypatch.setattr(tasks, "INVOICE_POLL_BATCH_SIZE", 3)
+    
+    await tasks.poll_invoices()
+    await tasks.poll_invoices()
+    
+    # 7 pending -> 3 batches, then the 3 still pending -> 1 batch
+    assert [len(batch) for batch in fake.calls] == [3, 3, 1, 3]
+    
+    async with session_factory() as db:
+        balances = {
+            b.user_id: b.amount
+            for b in (await db.execute(select(Balance))).scalars().all()
+        }
+        statuses = {
+            i.provider_invoice_id: i.status
+            for i in (await db.execute(select(Invoice))).scalars().all()
+        }
+        deposits = (await db.execute(select(Transaction))).scalars().all()
+    
+    assert balances == {1: Decimal("20"), 2: Decimal("10")}
+    assert statuses["1"] == InvoiceStatus.PAID
+    assert statuses["6"] == InvoiceStatus.EXPIRED
+    assert statuses["7"] == InvoiceStatus.PENDING
+    assert len(deposits) == 3
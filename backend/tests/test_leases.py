@@ -0,0 +1,93 @@
+"""
+Tests for database-backed job leases
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from models.job_lease import JobLease
+from core.leases import LeaseManager
+
+JOBS = ["poll_invoices:0", "poll_invoices:1", "update_prices", "reconcile_transactions"]
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_until_it_expires(session_factory):
+    """Test only one node holds a lease and another takes over after expiry"""
+    a = LeaseManager(session_factory, node_id="a", ttl=0.2)
+    b = LeaseManager(session_factory, node_id="b", ttl=0.2)
+    
+    assert await a.acquire("update_prices")
+    assert not await b.acquire("update_prices")
+    assert await a.acquire("update_prices")  # renewing our own lease
+    
+    await asyncio.sleep(0.3)
+    assert not a.holds("update_prices")
+    assert await b.acquire("update_prices")
+    
+    async with session_factory() as db:
+        lease = await db.get(JobLease, "update_prices")
+    assert lease.holder == "b"
+    assert lease.generation == 2
+
+@pytest.mark.asyncio
+async def test_jobs_are_sharded_across_live_nodes(session_factory):
+    """Test each node takes its fair share and a joining node gets leases back"""
+    a = LeaseManager(session_factory, node_id="a")
+    b = LeaseManager(session_factory, node_id="b")
+    a.jobs.update(JOBS)
+    b.jobs.update(JOBS)
+    
+    # Alone, node a takes every job
+    await a.renew()
+    assert [await a.ensure(job) for job in JOBS] == [True] * 4
+    
+    # Node b joins; a sees two live nodes and gives half back
+    await b.renew()
+    assert [await b.ensure(job) for job in JOBS] == [False] * 4
+    await a.renew()
+    await a.rebalance(busy=["update_prices"])
+    assert len(a.held_jobs()) == 2
+    assert "update_prices" in a.held_jobs()
+    
+    await b.renew()
+    taken = [job for job in JOBS if await b.ensure(job)]
+    assert set(taken) == set(JOBS) - a.held_jobs()
+    
+    async with session_factory() as db:
+        holders = {
+            lease.name: lease.holder
+            for lease in (await db.execute(select(JobLease))).scalars().all()
+        }
+    assert sorted(holders[job] for job in JOBS) == ["a", "a", "b", "b"]
+    
+    await a.release_all()
+    async with session_factory() as db:
+        remaining = (await db.execute(select(JobLease.holder))).scalars().all()
+    assert "a" not in remaining
+
+@pytest.mark.asyncio
+async def test_renew_keeps_leases_taken_meanwhile(session_factory):
+    """Test a renew in flight doesn't drop a lease acquired while it awaited"""
+    a = LeaseManager(session_factory, node_id="a")
+    assert await a.acquire("update_prices")
+    taken_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    
+    def interleaving_factory():
+        db = session_factory()
+        execute = db.execute
+        
+        async def interleaved(statement, *args, **kwargs):
+            # A job's ensure() takes another lease while renew awaits its UPDATE
+            if getattr(statement, "is_update", False):
+                a.held["poll_invoices:0"] = taken_at
+            return await execute(statement, *args, **kwargs)
+        
+        db.execute = interleaved
+        return db
+    
+    a.session_factory = interleaving_factory
+    renewed = await a.renew()
+    
+    assert "update_prices" in renewed
+    assert a.holds("update_prices")
+    assert a.held["poll_invoices:0"] == taken_at
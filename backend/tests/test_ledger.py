@@ -0,0 +1,90 @@
+"""
+Tests for the double-entry ledger and its balances projection
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy import select, update, func
+from models.balance import Balance
+from models.ledger_entry import LedgerEntry
+from models.system_balance import SystemBalance
+from core.ledger import (
+    Journal, UnbalancedJournal, EXTERNAL_ACCOUNT, FEES_ACCOUNT,
+    merge_hot_accounts, rebuild_balances, system_balances, verify_balances
+)
+
+def test_journal_must_balance():
+    """Test amounts must net to zero per asset while reservations need not"""
+    journal = Journal("transfer")
+    journal.adjust(1, "USDT", amount=Decimal("-5"))
+    with pytest.raises(UnbalancedJournal):
+        journal.check_balanced()
+    
+    journal.adjust(2, "USDT", amount=Decimal("5"))
+    journal.adjust(1, "TON", reserved=Decimal("3"))
+    journal.check_balanced()
+
+@pytest.mark.asyncio
+async def test_balances_are_a_rebuildable_projection(session_factory):
+    """Test journals write entries plus balances, and balances rebuild from entries"""
+    async with session_factory() as db:
+        deposit = Journal("deposit")
+        deposit.transfer(EXTERNAL_ACCOUNT, 1, "USDT", Decimal("100"))
+        deposit.transfer(EXTERNAL_ACCOUNT, 2, "USDT", Decimal("50"))
+        await deposit.apply(db)
+        
+        transfer = Journal("transfer")
+        transfer.adjust(1, "USDT", amount=Decimal("-30"), reserved=Decimal("10"))
+        transfer.adjust(2, "USDT", amount=Decimal("30"))
+        balances = await transfer.apply(db)
+        await db.commit()
+        
+        by_user = {b.user_id: b for b in balances}
+        assert by_user[1].amount == Decimal("70")
+        assert by_user[1].available == Decimal("60")
+        assert by_user[2].amount == Decimal("80")
+        
+        # Two user entries per journal plus one aggregated external entry for the deposit
+        assert await db.scalar(select(func.count()).select_from(LedgerEntry)) == 5
+        assert await verify_balances(db) == []
+        
+        # Drift in the projection is reported and repaired from the ledger
+        await db.execute(
+            update(Balance).where(Balance.user_id == 2).values(amount=Decimal("999"))
+        )
+        mismatches = await verify_balances(db)
+        assert [(m["user_id"], m["ledger_amount"]) for m in mismatches] == [(2, Decimal("80"))]
+        
+        assert await rebuild_balances(db) == 2
+        await db.commit()
+        assert await verify_balances(db) == []
+        balance = await db.scalar(select(Balance).where(Balance.user_id == 1))
+        assert (balance.amount, balance.reserved, balance.available) == (
+            Decimal("70"), Decimal("10"), Decimal("60")
+        )
+
+@pytest.mark.asyncio
+async def test_hot_account_shards_merge(session_factory):
+    """Test fee credits spread over shard rows, sum at read time and fold into one row"""
+    async with session_factory() as db:
+        deposit = Journal("deposit")
+        deposit.transfer(EXTERNAL_ACCOUNT, 1, "BTC", Decimal("1"))
+        await deposit.apply(db)
+        
+        for _ in range(40):
+            journal = Journal("trade")
+            journal.adjust(1, "BTC", amount=Decimal("-0.001"))
+            journal.adjust_system(FEES_ACCOUNT, "BTC", Decimal("0.001"))
+            await journal.apply(db)
+        await db.commit()
+        
+        shards = await db.scalar(select(func.count()).select_from(SystemBalance))
+        assert shards > 1
+        assert (await system_balances(db))[(FEES_ACCOUNT, "BTC")] == Decimal("0.04")
+        
+        assert await merge_hot_accounts(db) > 0
+        await db.commit()
+        rows = (await db.execute(select(SystemBalance))).scalars().all()
+        assert sorted((row.account, row.shard, row.amount) for row in rows) == [
+            (EXTERNAL_ACCOUNT, 0, Decimal("-1")), (FEES_ACCOUNT, 0, Decimal("0.04"))
+        ]
+        assert await verify_balances(db) == []
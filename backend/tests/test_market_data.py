@@ -0,0 +1,148 @@
+"""
+Tests for the market data feed and broadcaster
+"""
+import asyncio
+import json
+import pytest
+from decimal import Decimal
+from models.order import Order, OrderSide, OrderType, OrderStatus
+from core.matching import MatchingEngine
+from core.broadcaster import Broadcaster, Subscriber
+from core.market_data import MarketDataFeed
+import core.market_data as market_data
+
+class FakeWebSocket:
+    def __init__(self, block=False):
+        self.sent = []
+        self.closed_with = None
+        self.block = block
+    
+    async def send_text(self, text):
+        if self.block:
+            await asyncio.Event().wait()
+        self.sent.append(text)
+    
+    async def close(self, code=1000):
+        self.closed_with = code
+    
+    def messages(self):
+        # Batched writes arrive as a JSON array
+        out = []
+        for text in self.sent:
+            data = json.loads(text)
+            out.extend(data if isinstance(data, list) else [data])
+        return out
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = MatchingEngine()
+    monkeypatch.setattr(market_data, "matching_engine", engine)
+    return engine
+
+def make_order(order_id, side, price, amount):
+    return Order(
+        id=order_id,
+        user_id=order_id,
+        pair="BTC/USDT",
+        side=side,
+        type=OrderType.LIMIT,
+        price=Decimal(price),
+        amount=Decimal(amount),
+        remaining=Decimal(amount),
+        status=OrderStatus.PENDING
+    )
+
+def test_drain_changes_reports_absolute_sizes(engine):
+    """Test diffs carry current level sizes and chain sequences"""
+    engine.process(make_order(1, OrderSide.SELL, "50000", "0.3"))
+    first = engine.get_book("BTC/USDT").drain_changes()
+    assert first["asks"] == [(Decimal("50000"), Decimal("0.3"))]
+    
+    engine.process(make_order(2, OrderSide.BUY, "50000", "0.3"))
+    second = engine.get_book("BTC/USDT").drain_changes()
+    assert second["prev_sequence"] == first["sequence"]
+    assert second["asks"] == [(Decimal("50000"), Decimal("0"))]
+    assert engine.get_book("BTC/USDT").drain_changes() is None
+
+def test_diffs_follow_the_snapshot_window(engine):
+    """Test a level moving up into the top levels is sent and changes below them are not"""
+    book = engine.get_book("BTC/USDT")
+    book.depth_limit = 2
+    for order_id, price in enumerate(["50000", "50100", "50200"], start=1):
+        engine.process(make_order(order_id, OrderSide.SELL, price, "0.1"))
+    book.mark_published()
+    
+    engine.process(make_order(4, OrderSide.SELL, "50300", "0.1"))
+    assert book.drain_changes() is None
+    
+    engine.process(make_order(5, OrderSide.BUY, "50000", "0.1"))
+    diff = book.drain_changes()
+    assert diff["asks"] == [(Decimal("50000"), Decimal("0")), (Decimal("50200"), Decimal("0.1"))]
+
+@pytest.mark.asyncio
+async def test_subscribe_sends_snapshot_then_diffs(engine):
+    """Test snapshot-on-subscribe followed by depth diffs"""
+    feed = MarketDataFeed(Broadcaster())
+    websocket = FakeWebSocket()
+    subscriber = Subscriber(websocket)
+    subscriber.start()
+    
+    engine.process(make_order(1, OrderSide.SELL, "50000", "0.3"))
+    feed.subscribe(subscriber, "BTC/USDT")
+    engine.get_book("BTC/USDT").mark_published()
+    engine.process(make_order(2, OrderSide.SELL, "50100", "0.1"))
+    feed.publish_book("BTC/USDT")
+    await asyncio.sleep(0.01)
+    
+    messages = websocket.messages()
+    assert messages[0]["type"] == "snapshot"
+    assert messages[1]["type"] == "depth"
+    assert messages[1]["asks"] == [["50100", "0.1"]]
+    feed.broadcaster.disconnect(subscriber)
+
+@pytest.mark.asyncio
+async def test_publish_encodes_once_and_batches():
+    """Test one frame is shared by all subscribers and queued frames coalesce"""
+    broadcaster = Broadcaster()
+    sockets = [FakeWebSocket() for _ in range(3)]
+    subscribers = [Subscriber(ws) for ws in sockets]
+    for subscriber in subscribers:
+        broadcaster.subscribe(subscriber, "market:BTC/USDT")
+    
+    for i in range(5):
+        assert broadcaster.publish("market:BTC/USDT", {"type": "ticker", "n": i}) == 3
+    
+    # Every queue holds the very same string objects
+    frames = [list(s.queue._queue) for s in subscribers]
+    assert all(a is b for a, b in zip(frames[0], frames[1]))
+    
+    for subscriber in subscribers:
+        subscriber.start()
+    await asyncio.sleep(0.01)
+    
+    assert [m["n"] for m in sockets[0].messages()] == [0, 1, 2, 3, 4]
+    stats = broadcaster.stats()
+    assert stats["messages_published"] == 5
+    assert stats["frames_queued"] == 15
+    assert stats["writes"] == 3
+    for subscriber in subscribers:
+        broadcaster.disconnect(subscriber)
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_dropped(engine):
+    """Test a client whose queue fills up is disconnected"""
+    feed = MarketDataFeed(Broadcaster())
+    websocket = FakeWebSocket(block=True)
+    subscriber = Subscriber(websocket, queue_size=2)
+    subscriber.start()
+    feed.subscribe(subscriber, "BTC/USDT")
+    await asyncio.sleep(0)
+    
+    for _ in range(5):
+        feed.publish_ticker("BTC/USDT")
+    await asyncio.sleep(0.01)
+    
+    assert subscriber.closed
+    assert websocket.closed_with == 1013
+    assert not feed.broadcaster.has_subscribers("market:BTC/USDT")
+    assert feed.broadcaster.stats()["dropped_subscribers"] == 1
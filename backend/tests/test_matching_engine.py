@@ -1,10 +1,13 @@
 """
 Tests for matching engine
 """
+import asyncio
 import pytest
 from decimal import Decimal
-from models.order import Order, OrderSide, OrderType, OrderStatus
-from models.trade import Trade
+from models.order import Order, OrderSide, OrderType, OrderStatus, Trade
+from core.matching import MatchingEngine, PairBook, RestingOrder
+from core.sequencer import OrderSequencer
+from core.settlement import Settlement
 
 @pytest.fixture
 def buy_order():
@@ -119,3 +122,186 @@ def test_trade_creation(buy_order, sell_order):
     assert trade.fee == trade_amount * Decimal("0.001")
     assert trade.buyer_id == buy_order.user_id
     assert trade.seller_id == sell_order.user_id
+
+def make_order(order_id, user_id, side, price, amount, pair="BTC/USDT"):
+    return Order(
+        id=order_id,
+        user_id=user_id,
+        pair=pair,
+        side=side,
+        type=OrderType.LIMIT,
+        price=Decimal(price) if price is not None else None,
+        amount=Decimal(amount),
+        remaining=Decimal(amount),
+        status=OrderStatus.PENDING
+    )
+
+def test_engine_price_time_priority():
+    """Test best price first, then FIFO within a level"""
+    engine = MatchingEngine()
+    engine.process(make_order(1, 1, OrderSide.SELL, "50100", "0.1"))
+    engine.process(make_order(2, 2, OrderSide.SELL, "50000", "0.1"))
+    engine.process(make_order(3, 3, OrderSide.SELL, "50000", "0.1"))
+    
+    fills = engine.process(make_order(4, 4, OrderSide.BUY, "50100", "0.25"))
+    
+    assert [f.maker_order_id for f in fills] == [2, 3, 1]
+    assert [f.price for f in fills] == [Decimal("50000"), Decimal("50000"), Decimal("50100")]
+    assert fills[-1].amount == Decimal("0.05")
+    assert fills[-1].maker_remaining == Decimal("0.05")
+    
+    book = engine.get_book("BTC/USDT")
+    assert book.asks.best().price == Decimal("50100")
+    assert 4 not in book.orders
+
+def test_engine_rests_limit_remainder():
+    """Test unfilled limit remainder rests on the book"""
+    engine = MatchingEngine()
+    engine.process(make_order(1, 1, OrderSide.SELL, "50000", "0.1"))
+    
+    fills = engine.process(make_order(2, 2, OrderSide.BUY, "50000", "0.3"))
+    
+    assert len(fills) == 1
+    book = engine.get_book("BTC/USDT")
+    assert book.asks.best() is None
+    assert book.bids.best().price == Decimal("50000")
+    assert book.orders[2].remaining == Decimal("0.2")
+
+def test_engine_no_cross():
+    """Test non-crossing orders both rest"""
+    engine = MatchingEngine()
+    engine.process(make_order(1, 1, OrderSide.SELL, "50000", "0.1"))
+    
+    fills = engine.process(make_order(2, 2, OrderSide.BUY, "45000", "0.1"))
+    
+    assert fills == []
+    book = engine.get_book("BTC/USDT")
+    assert book.bids.best().price == Decimal("45000")
+    assert book.asks.best().price == Decimal("50000")
+
+def test_engine_market_order_does_not_rest():
+    """Test market orders sweep levels and never rest"""
+    engine = MatchingEngine()
+    engine.process(make_order(1, 1, OrderSide.BUY, "49000", "0.1"))
+    engine.process(make_order(2, 2, OrderSide.BUY, "48000", "0.1"))
+    
+    fills = engine.process(make_order(3, 3, OrderSide.SELL, None, "0.5"))
+    
+    assert [f.maker_order_id for f in fills] == [1, 2]
+    book = engine.get_book("BTC/USDT")
+    assert book.bids.best() is None
+    assert book.asks.best() is None
+
+def test_engine_cancel():
+    """Test cancelled orders are skipped and empty levels removed"""
+    engine = MatchingEngine()
+    engine.process(make_order(1, 1, OrderSide.SELL, "50000", "0.1"))
+    engine.process(make_order(2, 2, OrderSide.SELL, "50000", "0.1"))
+    
+    cancelled = engine.cancel("BTC/USDT", 1)
+    assert cancelled.order_id == 1
+    assert engine.cancel("BTC/USDT", 1) is None
+    
+    fills = engine.process(make_order(3, 3, OrderSide.BUY, "50000", "0.1"))
+    assert [f.maker_order_id for f in fills] == [2]
+    assert engine.get_book("BTC/USDT").asks.best() is None
+
+def test_pair_book_levels_sorted():
+    """Test levels iterate best to worst on both sides"""
+    book = PairBook("BTC/USDT")
+    for order_id, price in enumerate(["3", "1", "2"], start=1):
+        book.add(RestingOrder(order_id, 1, OrderSide.BUY, Decimal(price), Decimal("1"), Decimal("1")))
+        book.add(RestingOrder(order_id + 10, 1, OrderSide.SELL, Decimal(price) + 10, Decimal("1"), Decimal("1")))
+    
+    assert [l.price for l in book.bids.iter_levels()] == [Decimal("3"), Decimal("2"), Decimal("1")]
+    assert [l.price for l in book.asks.iter_levels()] == [Decimal("11"), Decimal("12"), Decimal("13")]
+
+@pytest.mark.asyncio
+async def test_sequencer_serializes_per_pair():
+    """Test jobs for one pair never overlap while other pairs run freely"""
+    sequencer = OrderSequencer()
+    running = {"BTC/USDT": 0, "ETH/USDT": 0}
+    overlap = []
+    
+    async def job(pair, value):
+        running[pair] += 1
+        overlap.append(running["BTC/USDT"] > 1)
+        await asyncio.sleep(0)
+        running[pair] -= 1
+        return value
+    
+    results = await asyncio.gather(*[
+        sequencer.submit(pair, job, pair, i)
+        for i in range(5) for pair in ("BTC/USDT", "ETH/USDT")
+    ])
+    
+    assert results == [i for i in range(5) for _ in range(2)]
+    assert not any(overlap)
+    assert sequencer.stats()["BTC/USDT"]["processed"] == 5
+    await sequencer.stop()
+
+@pytest.mark.asyncio
+async def test_sequencer_propagates_errors():
+    """Test job exceptions reach the caller and the queue keeps running"""
+    sequencer = OrderSequencer()
+    
+    async def fail():
+        raise ValueError("boom")
+    
+    async def ok():
+        return "ok"
+    
+    with pytest.raises(ValueError):
+        await sequencer.submit("BTC/USDT", fail)
+    assert await sequencer.submit("BTC/USDT", ok) == "ok"
+    await sequencer.stop()
+
+def test_settlement_accumulates_deltas():
+    """Test fills against one maker collapse into one delta per balance"""
+    settlement = Settlement()
+    for price in (Decimal("49000"), Decimal("49500")):
+        trade = Trade(
+            buy_order_id=1,
+            sell_order_id=2,
+            pair="BTC/USDT",
+            price=price,
+            amount=Decimal("0.1"),
+            fee=Decimal("0.0001"),
+            buyer_id=1,
+            seller_id=2
+        )
+        settlement.add_trade(trade, buy_price=Decimal("50000"))
+    
+    assert len(settlement.deltas) == 4
+    assert len(settlement.trades) == 2
+    
+    buyer_quote = settlement.deltas[(1, "USDT")]
+    assert buyer_quote.amount == Decimal("-9850")
+    assert buyer_quote.reserved == Decimal("-10000")
+    assert settlement.deltas[(1, "BTC")].amount == Decimal("0.1998")
+    assert settlement.system[("fees", "BTC")] == Decimal("0.0002")
+    
+    seller_base = settlement.deltas[(2, "BTC")]
+    assert seller_base.amount == Decimal("-0.2")
+    assert seller_base.reserved == Decimal("-0.2")
+    assert settlement.deltas[(2, "USDT")].amount == Decimal("9850")
+
+def test_engine_depth_snapshot():
+    """Test depth aggregates levels and tracks the book sequence"""
+    engine = MatchingEngine()
+    engine.process(make_order(1, 1, OrderSide.SELL, "50000", "0.1"))
+    engine.process(make_order(2, 2, OrderSide.SELL, "50000", "0.2"))
+    engine.process(make_order(3, 3, OrderSide.BUY, "49000", "0.5"))
+    
+    snapshot = engine.depth("BTC/USDT")
+    assert snapshot["asks"] == [(Decimal("50000"), Decimal("0.3"))]
+    assert snapshot["bids"] == [(Decimal("49000"), Decimal("0.5"))]
+    assert engine.depth("BTC/USDT") is snapshot
+    
+    engine.process(make_order(4, 4, OrderSide.BUY, "50000", "0.15"))
+    updated = engine.depth("BTC/USDT")
+    assert updated["sequence"] > snapshot["sequence"]
+    assert updated["asks"] == [(Decimal("50000"), Decimal("0.15"))]
+    
+    assert engine.depth("DOGE/USDT")["bids"] == []
+    assert "DOGE/USDT" not in engine.books
@@ -0,0 +1,98 @@
+"""
+Tests for order placement against the database and in-memory book
+"""
+import pytest
+from decimal import Decimal
+from sqlalchemy import select
+from models.balance import Balance
+from models.order import Order, OrderSide, OrderType, OrderStatus
+from schemas.order import OrderCreate
+from fastapi import HTTPException
+from core.ledger import Journal, EXTERNAL_ACCOUNT
+from core.matching import matching_engine
+import routers.exchange
+from routers.exchange import _execute_order, execute_cancel, settle_external_fill
+
+PAIR = "IOC/USDT"
+HEDGED_PAIR = "HDG/USDT"
+
+async def deposit(db, user_id, asset, amount):
+    journal = Journal("deposit")
+    journal.transfer(EXTERNAL_ACCOUNT, user_id, asset, Decimal(amount))
+    await journal.apply(db)
+    await db.commit()
+
+def order(user_id, side, amount, price=None, pair=PAIR, immediate_fill=False):
+    return OrderCreate(
+        user_id=user_id,
+        pair=pair,
+        side=side,
+        type=OrderType.MARKET if price is None else OrderType.LIMIT,
+        price=Decimal(price) if price is not None else None,
+        amount=Decimal(amount),
+        immediate_fill=immediate_fill
+    )
+
+async def balance(db, user_id, asset):
+    return (await db.execute(
+        select(Balance).where(Balance.user_id == user_id, Balance.asset == asset)
+    )).scalar_one()
+
+@pytest.mark.asyncio
+async def test_market_remainder_is_immediate_or_cancel(session_factory):
+    """Test a market order's unfilled remainder is closed and its reservation released"""
+    async with session_factory() as db:
+        await deposit(db, 901, "IOC", "1")
+        await deposit(db, 902, "USDT", "1000")
+        
+        # Empty book: nothing fills and the whole order is cancelled
+        response = await _execute_order(db, order(901, OrderSide.SELL, "0.8"), 901)
+        assert response["status"] == OrderStatus.CANCELLED.value
+        assert response["trades"] == 0
+        
+        # Thin book: one bid fills, the rest expires
+        await _execute_order(db, order(902, OrderSide.BUY, "0.3", "100"), 902)
+        response = await _execute_order(db, order(901, OrderSide.SELL, "0.8"), 901)
+        assert response["status"] == OrderStatus.FILLED.value
+        assert response["filled"] == Decimal("0.3")
+        assert response["remaining"] == 0
+        
+        seller = await balance(db, 901, "IOC")
+        assert seller.amount == Decimal("0.7")
+        assert seller.reserved == 0
+        statuses = (await db.execute(
+            select(Order.status).where(Order.user_id == 901).order_by(Order.id)
+        )).scalars().all()
+        assert statuses == [OrderStatus.CANCELLED, OrderStatus.FILLED]
+
+@pytest.mark.asyncio
+async def test_orders_held_for_bybit_settle_or_rest_again(session_factory, monkeypatch):
+    """Test a held order can't be cancelled mid-hedge, then fills or returns to the book"""
+    monkeypatch.setattr(routers.exchange, "AsyncSessionLocal", session_factory)
+    book = matching_engine.get_book(HEDGED_PAIR)
+    async with session_factory() as db:
+        await deposit(db, 903, "USDT", "1000")
+        filled = await _execute_order(db, order(903, OrderSide.BUY, "1", "100", HEDGED_PAIR, True), 903)
+        rested = await _execute_order(db, order(903, OrderSide.BUY, "1", "90", HEDGED_PAIR, True), 903)
+    assert book.bids.best() is None
+    
+    # The Bybit request is in flight, so the exchange can't let the order go
+    with pytest.raises(HTTPException) as refused:
+        await execute_cancel(filled["order_id"], 903)
+    assert refused.value.status_code == 400
+    
+    assert await settle_external_fill(filled["order_id"], (Decimal("99"), "bybit-1"))
+    assert not await settle_external_fill(rested["order_id"], None)
+    assert book.bids.best().price == Decimal("90")
+    
+    # Back on the book, it cancels as usual
+    assert (await execute_cancel(rested["order_id"], 903))["success"]
+    assert book.bids.best() is None
+    async with session_factory() as db:
+        quote = await balance(db, 903, "USDT")
+        assert (quote.amount, quote.reserved) == (Decimal("901"), 0)
+        assert (await balance(db, 903, "HDG")).amount == Decimal("0.999")
+        statuses = (await db.execute(
+            select(Order.status).where(Order.user_id == 903).order_by(Order.id)
+        )).scalars().all()
+        assert statuses == [OrderStatus.FILLED, OrderStatus.CANCELLED]
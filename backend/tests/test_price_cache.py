@@ -0,0 +1,58 @@
+"""
+Tests for the TTL price cache
+"""
+import asyncio
+import pytest
+from services.cache import TTLCache
+
+class CountingLoader:
+    def __init__(self, delay=0.01):
+        self.calls = []
+        self.delay = delay
+    
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        await asyncio.sleep(self.delay)
+        return {key: f"value:{key}:{len(self.calls)}" for key in keys}
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    """Test concurrent misses for the same keys make a single upstream call"""
+    cache = TTLCache(ttl=60)
+    loader = CountingLoader()
+    
+    results = await asyncio.gather(*[cache.get_many(["btc", "eth"], loader) for _ in range(10)])
+    
+    assert len(loader.calls) == 1
+    assert all(result == results[0] for result in results)
+    assert results[0]["btc"] == "value:btc:1"
+    
+    # Fresh hits don't touch the loader
+    await cache.get_many(["btc"], loader)
+    assert len(loader.calls) == 1
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_revalidating():
+    """Test stale entries return immediately and refresh in the background"""
+    cache = TTLCache(ttl=0, stale_ttl=60)
+    loader = CountingLoader()
+    await cache.get_many(["btc"], loader)
+    
+    result = await cache.get_many(["btc"], loader)
+    assert result["btc"] == "value:btc:1"
+    assert cache.stale_hits == 1
+    
+    await asyncio.sleep(0.05)
+    assert len(loader.calls) == 2
+    assert cache.entries["btc"][0] == "value:btc:2"
+
+@pytest.mark.asyncio
+async def test_refresh_reloads_fresh_keys():
+    """Test refresh keeps the cache warm even while entries are fresh"""
+    cache = TTLCache(ttl=60)
+    loader = CountingLoader(delay=0)
+    await cache.get_many(["btc"], loader)
+    await cache.refresh(["btc"], loader)
+    
+    assert len(loader.calls) == 2
+    assert (await cache.get_many(["btc"], loader))["btc"] == "value:btc:2"
@@ -0,0 +1,43 @@
+"""
+Tests for the price store
+"""
+import pytest
+from decimal import Decimal
+from core.prices import PriceStore, gecko_quotes
+
+COIN_IDS = {"BTC": "bitcoin", "ETH": "ethereum", "SOL": "solana"}
+
+GECKO_RESPONSE = {
+    "bitcoin": {"usd": 50000.0, "usd_24h_change": 2.5, "usd_24h_vol": 20000000000},
+    "ethereum": {"usd": 3000.0}
+}
+
+def test_gecko_quotes_skips_missing_coins():
+    """Test CoinGecko payloads map to per-asset USD quotes"""
+    quotes = {q.asset: q for q in gecko_quotes(GECKO_RESPONSE, COIN_IDS)}
+    
+    assert set(quotes) == {"BTC", "ETH"}
+    assert quotes["BTC"].quote == "USD"
+    assert quotes["BTC"].price == Decimal("50000.0")
+    assert quotes["BTC"].change_24h == Decimal("2.5")
+    assert quotes["ETH"].volume_24h is None
+
+@pytest.mark.asyncio
+async def test_update_persists_and_reloads(session_factory):
+    """Test upserted prices survive a reload and value holdings"""
+    
+    store = PriceStore()
+    async with session_factory() as db:
+        await store.update(db, gecko_quotes(GECKO_RESPONSE, COIN_IDS))
+        await db.commit()
+        await store.update(db, gecko_quotes({"bitcoin": {"usd": 51000.0}}, COIN_IDS))
+        await db.commit()
+    
+    reloaded = PriceStore()
+    async with session_factory() as db:
+        await reloaded.load(db)
+    
+    assert reloaded.get_price("BTC") == Decimal("51000")
+    assert reloaded.get_price("eth", "usd") == Decimal("3000")
+    assert reloaded.get_price("SOL") is None
+    assert reloaded.total_value({"BTC": Decimal("2"), "ETH": Decimal("1"), "SOL": Decimal("5")}) == Decimal("105000")
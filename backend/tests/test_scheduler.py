@@ -0,0 +1,65 @@
+"""
+Tests for the background job scheduler
+"""
+import asyncio
+import pytest
+from core.scheduler import Job, Scheduler
+
+@pytest.mark.asyncio
+async def test_job_does_not_overlap_itself():
+    """Test a run is skipped while the previous one is still going"""
+    release = asyncio.Event()
+    
+    async def slow():
+        await release.wait()
+    
+    job = Job("slow", slow, interval=1)
+    first = asyncio.create_task(job.run_once())
+    await asyncio.sleep(0)
+    
+    assert await job.run_once() is False
+    release.set()
+    assert await first is True
+    assert job.runs == 1
+    assert job.skipped == 1
+
+@pytest.mark.asyncio
+async def test_job_timeout_and_failure_are_recorded():
+    """Test timeouts and exceptions are counted without stopping the job"""
+    async def hang():
+        await asyncio.sleep(10)
+    
+    async def boom():
+        raise ValueError("boom")
+    
+    hanging = Job("hang", hang, interval=1, timeout=0.01)
+    failing = Job("boom", boom, interval=1)
+    await hanging.run_once()
+    await failing.run_once()
+    
+    assert hanging.stats()["timeouts"] == 1
+    assert failing.stats()["failures"] == 1
+    assert failing.stats()["last_error"] == "boom"
+
+@pytest.mark.asyncio
+async def test_jobs_run_on_independent_intervals():
+    """Test a fast job keeps running while a slow job is blocked"""
+    counts = {"fast": 0, "slow": 0}
+    
+    async def fast():
+        counts["fast"] += 1
+    
+    async def slow():
+        counts["slow"] += 1
+        await asyncio.sleep(10)
+    
+    scheduler = Scheduler()
+    scheduler.add_job("fast", fast, interval=0.01, jitter=0)
+    scheduler.add_job("slow", slow, interval=0.01, jitter=0)
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+    
+    assert counts["fast"] >= 5
+    assert counts["slow"] == 1
+    assert scheduler.stats()["fast"]["runs"] == counts["fast"]
@@ -0,0 +1,49 @@
+"""
+Tests for reward-index staking accrual
+"""
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from models.stake import Stake
+from core.staking import SECONDS_PER_YEAR, advance_all_pools, enter_stake, settle_stake
+
+def make_stake(amount, since):
+    return Stake(
+        user_id=1,
+        asset="TON",
+        amount=Decimal(amount),
+        apr=Decimal("0.10"),
+        since=since,
+        until=since + timedelta(days=30),
+        is_active=True,
+        rewards_claimed=Decimal("0")
+    )
+
+@pytest.mark.asyncio
+async def test_rewards_accrue_per_second_from_entry_index(session_factory):
+    """Test each stake earns only from its own entry, to the second"""
+    start = datetime(2026, 1, 1)
+    async with session_factory() as db:
+        early = make_stake("1000", start)
+        await enter_stake(db, early, start)
+        db.add(early)
+        
+        # Checkpoints in between must not change anyone's reward
+        assert await advance_all_pools(db, start + timedelta(seconds=3600)) == 1
+        
+        late = make_stake("1000", start + timedelta(seconds=7200))
+        await enter_stake(db, late, late.since)
+        db.add(late)
+        await db.commit()
+        
+        now = start + timedelta(seconds=10000)
+        early_reward = await settle_stake(db, early, now)
+        late_reward = await settle_stake(db, late, now)
+        
+        per_second = Decimal("1000") * Decimal("0.10") / SECONDS_PER_YEAR
+        assert abs(early_reward - per_second * 10000) < Decimal("0.00000002")
+        assert abs(late_reward - per_second * 2800) < Decimal("0.00000002")
+        
+        # Claiming again at the same instant pays nothing
+        assert await settle_stake(db, early, now) == 0
+        assert early.rewards_claimed == early_reward
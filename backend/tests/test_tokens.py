@@ -0,0 +1,60 @@
+"""
+Tests for the fast JWT verifier
+"""
+import time
+import pytest
+from jose import jwt
+from core.tokens import TokenVerifier, InvalidToken
+
+SECRET = "test-secret"
+
+def make_token(claims, secret=SECRET, algorithm="HS256"):
+    return jwt.encode(claims, secret, algorithm=algorithm)
+
+def test_verifies_tokens_issued_by_jose():
+    """Test claims match and repeat verifications are served from the cache"""
+    verifier = TokenVerifier(SECRET, "HS256")
+    token = make_token({"telegram_id": 42, "exp": int(time.time()) + 60})
+    
+    assert verifier.verify(token)["telegram_id"] == 42
+    assert verifier.verify(token)["telegram_id"] == 42
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not-a-token",
+    "a.b",
+    "a.b.c.d",
+    "a.b.c==",
+    "x" * 5000,
+    make_token({"telegram_id": 1, "exp": int(time.time()) + 60}, secret="other"),
+    make_token({"telegram_id": 1, "exp": int(time.time()) - 1}),
+    make_token({"telegram_id": 1}),
+    make_token({"telegram_id": 1, "exp": int(time.time()) + 60}, algorithm="HS512"),
+])
+def test_rejects_bad_tokens(token):
+    """Test malformed, forged, expired and wrong-algorithm tokens are rejected"""
+    verifier = TokenVerifier(SECRET, "HS256")
+    with pytest.raises(InvalidToken):
+        verifier.verify(token)
+
+def test_tampered_payload_is_rejected():
+    """Test a payload swapped under a valid signature fails"""
+    verifier = TokenVerifier(SECRET, "HS256")
+    good = make_token({"telegram_id": 1, "exp": int(time.time()) + 60})
+    other = make_token({"telegram_id": 2, "exp": int(time.time()) + 60}, secret="other")
+    header, _, signature = good.split(".")
+    with pytest.raises(InvalidToken):
+        verifier.verify(".".join([header, other.split(".")[1], signature]))
+
+def test_cached_tokens_expire(monkeypatch):
+    """Test a cached token stops verifying at its exp"""
+    verifier = TokenVerifier(SECRET, "HS256")
+    now = time.time()
+    token = make_token({"telegram_id": 1, "exp": int(now) + 60})
+    verifier.verify(token)
+    
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    with pytest.raises(InvalidToken):
+        verifier.verify(token)
+    assert token not in verifier.cache
@@ -0,0 +1,41 @@
+"""
+Tests for the authenticated user principal cache
+"""
+import pytest
+from sqlalchemy import select
+from models.user import User
+from core.users import UserCache
+import core.users
+
+@pytest.mark.asyncio
+async def test_principals_are_cached_until_the_user_changes(session_factory, monkeypatch):
+    """Test repeat lookups skip the database and a freeze drops the cached user"""
+    cache = UserCache(ttl=60)
+    monkeypatch.setattr(core.users, "user_cache", cache)
+    
+    async with session_factory() as db:
+        db.add(User(telegram_id=42, username="alice"))
+        await db.commit()
+        
+        assert (await cache.load(db, 42))["username"] == "alice"
+        assert (await cache.load(db, 42))["is_active"] is True
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert await cache.load(db, 7) is None
+    
+    async with session_factory() as db:
+        user = (await db.execute(select(User).where(User.telegram_id == 42))).scalar_one()
+        user.is_active = False
+        await db.commit()
+    
+    async with session_factory() as db:
+        assert cache.get(42) is None
+        assert (await cache.load(db, 42))["is_active"] is False
+
+def test_cache_is_bounded_lru():
+    """Test the least recently used principal is evicted first"""
+    cache = UserCache(ttl=60, max_size=2)
+    for telegram_id in (1, 2):
+        cache.set({"telegram_id": telegram_id})
+    assert cache.get(1) is not None
+    cache.set({"telegram_id": 3})
+    assert list(cache.entries) == [1, 3]
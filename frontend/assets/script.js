@@ -320,6 +320,102 @@ async function createWithdraw() {
     }
 }
 
+// Market Data WebSocket
+const WS_BASE = API_BASE.replace(/^http/, 'ws');
+
+function subscribeMarketData(pair, handlers = {}) {
+    // Local copy of the book: price -> amount per side
+    const book = { bids: new Map(), asks: new Map(), sequence: -1 };
+    // Replaced on every reconnect
+    let socket = null;
+    let reconnectTimer = null;
+    let closed = false;
+    
+    const applyLevels = (side, levels) => {
+        levels.forEach(([price, amount]) => {
+            if (parseFloat(amount) === 0) {
+                book[side].delete(price);
+            } else {
+                book[side].set(price, amount);
+            }
+        });
+    };
+    
+    const resubscribe = () => {
+        socket.send(JSON.stringify({ op: 'unsubscribe', pair }));
+        socket.send(JSON.stringify({ op: 'subscribe', pair }));
+    };
+    
+    const handleMessage = (message) => {
+        if (message.type === 'snapshot') {
+            book.bids.clear();
+            book.asks.clear();
+            applyLevels('bids', message.bids);
+            applyLevels('asks', message.asks);
+            book.sequence = message.sequence;
+            handlers.onBook && handlers.onBook(book);
+        } else if (message.type === 'depth') {
+            // Already covered by the snapshot
+            if (message.sequence <= book.sequence) return;
+            // Missed a diff, start over from a fresh snapshot
+            if (message.prev_sequence > book.sequence) {
+                resubscribe();
+                return;
+            }
+            applyLevels('bids', message.bids);
+            applyLevels('asks', message.asks);
+            book.sequence = message.sequence;
+            handlers.onBook && handlers.onBook(book);
+        } else if (message.type === 'trades') {
+            handlers.onTrades && handlers.onTrades(message.trades);
+        } else if (message.type === 'ticker') {
+            handlers.onTicker && handlers.onTicker(message);
+        } else if (message.type === 'order') {
+            handlers.onOrder && handlers.onOrder(message);
+        } else if (message.type === 'fill') {
+            handlers.onFill && handlers.onFill(message);
+        }
+    };
+    
+    const connect = () => {
+        reconnectTimer = null;
+        // The next snapshot replaces whatever the book held
+        book.sequence = -1;
+        socket = new WebSocket(`${WS_BASE}/exchange/ws`);
+        
+        socket.onopen = () => {
+            socket.send(JSON.stringify({ op: 'subscribe', pair }));
+            // Private order and fill events need the session token
+            if (handlers.token) {
+                socket.send(JSON.stringify({ op: 'auth', token: handlers.token }));
+            }
+        };
+        
+        socket.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+            // The server coalesces queued messages into one array frame
+            (Array.isArray(data) ? data : [data]).forEach(handleMessage);
+        };
+        
+        socket.onclose = () => {
+            // Dropped as a slow consumer or network loss, reconnect shortly
+            if (!closed) {
+                reconnectTimer = setTimeout(connect, 2000);
+            }
+        };
+    };
+    
+    connect();
+    
+    return {
+        close() {
+            closed = true;
+            clearTimeout(reconnectTimer);
+            socket.close();
+        }
+    };
+}
+
 // Utility Functions
 function formatCurrency(amount, currency = 'USDT') {
     return new Intl.NumberFormat('en-US', {
@@ -376,3 +472,4 @@ window.toggleAssetType = toggleAssetType;
 window.createDeposit = createDeposit;
 window.createWithdraw = createWithdraw;
 window.closeModal = closeModal;
+window.subscribeMarketData = subscribeMarketData;
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Bridge Exchange JWT Verification Benchmark
+Compares jose.jwt.decode with the cached HMAC verifier used by get_current_user
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from jose import jwt, JWTError
+from config import JWT_SECRET_KEY, JWT_ALGORITHM
+from core.tokens import TokenVerifier, InvalidToken
+
+ITERATIONS = 20000
+USERS = 1000
+
+def make_tokens(count):
+    expire = datetime.utcnow() + timedelta(minutes=30)
+    return [
+        jwt.encode({"telegram_id": 100000 + i, "exp": expire}, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+        for i in range(count)
+    ]
+
+def bench(name, func, tokens):
+    index = iter(range(10 ** 9))
+    elapsed = timeit.timeit(lambda: func(tokens[next(index) % len(tokens)]), number=ITERATIONS)
+    print(f"{name:<32} {elapsed / ITERATIONS * 1e6:8.2f} us/token")
+
+def jose_decode(token):
+    return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+
+def reject(verify, errors):
+    def run(token):
+        try:
+            verify(token)
+        except errors:
+            pass
+    return run
+
+def main():
+    tokens = make_tokens(USERS)
+    malformed = ["x" * 300, "a.b", "not a token at all"]
+    print(f"{ITERATIONS} verifications over {USERS} distinct tokens\n")
+    
+    bench("jose.jwt.decode", jose_decode, tokens)
+    bench("TokenVerifier, no cache", TokenVerifier(cache_size=0).verify, tokens)
+    
+    verifier = TokenVerifier()
+    for token in tokens:
+        verifier.verify(token)
+    bench("TokenVerifier, cached", verifier.verify, tokens)
+    
+    bench("jose.jwt.decode, malformed", reject(jose_decode, JWTError), malformed)
+    bench("TokenVerifier, malformed", reject(TokenVerifier().verify, InvalidToken), malformed)
+
+if __name__ == "__main__":
+    main()